@@ -54,6 +54,10 @@ def create_app(test_config=None):
 
     redis_url = os.environ.get("REDIS_URL", "redis://localhost:6379")
     app.config["SESSION_REDIS"] = redis.from_url(redis_url)
+    # Namespaces the application's own cache keys in the shared Redis instance
+    app.config.setdefault("CACHE_KEY_PREFIX", "finance_tracker:")
+    # Background jobs run in-process unless a `flask run-jobs` worker is deployed
+    app.config.setdefault("JOBS_RUN_INLINE", app.testing)
     Session(app)
 
     # Inject version globally
@@ -79,6 +83,13 @@ def create_app(test_config=None):
     from app.routes.import_rules import import_rules_bp
     from app.routes.reports import report_bp
     from app.routes.help import help_bp
+    from app.routes.jobs import jobs_bp
+
+    # Importing the rollup service registers the session listeners that keep
+    # monthly_category_rollup in sync with transaction writes.
+    from app.services import rollup  # noqa: F401
+    # Likewise for the listeners that version the cached categories, account types and rules.
+    from app.services import reference_data  # noqa: F401
 
     @login_manager.user_loader
     def load_user(user_id):
@@ -95,6 +106,7 @@ def create_app(test_config=None):
     app.register_blueprint(import_rules_bp)
     app.register_blueprint(report_bp)
     app.register_blueprint(help_bp)
+    app.register_blueprint(jobs_bp)
 
     # Default route that redirects to the login page
     @app.route("/")
@@ -113,6 +125,9 @@ def create_app(test_config=None):
     def internal_error(error):
         return render_template('error/500.html'), 500
 
+    from app.services.jobs import run_jobs_command
+    app.cli.add_command(run_jobs_command)
+
     try:
         from app.cli import seed_db
         app.cli.add_command(seed_db)
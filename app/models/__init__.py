@@ -1,3 +1,5 @@
 from .user import User                  # noqa: F401
 from .transaction import Transaction    # noqa: F401
 from .budget import Budget              # noqa: F401
+from .monthly_category_rollup import MonthlyCategoryRollup    # noqa: F401
+from .import_batch import ImportBatch, ImportStagedRow    # noqa: F401
@@ -0,0 +1,72 @@
+import datetime
+from app import db
+
+
+class ImportBatch(db.Model):
+    """
+    An uploaded CSV import waiting for the user to review and confirm it.
+
+    The parsed rows live in ImportStagedRow; the session only keeps the batch ID.
+
+    Attributes:
+        id (int): Primary key for the batch.
+        user_id (int): Foreign key referencing the user who uploaded the files.
+        created_at (datetime): When the batch was staged.
+        total_rows (int): Number of staged rows.
+        total_duplicates (int): Number of staged rows flagged as duplicates.
+        current_index (int): Position of the first row not yet confirmed.
+        total_imported (int): Number of transactions imported from the batch so far.
+    """
+    __tablename__ = "import_batch"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+    total_rows = db.Column(db.Integer, nullable=False, default=0)
+    total_duplicates = db.Column(db.Integer, nullable=False, default=0)
+    current_index = db.Column(db.Integer, nullable=False, default=0)
+    total_imported = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ImportBatch {self.id} ({self.current_index}/{self.total_rows}) (User ID: {self.user_id})>"
+
+
+class ImportStagedRow(db.Model):
+    """
+    One parsed CSV row of an import batch.
+
+    Attributes:
+        id (int): Primary key for the staged row.
+        batch_id (int): Foreign key referencing the owning import batch.
+        position (int): Zero-based position of the row within the batch.
+        tx_date (date): Transaction date.
+        description (str): Transaction description.
+        amount (float): Transaction amount.
+        category_field (str): Category name after import rules were applied.
+        account_id (int): Foreign key referencing the account type the file was imported for.
+        account_name (str): Name of that account type.
+        is_duplicate (bool): Whether the row matches a stored transaction or an earlier row.
+        force_import (bool): Whether the row should be imported despite being a duplicate.
+        is_transfer (bool): Whether the row is a transfer.
+    """
+    __tablename__ = "import_staged_row"
+
+    id = db.Column(db.Integer, primary_key=True)
+    batch_id = db.Column(db.Integer, db.ForeignKey("import_batch.id", ondelete="CASCADE"), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    tx_date = db.Column(db.Date, nullable=False)
+    description = db.Column(db.Text)
+    amount = db.Column(db.Float, nullable=False)
+    category_field = db.Column(db.String(100), nullable=False)
+    account_id = db.Column(db.Integer, db.ForeignKey("account_types.id"), nullable=False)
+    account_name = db.Column(db.String(64))
+    is_duplicate = db.Column(db.Boolean, nullable=False, default=False)
+    force_import = db.Column(db.Boolean, nullable=False, default=False)
+    is_transfer = db.Column(db.Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('batch_id', 'position', name='_staged_row_position_uc'),
+    )
+
+    def __repr__(self):
+        return f"<ImportStagedRow {self.position} of batch {self.batch_id}: {self.description}>"
@@ -0,0 +1,43 @@
+from app import db
+
+
+class MonthlyCategoryRollup(db.Model):
+    """
+    Pre-aggregated transaction totals per family, account, category and month.
+
+    Rows are maintained incrementally by app.services.rollup whenever transactions
+    are written, so dashboards and reports can sum a handful of monthly buckets
+    instead of scanning the family's full transaction history.
+
+    Attributes:
+        id (int): Primary key for the rollup row.
+        family_id (int): Foreign key referencing the family owning the transactions.
+        account_id (int): Foreign key referencing the account type of the transactions.
+        category_id (int): Foreign key referencing the category of the transactions.
+        year (int): Calendar year of the bucket.
+        month (int): Calendar month (1-12) of the bucket.
+        is_transfer (bool): Whether the bucket holds transfer transactions.
+        income (float): Sum of the positive amounts in the bucket.
+        expense (float): Sum of the negative amounts in the bucket.
+        count (int): Number of transactions in the bucket.
+    """
+    __tablename__ = "monthly_category_rollup"
+
+    id = db.Column(db.Integer, primary_key=True)
+    family_id = db.Column(db.Integer, db.ForeignKey("family.id"), nullable=False)
+    account_id = db.Column(db.Integer, db.ForeignKey("account_types.id"), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey("category.id"), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    is_transfer = db.Column(db.Boolean, nullable=False, default=False)
+    income = db.Column(db.Float, nullable=False, default=0)
+    expense = db.Column(db.Float, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('family_id', 'account_id', 'category_id', 'year', 'month', 'is_transfer', name='_rollup_bucket_uc'),
+        db.Index('ix_rollup_family_transfer_period', 'family_id', 'is_transfer', 'year', 'month'),
+    )
+
+    def __repr__(self):
+        return f"<MonthlyCategoryRollup {self.year}-{self.month:02d} category={self.category_id} (Family ID: {self.family_id})>"
@@ -1,4 +1,5 @@
 import datetime
+import hashlib
 from app import db
 
 
@@ -12,19 +13,59 @@ class Transaction(db.Model):
         description (str): Optional description of the transaction.
         timestamp (datetime): The date and time of the transaction. Defaults to the current UTC time.
         user_id (int): Foreign key referencing the user associated with the transaction.
+        family_id (int): Foreign key referencing the owning user's family (denormalized for family-scoped queries).
         category_id (int): Foreign key referencing the category of the transaction.
         account_id (int): Foreign key referencing the account type of the transaction.
         is_transfer (bool): Indicates if the transaction is a transfer. Defaults to False.
+        dedup_key (str): Fingerprint of the date, rounded amount and account, shared by likely duplicates.
     """
     id = db.Column(db.Integer, primary_key=True)
     amount = db.Column(db.Float, nullable=False)  # Transaction amount must be provided.
     description = db.Column(db.String(255))  # Optional description for the transaction.
     timestamp = db.Column(db.DateTime, default=datetime.datetime.now(datetime.timezone.utc))  # Default to UTC time.
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)  # Associated user ID.
+    family_id = db.Column(db.Integer, db.ForeignKey("family.id"))  # Family of the user; None for users without a family.
     category_id = db.Column(db.Integer, db.ForeignKey("category.id"), nullable=False)  # Associated category ID.
     account_id = db.Column(db.Integer, db.ForeignKey("account_types.id"), nullable=False)  # Associated account type ID.
     is_transfer = db.Column(db.Boolean, default=False)  # Indicates if the transaction is a transfer.
+    dedup_key = db.Column(db.String(16))  # See compute_dedup_key; kept up to date on every write.
 
     # Relationships
     category = db.relationship("Category", backref="transactions")  # Relationship to Category model.
     account = db.relationship("AccountType", backref="transactions")  # Relationship to AccountType model.
+
+    # Composite indexes matching the family/date filters used by the dashboard, reports,
+    # transaction list, CSV export and bulk delete queries. Users without a family are
+    # scoped by user_id instead.
+    __table_args__ = (
+        db.Index('ix_transaction_family_transfer_timestamp', 'family_id', 'is_transfer', 'timestamp'),
+        db.Index('ix_transaction_family_category_timestamp', 'family_id', 'category_id', 'timestamp'),
+        db.Index('ix_transaction_family_timestamp', 'family_id', 'timestamp'),
+        db.Index('ix_transaction_user_transfer_timestamp', 'user_id', 'is_transfer', 'timestamp'),
+        db.Index('ix_transaction_account_timestamp', 'account_id', 'timestamp'),
+        db.Index('ix_transaction_family_dedup_key', 'family_id', 'dedup_key'),
+    )
+
+    @staticmethod
+    def compute_dedup_key(timestamp, amount, account_id):
+        """
+        Return the duplicate fingerprint of a transaction.
+
+        Transactions on the same day, for the same amount rounded to cents and on the same
+        account share a key, so duplicates can be found with an indexed GROUP BY.
+
+        Args:
+            timestamp (datetime or date): When the transaction happened.
+            amount (float or str): The monetary value.
+            account_id (int): The account type ID.
+
+        Returns:
+            str: A 16 character hex digest, or None if the timestamp or amount is missing.
+        """
+        if timestamp is None or amount is None:
+            return None
+        day = timestamp.date() if isinstance(timestamp, datetime.datetime) else timestamp
+        # Adding 0.0 folds -0.0 into 0.0 so both format the same.
+        cents = round(float(amount), 2) + 0.0
+        raw = f"{day.isoformat()}|{cents:.2f}|{account_id}"
+        return hashlib.sha1(raw.encode()).hexdigest()[:16]
@@ -1,12 +1,11 @@
 from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
-from sqlalchemy import func
 from app.models.budget import Budget
 from app.models.category import Category
-from app.models.transaction import Transaction
 from app import db
-from app.models.user import User
 from app.forms.budget_form import EditBudgetForm, AddBudgetForm
+from app.services.family import get_family_user_ids
+from app.services.budget import calculate_budget_spent
 
 
 budgets_bp = Blueprint("budgets", __name__)
@@ -22,64 +21,27 @@ def get_selected_categories(category_ids):
         return []
 
 
-def get_family_user_ids():
-    """Retrieve IDs of the current user and their family members."""
-    family_user_ids = [current_user.id]
-    if current_user.family_id:
-        try:
-            family_users = User.query.filter_by(family_id=current_user.family_id).all()
-            family_user_ids = [user.id for user in family_users]
-        except Exception as e:
-            current_app.logger.error(e)
-            flash("Error retrieving family members.", "danger")
-    return family_user_ids
-
-
-def calculate_total_spent_per_category(family_user_ids, category_ids):
-    """Calculate total spent per category for the given user IDs."""
+def calculate_budget_details(user_budgets, family_user_ids):
+    """Calculate detailed budget information."""
     try:
-        return {
-            category_id: db.session.query(func.sum(Transaction.amount))
-            .filter(
-                Transaction.user_id.in_(family_user_ids),
-                Transaction.category_id == category_id
-            ).scalar() or 0
-            for category_id in category_ids
-        }
+        spent_by_budget = calculate_budget_spent(user_budgets, family_user_ids)
     except Exception as e:
         current_app.logger.error(e)
-        flash("Error calculating total spent per category.", "danger")
-        return {}
-
-
-def calculate_budget_details(user_budgets, family_user_ids):
-    """Calculate detailed budget information."""
+        flash("Error calculating budget details.", "danger")
+        return []
     detailed_budgets = []
     for budget in user_budgets:
-        try:
-            category_ids = [category.id for category in budget.categories]
-            total_spent = db.session.query(func.sum(Transaction.amount)).filter(
-                Transaction.user_id.in_(family_user_ids),
-                Transaction.category_id.in_(category_ids),
-                Transaction.timestamp >= budget.start_date,
-                Transaction.timestamp <= budget.end_date
-            ).scalar() or 0
-
-            remaining = budget.amount - abs(total_spent)
-
-            detailed_budgets.append({
-                "id": budget.id,
-                "name": budget.name,
-                "amount": budget.amount,
-                "spent": total_spent,
-                "remaining": remaining,
-                "start_date": budget.start_date.strftime("%Y-%m-%d") if budget.start_date else "N/A",
-                "end_date": budget.end_date.strftime("%Y-%m-%d") if budget.end_date else "N/A",
-                "categories": [category.name for category in budget.categories]
-            })
-        except Exception as e:
-            current_app.logger.error(e)
-            flash(f"Error calculating details for budget {budget.name}.", "danger")
+        total_spent = spent_by_budget[budget.id]
+        detailed_budgets.append({
+            "id": budget.id,
+            "name": budget.name,
+            "amount": budget.amount,
+            "spent": total_spent,
+            "remaining": budget.amount - abs(total_spent),
+            "start_date": budget.start_date.strftime("%Y-%m-%d") if budget.start_date else "N/A",
+            "end_date": budget.end_date.strftime("%Y-%m-%d") if budget.end_date else "N/A",
+            "categories": [category.name for category in budget.categories]
+        })
     return detailed_budgets
 
 
@@ -110,7 +72,6 @@ def budgets():
         categories = Category.query.filter_by(family_id=current_user.family_id).all()
         categories_dict = {category.id: category.name for category in categories}
         user_budgets = Budget.query.filter(Budget.user_id.in_(family_user_ids)).options(db.joinedload(Budget.categories)).all()
-        category_ids = {c.id for budget in user_budgets for c in budget.categories}
         detailed_budgets = calculate_budget_details(user_budgets, family_user_ids)
     except Exception as e:
         current_app.logger.error(e)
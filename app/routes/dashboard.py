@@ -1,14 +1,10 @@
-from sqlalchemy import func, extract, case
 from app.models.transaction import Transaction
-from app.models.category import Category
-from app.models.user import User
 from flask import Blueprint, current_app, render_template, session, request, flash, redirect, url_for
 from flask_login import login_required, current_user
-from app import db
 import datetime
-import calendar
-from dateutil.relativedelta import relativedelta
-from app.models.budget import Budget
+from app.services.family import family_transaction_filter, get_family_user_ids
+from app.services.budget import get_budget_progress
+from app.services.dashboard import empty_dashboard_data, get_dashboard_data
 
 
 dashboard_bp = Blueprint("dashboard", __name__)
@@ -41,106 +37,16 @@ def set_chart_slices():
     return redirect(url_for("dashboard.dashboard"))
 
 
-def get_family_user_ids():
+def get_dashboard_totals(today):
     """
-    Retrieve the list of user IDs for the current user or their family.
-    """
-    if current_user.family_id:
-        try:
-            family_users = User.query.filter_by(family_id=current_user.family_id).all()
-            return [user.id for user in family_users]
-        except Exception as e:
-            current_app.logger.error(e)
-            flash("Error retrieving family users.", "danger")
-            return []
-    return [current_user.id]
-
-
-def calculate_totals(user_ids, year):
-    """
-    Calculate total income, expenses, and balance for the given user IDs and year.
-    """
-    try:
-        total_income = (
-            Transaction.query
-            .filter(
-                Transaction.user_id.in_(user_ids),
-                Transaction.amount > 0,
-                Transaction.is_transfer.is_(False),
-                extract('year', Transaction.timestamp) == year
-            )
-            .with_entities(func.sum(Transaction.amount))
-            .scalar() or 0
-        )
-        total_expenses = (
-            Transaction.query
-            .filter(
-                Transaction.user_id.in_(user_ids),
-                Transaction.amount < 0,
-                Transaction.is_transfer.is_(False),
-                extract('year', Transaction.timestamp) == year
-            )
-            .with_entities(func.sum(Transaction.amount))
-            .scalar() or 0
-        )
-        return total_income, abs(total_expenses), total_income - abs(total_expenses)
-    except Exception as e:
-        current_app.logger.error(e)
-        flash("Error calculating totals.", "danger")
-        return 0, 0, 0
-
-
-def get_monthly_data(user_ids, start_date, end_date):
-    """
-    Retrieve monthly income and expense data for the given user IDs and date range.
+    Retrieve the dashboard aggregates, falling back to empty values on errors.
     """
     try:
-        monthly_data = (
-            db.session.query(
-                extract('year', Transaction.timestamp).label("year"),
-                extract('month', Transaction.timestamp).label("month"),
-                func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0)).label("expenses"),
-                func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)).label("income")
-            )
-            .filter(
-                Transaction.user_id.in_(user_ids),
-                Transaction.is_transfer.is_(False),
-                Transaction.timestamp >= start_date,
-                Transaction.timestamp <= end_date
-            )
-            .group_by("year", "month")
-            .all()
-        )
-        return monthly_data
+        return get_dashboard_data(current_user, today)
     except Exception as e:
         current_app.logger.error(e)
-        flash("Error retrieving monthly data.", "danger")
-        return []
-
-
-def get_category_totals(user_ids, start_date, end_date):
-    """
-    Retrieve category totals for income and expenses.
-    """
-    try:
-        category_totals = (
-            db.session.query(Category, func.sum(Transaction.amount).label("total"))
-            .join(Transaction, Transaction.category_id == Category.id)
-            .filter(
-                Transaction.user_id.in_(user_ids),
-                Transaction.is_transfer.is_(False),
-                Transaction.timestamp >= start_date,
-                Transaction.timestamp <= end_date,
-                Category.family_id == current_user.family_id
-            )
-            .group_by(Category.id)
-            .all()
-        )
-        return category_totals
-    except Exception as e:
-        current_app.logger.error(e)
-        flash("Error retrieving category totals.", "danger")
-        return []
+        flash("Error retrieving dashboard data.", "danger")
+        return empty_dashboard_data(today)
 
 
 def get_budget_details(user_ids):
@@ -148,22 +54,13 @@ def get_budget_details(user_ids):
     Retrieve budget details for the given user IDs.
     """
     try:
-        budgets = Budget.query.filter(Budget.user_id.in_(user_ids)).all()
         budget_details = []
-        for b in budgets:
-            budgeted = b.amount
-            category_ids = [c.id for c in b.categories]
-            spent = db.session.query(func.sum(Transaction.amount)).filter(
-                Transaction.user_id.in_(user_ids),
-                Transaction.category_id.in_(category_ids),
-                Transaction.timestamp >= b.start_date,
-                Transaction.timestamp <= b.end_date
-            ).scalar() or 0
+        for b, spent in get_budget_progress(user_ids):
             budget_details.append({
                 'name': b.name,
-                'budgeted': budgeted,
+                'budgeted': b.amount,
                 'spent': abs(spent),
-                'remaining': budgeted - abs(spent)
+                'remaining': b.amount - abs(spent)
             })
         return budget_details
     except Exception as e:
@@ -172,28 +69,6 @@ def get_budget_details(user_ids):
         return []
 
 
-def compute_monthly_totals(user_ids, start_date, end_date):
-    """
-    Compute monthly income and expense totals for the given user IDs and date range.
-    """
-    monthly_data = get_monthly_data(user_ids, start_date, end_date)
-    monthly_expenses = []
-    monthly_income = []
-    month_labels = []
-    monthly_lookup = {(int(row.year), int(row.month)): row for row in monthly_data}
-    current_date = start_date
-    while current_date <= end_date:
-        yr, mo = current_date.year, current_date.month
-        row = monthly_lookup.get((yr, mo))
-        income = row.income if row and row.income is not None else 0
-        expenses = abs(row.expenses) if row and row.expenses is not None else 0
-        monthly_income.append(income)
-        monthly_expenses.append(expenses)
-        month_labels.append(current_date.strftime("%b"))
-        current_date = (current_date.replace(day=1) + relativedelta(months=1))
-    return monthly_income, monthly_expenses, month_labels
-
-
 def process_category_totals(category_totals, top_n):
     """
     Process category totals to compute top N items and the "Rest" aggregation.
@@ -216,26 +91,6 @@ def process_category_totals(category_totals, top_n):
     return labels, data, ids, rest_ids
 
 
-def prepare_cash_flow_data(user_ids, year, month):
-    """
-    Prepare cash flow data for the current month.
-    """
-    transactions = Transaction.query.filter(
-        Transaction.user_id.in_(user_ids),
-        Transaction.is_transfer.is_(False),
-        extract('year', Transaction.timestamp) == year,
-        extract('month', Transaction.timestamp) == month
-    ).order_by(Transaction.timestamp.asc()).all()
-    cash_flow_dates = []
-    cash_flow_data = []
-    cumulative = 0
-    for tx in transactions:
-        cumulative += tx.amount
-        cash_flow_dates.append(tx.timestamp.strftime("%Y-%m-%d"))
-        cash_flow_data.append(cumulative)
-    return cash_flow_dates, cash_flow_data
-
-
 def top_with_rest(cat_totals, top_n):
     """
     Extract the top N items from a list of category totals and compute the "Rest" aggregation.
@@ -266,23 +121,13 @@ def dashboard():
     income_list_top_n = session.get('income_list_top_n', 10)
     expense_list_top_n = session.get('expense_list_top_n', 10)
 
-    # Get user IDs for the current user or their family
-    family_user_ids = get_family_user_ids()
-
-    # Calculate overall totals for the current year
-    current_year = datetime.datetime.now().year
-    total_income, total_expenses, balance = calculate_totals(family_user_ids, current_year)
-
-    # Compute monthly totals for the past 12 months
+    # Year totals, the 12-month series, category totals and cash flow in one pass
     today = datetime.date.today()
-    current_month_start = today.replace(day=1)
-    start_date = current_month_start - relativedelta(months=11)
-    last_day = calendar.monthrange(today.year, today.month)[1]
-    end_date = today.replace(day=last_day)
-    monthly_income, monthly_expenses, month_labels = compute_monthly_totals(family_user_ids, start_date, end_date)
+    current_year = today.year
+    data = get_dashboard_totals(today)
+    start_date, end_date = data["start_date"], data["end_date"]
 
-    # Retrieve and process category totals
-    category_totals = get_category_totals(family_user_ids, start_date, end_date)
+    category_totals = data["category_totals"]
     income_category_totals_all = [(cat, total) for cat, total in category_totals if total > 0]
     expense_category_totals_all = [(cat, total) for cat, total in category_totals if total < 0]
 
@@ -295,37 +140,34 @@ def dashboard():
 
     # Retrieve recent transactions
     recent_transactions = Transaction.query.filter(
-        Transaction.user_id.in_(family_user_ids)
+        family_transaction_filter()
     ).order_by(Transaction.timestamp.desc()).limit(5).all()
 
-    # Retrieve budget details
-    budget_details = get_budget_details(family_user_ids)
-
-    # Prepare cash flow data for the current month
-    cash_flow_dates, cash_flow_data = prepare_cash_flow_data(family_user_ids, today.year, today.month)
+    # Retrieve budget details; budgets belong to individual family members
+    budget_details = get_budget_details(get_family_user_ids())
 
     # Prepare pie chart date range
     pie_start_date = start_date.strftime("%Y-%m-%d")
     pie_end_date = end_date.strftime("%Y-%m-%d")
 
     return render_template("dashboard.html",
-                           total_income=total_income,
-                           total_expenses=total_expenses,
-                           balance=balance,
+                           total_income=data["total_income"],
+                           total_expenses=data["total_expenses"],
+                           balance=data["balance"],
                            income_category_totals=income_category_totals_all,  # for chart filtering if needed
                            expense_category_totals=expense_category_totals_all,
                            current_year=current_year,
-                           monthly_expenses=monthly_expenses,
-                           monthly_income=monthly_income,
-                           monthLabels=month_labels,
+                           monthly_expenses=data["monthly_expenses"],
+                           monthly_income=data["monthly_income"],
+                           monthLabels=data["month_labels"],
                            expense_categories_labels=expense_labels,
                            expense_categories_data=expense_data,
                            income_categories_labels=income_labels,
                            income_categories_data=income_data,
                            recent_transactions=recent_transactions,
                            budget_details=budget_details,
-                           cash_flow_dates=cash_flow_dates,
-                           cash_flow_data=cash_flow_data,
+                           cash_flow_dates=data["cash_flow_dates"],
+                           cash_flow_data=data["cash_flow_data"],
                            pieStartDate=pie_start_date,
                            pieEndDate=pie_end_date,
                            expenseCategoriesIds=expense_ids,
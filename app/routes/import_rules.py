@@ -5,12 +5,11 @@ from app.forms.import_rule_form import ImportRuleForm
 from app.services.import_rules import (
     fetch_account_types_and_categories,
     process_override_category,
-    get_family_user_ids,
     create_import_rule,
     update_import_rule,
     delete_import_rule,
-    apply_rule_to_transactions,
 )
+from app.services.jobs import enqueue_job
 
 
 import_rules_bp = Blueprint('import_rules', __name__, template_folder='../templates/import_rules')
@@ -100,8 +99,7 @@ def delete_rule(rule_id):
 @login_required
 def apply_rule(rule_id):
     rule = ImportRule.query.filter_by(id=rule_id, family_id=current_user.family_id).first_or_404()
-    family_user_ids = get_family_user_ids(current_user.family_id)
-    count = apply_rule_to_transactions(rule, family_user_ids)
-    flash(f"Rule applied to {count} transactions.", "success")
-    current_app.logger.info("Applied rule ID %d to %d transactions for family_id %s", rule_id, count, current_user.family_id)
-    return redirect(url_for('import_rules.index'))
+    # Long histories take longer than a request may, so the rule is applied by a job.
+    job_id = enqueue_job("apply_rule", current_user.id, return_url=url_for('import_rules.index'), rule_id=rule.id)
+    current_app.logger.info("Enqueued job %s applying rule ID %d for family_id %s", job_id, rule_id, current_user.family_id)
+    return redirect(url_for('jobs.job_progress', job_id=job_id))
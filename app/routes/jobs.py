@@ -0,0 +1,45 @@
+from flask import Blueprint, abort, jsonify, render_template
+from flask_login import current_user, login_required
+from app.services.jobs import get_job
+
+
+jobs_bp = Blueprint('jobs', __name__)
+
+JOB_TITLES = {
+    "apply_rule": "Applying Import Rule",
+    "import_all": "Importing Transactions",
+    "bulk_delete": "Deleting Transactions",
+}
+
+# Fields of a job's state that the progress page may see.
+STATUS_FIELDS = ("id", "name", "status", "done", "total", "message", "return_url")
+
+
+def get_user_job(job_id):
+    """
+    Return the current user's job with the given ID, or abort with 404.
+    """
+    job = get_job(job_id)
+    if job is None or job["user_id"] != current_user.id:
+        abort(404)
+    return job
+
+
+@jobs_bp.route("/jobs/<job_id>")
+@login_required
+def job_progress(job_id):
+    """
+    Show the progress of a background job; the page polls job_status until it is done.
+    """
+    job = get_user_job(job_id)
+    return render_template("jobs/progress.html", job=job, title=JOB_TITLES.get(job["name"], "Background Job"))
+
+
+@jobs_bp.route("/jobs/<job_id>/status")
+@login_required
+def job_status(job_id):
+    """
+    Return the status and progress counters of a background job as JSON.
+    """
+    job = get_user_job(job_id)
+    return jsonify({field: job.get(field) for field in STATUS_FIELDS})
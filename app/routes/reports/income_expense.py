@@ -6,9 +6,7 @@ from app.routes.reports import report_bp
 from app.services.reports.income_expense import (
     get_date_filters,
     parse_date_range,
-    get_family_user_ids,
-    build_transaction_query,
-    process_transaction_results,
+    get_income_expense_report,
     get_cached_categories,
     get_cached_accounts
 )
@@ -34,25 +32,19 @@ def income_expense():
         category_id = request.args.get('category_id', type=int)
         account_id = request.args.get('account_id', type=int)
 
-        # 4. Get the list of user IDs to include (family or single user)
-        family_user_ids = get_family_user_ids(current_user)
+        # 4. Aggregate income/expense by month into chart series
+        report = get_income_expense_report(current_user, start_dt, end_dt, category_id, account_id)
 
-        # 5. Build the transaction query
-        query = build_transaction_query(family_user_ids, start_dt, end_dt, category_id, account_id)
-
-        # 6. Process results (aggregating income/expense by month)
-        labels, incomes, expenses = process_transaction_results(query)
-
-        # 7. Retrieve categories and accounts for dropdown filters
+        # 5. Retrieve categories and accounts for dropdown filters
         categories_list = get_cached_categories(current_user)
         accounts_list = get_cached_accounts(current_user)
 
-        # 8. Render the template
+        # 6. Render the template
         return render_template(
             'reports/income_expense.html',
-            labels=labels,
-            incomes=incomes,
-            expenses=expenses,
+            labels=report['labels'],
+            incomes=report['incomes'],
+            expenses=report['expenses'],
             start_date=start_date,
             end_date=end_date,
             date_range_display=date_range_display,
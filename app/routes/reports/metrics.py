@@ -0,0 +1,16 @@
+from flask import jsonify
+from flask_login import login_required
+from app.routes.reports import report_bp
+from app.services.reports.cache import get_report_cache_metrics
+
+
+@report_bp.route('/reports/cache_metrics', methods=['GET'])
+@login_required
+def report_cache_metrics():
+    """
+    Return the report cache hit and miss counters as JSON.
+    """
+    metrics = get_report_cache_metrics()
+    if metrics is None:
+        return jsonify({'error': 'Report cache metrics are unavailable.'}), 503
+    return jsonify(metrics)
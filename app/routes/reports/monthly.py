@@ -5,7 +5,7 @@ from app.routes.reports import report_bp
 from app.services.reports.monthly import (
     get_date_range,
     get_family_filter,
-    generate_chart_data,
+    get_monthly_report,
     get_dropdown_options
 )
 
@@ -38,7 +38,7 @@ def monthly_spending():
     family_filter = get_family_filter(current_user)
 
     # 5. Generate chart data for negative amounts (spending)
-    labels, totals = generate_chart_data(family_filter, start_date, end_date, category_id, account_id)
+    report = get_monthly_report(family_filter, start_date, end_date, category_id, account_id, family_id=current_user.family_id)
 
     # 6. Retrieve categories/accounts for dropdown filters
     categories, accounts = get_dropdown_options(current_user)
@@ -46,8 +46,8 @@ def monthly_spending():
     # 7. Render the template
     return render_template(
         'reports/monthly.html',
-        labels=labels,
-        totals=totals,
+        labels=report['labels'],
+        totals=report['totals'],
         date_range_display=date_range_display,
         start_date=start_date.strftime('%Y-%m-%d'),
         end_date=end_date.strftime('%Y-%m-%d'),
@@ -3,9 +3,9 @@ from flask_login import login_required, current_user
 from app import db
 from app.models.transaction import Transaction
 from app.models.category import Category
-from app.models.account_type import AccountType
 from app.routes.transactions import transactions_bp
-from app.services.transactions.utilities import get_family_user_ids
+from app.services.family import family_transaction_filter
+from app.services.reference_data import get_family_account_types, get_family_categories
 
 
 @transactions_bp.route("/transactions/edit/<int:transaction_id>", methods=["GET", "POST"])
@@ -33,7 +33,7 @@ def get_transaction(transaction_id):
     """
     return Transaction.query.filter(
         Transaction.id == transaction_id,
-        Transaction.user_id.in_(get_family_user_ids())
+        family_transaction_filter()
     ).first_or_404()
 
 
@@ -72,6 +72,8 @@ def update_transaction_fields(transaction):
 
     transaction.account_id = request.form.get("account_id", type=int)
     transaction.is_transfer = request.form.get("is_transfer") == "on"
+    # Only transactions of the current user's family can be edited, so this keeps the denormalized family in step.
+    transaction.family_id = current_user.family_id
 
 
 def handle_new_category(transaction):
@@ -100,8 +102,8 @@ def render_edit_transaction_form(transaction):
     Render the edit transaction form for a GET request.
     """
     try:
-        categories = Category.query.filter_by(family_id=current_user.family_id).all()
-        account_types = AccountType.query.filter_by(family_id=current_user.family_id).all()
+        categories = get_family_categories(current_user.family_id)
+        account_types = get_family_account_types(current_user.family_id)
     except Exception as e:
         current_app.logger.error("Error fetching categories or account types: %s", str(e))
         flash("An error occurred while loading the form.", "danger")
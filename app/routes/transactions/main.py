@@ -16,10 +16,13 @@ def transactions():
     else:
         category_ids = []
     account_id = request.args.get("account_id", type=int)
-    page = request.args.get("page", 1, type=int)
+    after = request.args.get("after")
+    before = request.args.get("before")
+    page = request.args.get("page", type=int)
     per_page = session.get("per_page", current_app.config.get("PER_PAGE", 10))
 
-    view_data = process_transactions_view(filter_type, time_filter, category_id, category_ids, account_id, page, per_page)
+    view_data = process_transactions_view(filter_type, time_filter, category_id, category_ids, account_id, per_page,
+                                          after=after, before=before, page=page)
     return render_template("transactions/index.html", **view_data)
 
 
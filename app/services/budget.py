@@ -1,8 +1,10 @@
 from datetime import datetime
 from flask import current_app
+from sqlalchemy import and_, func, select
 from app import db
-from app.models.budget import Budget
+from app.models.budget import Budget, budget_category_association
 from app.models.category import Category
+from app.models.transaction import Transaction
 
 
 def add_budget(user_id, name, category_ids, amount, start_date, end_date):
@@ -110,3 +112,56 @@ def delete_budget(budget):
         db.session.rollback()
         current_app.logger.error("Error deleting budget id=%s: %s", budget.id, e)
         return False
+
+
+def calculate_budget_spent(budgets, user_ids):
+    """
+    Sums the spending of every budget in a single grouped query.
+
+    Transactions are joined through budget_category_association and matched against
+    each budget's own date window, so the number of queries does not grow with the
+    number of budgets.
+
+    Args:
+        budgets (list of Budget): The budgets to evaluate.
+        user_ids (list of int): IDs of the users whose transactions count toward the budgets.
+
+    Returns:
+        dict: Maps each budget ID to its (signed) spent total; budgets without matching
+        transactions map to 0.
+    """
+    budget_ids = [budget.id for budget in budgets]
+    spent = dict.fromkeys(budget_ids, 0)
+    if not budget_ids or not user_ids:
+        return spent
+    rows = db.session.execute(
+        select(Budget.id, func.sum(Transaction.amount))
+        .join(budget_category_association, budget_category_association.c.budget_id == Budget.id)
+        .join(Transaction, and_(
+            Transaction.category_id == budget_category_association.c.category_id,
+            Transaction.timestamp >= Budget.start_date,
+            Transaction.timestamp <= Budget.end_date
+        ))
+        .where(Budget.id.in_(budget_ids), Transaction.user_id.in_(user_ids))
+        .group_by(Budget.id)
+    ).all()
+    for budget_id, total in rows:
+        spent[budget_id] = total or 0
+    return spent
+
+
+def get_budget_progress(user_ids):
+    """
+    Loads the budgets owned by the given users together with their spent totals.
+
+    Args:
+        user_ids (list of int): IDs of the current user or their family members.
+
+    Returns:
+        list of tuple: (Budget, spent) pairs, where spent is the signed sum of the
+        matching transactions.
+    """
+    budgets = Budget.query.filter(Budget.user_id.in_(user_ids)).order_by(Budget.id).all()
+    spent = calculate_budget_spent(budgets, user_ids)
+    current_app.logger.debug("Evaluated %s budgets for user_ids=%s", len(budgets), user_ids)
+    return [(budget, spent[budget.id]) for budget in budgets]
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import redis
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Results derived from a family's data are cached in Redis under a per-family version
+# counter. Writes bump the version after they commit, which retires every cached entry
+# of that family at once; stale entries simply expire.
+FAMILY_CACHE_TTL = 24 * 60 * 60
+
+TRANSACTIONS = "transactions"
+REFERENCE = "reference"
+
+CHANGED_FAMILIES = "changed_families"
+
+
+def _version_key(family_id, kind):
+    return f"{current_app.config['CACHE_KEY_PREFIX']}{kind}_version:{family_id}"
+
+
+def get_family_version(family_id, kind=TRANSACTIONS):
+    """
+    Return the current data version of a family, or None if Redis is unavailable.
+    """
+    try:
+        return int(current_app.config["SESSION_REDIS"].get(_version_key(family_id, kind)) or 0)
+    except redis.RedisError as e:
+        current_app.logger.warning("Could not read %s version for family_id=%s: %s", kind, family_id, e)
+        return None
+
+
+def bump_family_versions(family_ids, kind=TRANSACTIONS):
+    """
+    Retire everything cached for the given families by moving them to a new version.
+    """
+    family_ids = sorted(family_id for family_id in set(family_ids) if family_id)
+    if not family_ids:
+        return
+    try:
+        pipe = current_app.config["SESSION_REDIS"].pipeline()
+        for family_id in family_ids:
+            pipe.incr(_version_key(family_id, kind))
+        pipe.execute()
+        current_app.logger.debug("Bumped %s version for family_ids=%s", kind, family_ids)
+    except redis.RedisError as e:
+        current_app.logger.warning("Could not bump %s version for family_ids=%s: %s", kind, family_ids, e)
+
+
+def cached_family_value(family_id, name, params, loader, kind=TRANSACTIONS):
+    """
+    Return ``loader()`` cached per family, ``name`` and ``params`` until the family's next write.
+
+    Args:
+        family_id (int): Family whose data the value is derived from.
+        name (str): What is cached, e.g. ``"transaction_summary"``.
+        params (dict): Everything else the value depends on, such as the active filters.
+        loader (callable): Computes the value on a miss; the result must be JSON serializable.
+        kind (str): Which version counter invalidates the value.
+
+    Returns:
+        The cached or freshly loaded value. Without a family or without Redis the value
+        is loaded every time, and a None result is never cached.
+    """
+    version = get_family_version(family_id, kind) if family_id else None
+    if version is None:
+        return loader()
+    signature = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    key = f"{current_app.config['CACHE_KEY_PREFIX']}{name}:{family_id}:{version}:{signature}"
+    try:
+        cached = current_app.config["SESSION_REDIS"].get(key)
+        if cached is not None:
+            return json.loads(cached)
+    except redis.RedisError as e:
+        current_app.logger.warning("Could not read cached %s for family_id=%s: %s", name, family_id, e)
+
+    value = loader()
+    if value is None:
+        return None
+    try:
+        current_app.config["SESSION_REDIS"].set(key, json.dumps(value), ex=FAMILY_CACHE_TTL)
+    except redis.RedisError as e:
+        current_app.logger.warning("Could not cache %s for family_id=%s: %s", name, family_id, e)
+    return value
+
+
+def mark_families_changed(session, family_ids, kind=TRANSACTIONS):
+    """
+    Remember that the session wrote ``kind`` data of these families; their version is bumped on commit.
+    """
+    changed = session.info.setdefault(CHANGED_FAMILIES, {}).setdefault(kind, set())
+    changed.update(family_id for family_id in family_ids if family_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_changed_families(session):
+    changed = session.info.pop(CHANGED_FAMILIES, None)
+    for kind, family_ids in (changed or {}).items():
+        bump_family_versions(family_ids, kind)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_families(session):
+    session.info.pop(CHANGED_FAMILIES, None)
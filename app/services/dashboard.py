@@ -0,0 +1,215 @@
+import calendar
+import datetime
+from collections import namedtuple
+from dateutil.relativedelta import relativedelta
+from flask import current_app
+from sqlalchemy import cast, func, literal_column
+from app import db
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.services.family import family_transaction_filter
+from app.services.rollup import get_monthly_totals
+
+
+DAY = "day"
+WEEK = "week"
+GRANULARITIES = (DAY, WEEK)
+
+CashFlowPoint = namedtuple("CashFlowPoint", ["period", "total", "cumulative"])
+
+
+def dashboard_window(today):
+    """
+    Return the inclusive (start, end) dates of the 12-month dashboard window ending with today's month.
+    """
+    start_date = today.replace(day=1) - relativedelta(months=11)
+    end_date = today.replace(day=calendar.monthrange(today.year, today.month)[1])
+    return start_date, end_date
+
+
+def monthly_series(monthly, start_date, end_date):
+    """
+    Expand ``{(year, month): (income, expense)}`` into income, expense and label lists for every month in the window.
+    """
+    monthly_income = []
+    monthly_expenses = []
+    month_labels = []
+    current_date = start_date
+    while current_date <= end_date:
+        income, expense = monthly.get((current_date.year, current_date.month), (0, 0))
+        monthly_income.append(income)
+        monthly_expenses.append(abs(expense))
+        month_labels.append(current_date.strftime("%b"))
+        current_date = current_date + relativedelta(months=1)
+    return monthly_income, monthly_expenses, month_labels
+
+
+def empty_dashboard_data(today):
+    """
+    Return dashboard data without any transactions, used when the aggregation fails.
+    """
+    start_date, end_date = dashboard_window(today)
+    monthly_income, monthly_expenses, month_labels = monthly_series({}, start_date, end_date)
+    return {
+        "total_income": 0,
+        "total_expenses": 0,
+        "balance": 0,
+        "monthly_income": monthly_income,
+        "monthly_expenses": monthly_expenses,
+        "month_labels": month_labels,
+        "category_totals": [],
+        "cash_flow_dates": [],
+        "cash_flow_data": [],
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+
+
+def supports_window_functions(dialect):
+    """
+    Return True when the database can compute the running total with SUM() OVER.
+    """
+    version = dialect.server_version_info or ()
+    if dialect.name == "sqlite":
+        return version >= (3, 25)
+    if dialect.name == "mysql":
+        return version >= ((10, 2) if dialect.is_mariadb else (8, 0))
+    return dialect.name == "postgresql"
+
+
+def period_start(timestamp, granularity, dialect):
+    """
+    Return a SQL date expression truncating ``timestamp`` to the start of its DAY or WEEK (Monday).
+
+    Arguments are rendered inline rather than bound so the selected, grouped and
+    window-ordered copies of the expression compare equal on strict backends.
+    """
+    if granularity == DAY:
+        return func.date(timestamp, type_=db.Date)
+    if dialect.name == "sqlite":
+        # 'weekday 0' moves forward to the next Sunday (or stays on one); six days back is its Monday.
+        return func.date(timestamp, literal_column("'weekday 0'"), literal_column("'-6 days'"), type_=db.Date)
+    if dialect.name == "mysql":
+        return func.subdate(func.date(timestamp), func.weekday(timestamp), type_=db.Date)
+    return cast(func.date_trunc(literal_column("'week'"), timestamp), db.Date)
+
+
+def get_cash_flow_series(family_filter, start_date, end_date, granularity=DAY, cumulative=True):
+    """
+    Sum non-transfer transactions per period in the database and return one point per period.
+
+    Args:
+        family_filter: Predicate scoping the transactions, see family_transaction_filter.
+        start_date (date): First day of the range.
+        end_date (date): Last day of the range (inclusive).
+        granularity (str): DAY or WEEK; weeks start on Monday.
+        cumulative (bool): Whether to compute the running total. It uses a window function
+            when the backend supports one and is otherwise accumulated in Python.
+
+    Returns:
+        list of CashFlowPoint: Periods with transactions, in date order. ``cumulative`` is
+        None when it was not requested.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported cash flow granularity: {granularity}")
+    dialect = db.session.get_bind().dialect
+    period = period_start(Transaction.timestamp, granularity, dialect)
+    total = func.sum(Transaction.amount)
+    period_column = period.label("period")
+    columns = [period_column, total.label("total")]
+    use_window = cumulative and supports_window_functions(dialect)
+    if use_window:
+        columns.append(func.sum(total).over(order_by=period).label("cumulative"))
+    rows = db.session.query(*columns).filter(
+        family_filter,
+        Transaction.is_transfer.is_(False),
+        Transaction.timestamp >= datetime.datetime.combine(start_date, datetime.time.min),
+        Transaction.timestamp < datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min)
+    ).group_by(period_column).order_by(period_column).all()
+
+    points = []
+    running = 0
+    for row in rows:
+        running = row.cumulative if use_window else running + row.total
+        points.append(CashFlowPoint(row.period, row.total, running if cumulative else None))
+    current_app.logger.debug(
+        "Cash flow from %s to %s by %s: %d points (window function: %s)",
+        start_date, end_date, granularity, len(points), use_window
+    )
+    return points
+
+
+def get_dashboard_data(user, today):
+    """
+    Gather the aggregates shown on the dashboard from one pass over the monthly totals.
+
+    The year totals, the 12-month income/expense series and the category totals all
+    cover whole months, so a single per-category read of the monthly rollup spanning
+    both the 12-month window and the current year answers all three. The cash-flow
+    series for the current month, summed per day, is the only other aggregation query.
+
+    Args:
+        user (User): The user viewing the dashboard; their whole family's data is included.
+        today (date): The date the dashboard is rendered for.
+
+    Returns:
+        dict: ``total_income``, ``total_expenses`` and ``balance`` for today's year;
+        ``monthly_income``, ``monthly_expenses`` and ``month_labels`` for the 12-month
+        window; ``category_totals`` as (Category, total) pairs over that window;
+        ``cash_flow_dates`` and ``cash_flow_data`` for today's month; and the window
+        bounds as ``start_date`` and ``end_date``.
+    """
+    family_id = user.family_id
+    family_filter = family_transaction_filter(user)
+    start_date, end_date = dashboard_window(today)
+    year_start = datetime.date(today.year, 1, 1)
+    year_end = datetime.date(today.year, 12, 31)
+
+    monthly_totals = get_monthly_totals(
+        family_id,
+        family_filter,
+        min(start_date, year_start),
+        year_end,
+        by_category=True
+    )
+
+    total_income = total_expenses = 0
+    monthly = {}
+    category_sums = {}
+    for row in monthly_totals:
+        if row.year == today.year:
+            total_income += row.income
+            total_expenses += row.expense
+        if (row.year, row.month) < (start_date.year, start_date.month) or (row.year, row.month) > (end_date.year, end_date.month):
+            continue
+        income, expense = monthly.get((row.year, row.month), (0, 0))
+        monthly[(row.year, row.month)] = (income + row.income, expense + row.expense)
+        category_sums[row.category_id] = category_sums.get(row.category_id, 0) + row.income + row.expense
+
+    monthly_income, monthly_expenses, month_labels = monthly_series(monthly, start_date, end_date)
+
+    categories = Category.query.filter(
+        Category.id.in_(category_sums.keys()),
+        Category.family_id == family_id
+    ).all() if category_sums else []
+
+    month_start = today.replace(day=1)
+    cash_flow = get_cash_flow_series(family_filter, month_start, end_date)
+
+    current_app.logger.debug(
+        "Dashboard data for family_id=%s: %d monthly buckets, %d categories",
+        family_id, len(monthly_totals), len(categories)
+    )
+    return {
+        "total_income": total_income,
+        "total_expenses": abs(total_expenses),
+        "balance": total_income - abs(total_expenses),
+        "monthly_income": monthly_income,
+        "monthly_expenses": monthly_expenses,
+        "month_labels": month_labels,
+        "category_totals": [(category, category_sums[category.id]) for category in categories],
+        "cash_flow_dates": [point.period.strftime("%Y-%m-%d") for point in cash_flow],
+        "cash_flow_data": [point.cumulative for point in cash_flow],
+        "start_date": start_date,
+        "end_date": end_date,
+    }
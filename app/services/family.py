@@ -0,0 +1,128 @@
+import redis
+from flask import current_app, g
+from flask_login import current_user
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.models.transaction import Transaction
+from app.models.user import User
+
+# Family member IDs are memoized per request on flask.g and shared between
+# workers in Redis until a user's family changes. Any committed User write that
+# adds, moves or removes a family member invalidates the affected families.
+FAMILY_MEMBERS_TTL = 24 * 60 * 60
+
+CHANGED_FAMILY_MEMBERS = "changed_family_members"
+
+
+def _family_members_key(family_id):
+    return f"{current_app.config['CACHE_KEY_PREFIX']}family_members:{family_id}"
+
+
+def _load_family_member_ids(family_id):
+    try:
+        cached = current_app.config["SESSION_REDIS"].get(_family_members_key(family_id))
+        if cached is not None:
+            cached = cached.decode() if isinstance(cached, bytes) else cached
+            return tuple(int(user_id) for user_id in cached.split(",") if user_id)
+    except redis.RedisError as e:
+        current_app.logger.warning("Could not read family members for family_id=%s: %s", family_id, e)
+
+    rows = User.query.with_entities(User.id).filter_by(family_id=family_id).all()
+    user_ids = tuple(sorted(row[0] for row in rows))
+    current_app.logger.debug("Loaded family user IDs for family_id=%s: %s", family_id, user_ids)
+    try:
+        current_app.config["SESSION_REDIS"].set(
+            _family_members_key(family_id), ",".join(str(user_id) for user_id in user_ids), ex=FAMILY_MEMBERS_TTL
+        )
+    except redis.RedisError as e:
+        current_app.logger.warning("Could not cache family members for family_id=%s: %s", family_id, e)
+    return user_ids
+
+
+def get_family_member_ids(family_id):
+    """
+    Return the IDs of all users in a family as a tuple, memoized for the request and in Redis.
+    """
+    members = g.setdefault("family_member_ids", {})
+    if family_id not in members:
+        members[family_id] = _load_family_member_ids(family_id)
+    return members[family_id]
+
+
+def get_family_user_ids(user=None):
+    """
+    Return the IDs of the users whose data the given user (default: current_user) can see.
+
+    That is every member of the user's family, or just the user when they have no family.
+    """
+    user = user if user is not None else current_user
+    if not user.family_id:
+        return [user.id]
+    try:
+        return list(get_family_member_ids(user.family_id))
+    except SQLAlchemyError as e:
+        current_app.logger.error("Error retrieving family user IDs for user %s: %s", user.id, e)
+        return [user.id]
+
+
+def family_transaction_filter(user=None):
+    """
+    Return the predicate that scopes Transaction queries to a user's family (default: current_user).
+
+    Family members share the denormalized ``Transaction.family_id``, so this is a single
+    indexed equality with no member lookup. Users without a family see their own rows.
+    """
+    user = user if user is not None else current_user
+    if user.family_id:
+        return Transaction.family_id == user.family_id
+    return Transaction.user_id == user.id
+
+
+def invalidate_family_members(*family_ids):
+    """
+    Forget the cached members of the given families, in this request and in Redis.
+    """
+    family_ids = [family_id for family_id in family_ids if family_id]
+    if not family_ids:
+        return
+    members = g.get("family_member_ids", {})
+    for family_id in family_ids:
+        members.pop(family_id, None)
+    try:
+        current_app.config["SESSION_REDIS"].delete(*(_family_members_key(family_id) for family_id in family_ids))
+        current_app.logger.debug("Invalidated family members for family_ids=%s", family_ids)
+    except redis.RedisError as e:
+        current_app.logger.warning("Could not invalidate family members for family_ids=%s: %s", family_ids, e)
+
+
+@event.listens_for(Session, "before_flush")
+def _mark_family_member_changes(session, flush_context, instances):
+    family_ids = set()
+    for obj in session.new:
+        if isinstance(obj, User):
+            family_ids.add(obj.family_id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            family_ids.add(obj.family_id)
+            family_ids.update(inspect(obj).attrs.family_id.history.deleted or ())
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            history = inspect(obj).attrs.family_id.history
+            family_ids.update(history.added or ())
+            family_ids.update(history.deleted or ())
+    family_ids.discard(None)
+    if family_ids:
+        session.info.setdefault(CHANGED_FAMILY_MEMBERS, set()).update(family_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_family_members(session):
+    family_ids = session.info.pop(CHANGED_FAMILY_MEMBERS, None)
+    if family_ids:
+        invalidate_family_members(*sorted(family_ids))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_family_members(session):
+    session.info.pop(CHANGED_FAMILY_MEMBERS, None)
@@ -1,9 +1,22 @@
 from flask import current_app, flash
+from sqlalchemy.orm import joinedload
 from app import db
 from app.models.import_rule import ImportRule
 from app.models.account_type import AccountType
 from app.models.category import Category
 from app.models.user import User
+from app.services.cache import REFERENCE, get_family_version
+from app.services.family import get_family_user_ids
+from app.services.jobs import job_handler
+from app.services.transactions.rule_matcher import CompiledImportRules
+
+# Compiled rule sets are cached per worker under (family_id, account type name).
+# The family's reference data version in Redis, bumped by every rule and category
+# write, tells every worker when to recompile.
+RULE_CACHE_EXTENSION = "import_rule_cache"
+
+# Rules are applied to stored transactions in id order, committing this many at a time.
+RULE_APPLY_CHUNK_SIZE = 1000
 
 
 def fetch_account_types_and_categories(family_id):
@@ -139,33 +152,94 @@ def delete_import_rule(rule):
         flash("An error occurred while deleting the import rule.", "danger")
 
 
-def apply_rule_to_transactions(rule, family_user_ids):
+def load_import_rules(family_id, account_type_name):
+    """
+    Load a family's rules for an account type and compile them into one matcher.
+
+    Rules without an account type apply to every account. Override categories are
+    loaded with the rules, so the compiled matcher only holds plain names.
+    """
+    rules = ImportRule.query.options(
+        joinedload(ImportRule.override_category_obj)
+    ).filter(
+        ImportRule.family_id == family_id,
+        (ImportRule.account_type.is_(None)) | (ImportRule.account_type == account_type_name)
+    ).order_by(ImportRule.id).all()
+    current_app.logger.debug("Compiled %d import rules for family_id=%s, account type %s",
+                             len(rules), family_id, account_type_name)
+    return CompiledImportRules(rules)
+
+
+def get_compiled_rules(family_id, account_type_name):
+    """
+    Return the compiled rule set for a family and account type, compiling it on a cache miss.
+    """
+    version = get_family_version(family_id, REFERENCE)
+    cache = current_app.extensions.setdefault(RULE_CACHE_EXTENSION, {})
+    key = (family_id, account_type_name)
+    cached = cache.get(key)
+    if version is not None and cached is not None and cached[0] == version:
+        return cached[1]
+
+    compiled = load_import_rules(family_id, account_type_name)
+    if version is not None:
+        cache[key] = (version, compiled)
+    return compiled
+
+
+def apply_rule_to_transactions(rule, family_user_ids, progress=None):
     """
     Apply the given rule to all relevant transactions for the provided family user IDs.
-    Returns the count of updated transactions.
+
+    Transactions are loaded and committed in chunks of ids, with the category name joined
+    in for category rules, so long histories never sit in memory at once. ``progress(done,
+    total)`` is called after each chunk. Returns the count of updated transactions.
     """
     from app.models.transaction import Transaction
 
     current_app.logger.debug("Applying rule ID %s to transactions for family_user_ids=%s", rule.id, family_user_ids)
+    query = Transaction.query.filter(Transaction.user_id.in_(family_user_ids))
     try:
-        transactions = Transaction.query.filter(Transaction.user_id.in_(family_user_ids)).all()
-        current_app.logger.debug("Found %d transactions for rule application", len(transactions))
-        count = 0
-        for tx in transactions:
-            value = get_transaction_field_value(tx, rule.field_to_match)
-            if rule.match_pattern in value:
-                tx.is_transfer = rule.is_transfer
-                if rule.override_category_id:
-                    tx.category_id = rule.override_category_id
-                count += 1
-        db.session.commit()
+        total = query.count()
+        current_app.logger.debug("Found %d transactions for rule application", total)
+        if rule.field_to_match.lower() == "category":
+            query = query.options(joinedload(Transaction.category).load_only(Category.name))
+        count = done = last_id = 0
+        while True:
+            chunk = query.filter(Transaction.id > last_id).order_by(Transaction.id).limit(RULE_APPLY_CHUNK_SIZE).all()
+            if not chunk:
+                break
+            for tx in chunk:
+                value = get_transaction_field_value(tx, rule.field_to_match)
+                if rule.match_pattern in value:
+                    tx.is_transfer = rule.is_transfer
+                    if rule.override_category_id:
+                        tx.category_id = rule.override_category_id
+                    count += 1
+            last_id = chunk[-1].id
+            done += len(chunk)
+            db.session.commit()
+            if progress:
+                progress(done, total)
         current_app.logger.info("Applied rule ID %s to %d transactions", rule.id, count)
         return count
     except Exception as e:
         db.session.rollback()
         current_app.logger.error("Error applying rule ID %s: %s", rule.id, str(e))
-        flash("An error occurred while applying the rule.", "danger")
-        return 0
+        raise
+
+
+@job_handler("apply_rule")
+def apply_rule_job(progress, user_id, rule_id):
+    """
+    Background job applying one of the user's family rules to the family's transactions.
+    """
+    user = db.session.get(User, user_id)
+    rule = ImportRule.query.filter_by(id=rule_id, family_id=user.family_id).first()
+    if rule is None:
+        return "The import rule no longer exists."
+    count = apply_rule_to_transactions(rule, get_family_user_ids(user), progress=progress)
+    return f"Rule applied to {count} transactions."
 
 
 def get_transaction_field_value(transaction, field_to_match):
@@ -177,18 +251,3 @@ def get_transaction_field_value(transaction, field_to_match):
     elif field_to_match.lower() == "category":
         return transaction.category.name if transaction.category else ""
     return ""
-
-
-def get_family_user_ids(family_id):
-    """
-    Retrieve IDs of all users in the given family.
-    """
-    current_app.logger.debug("Retrieving family user IDs for family_id=%s", family_id)
-    try:
-        users = User.query.filter_by(family_id=family_id).all()
-        ids = [u.id for u in users]
-        current_app.logger.debug("Found %d users for family_id=%s", len(ids), family_id)
-        return ids
-    except Exception as e:
-        current_app.logger.error("Error retrieving family user IDs for family_id=%s: %s", family_id, str(e))
-        return []
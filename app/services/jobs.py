@@ -0,0 +1,183 @@
+import json
+import time
+import uuid
+import click
+import redis
+from flask import current_app
+from flask.cli import with_appcontext
+from app import db
+
+# Work too long for a request (rule application, "import all", "delete all") runs as a
+# job. Job ids are queued on a Redis list that `flask run-jobs` workers pop, and each
+# job's state lives in a Redis hash that the progress endpoint polls. With
+# JOBS_RUN_INLINE (the default under testing) or without Redis, a job runs in-process
+# as soon as it is enqueued.
+JOB_TTL = 24 * 60 * 60
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+
+# Handlers by job name; see job_handler.
+JOB_HANDLERS = {}
+
+
+def job_handler(name):
+    """
+    Register a function as the handler of a job name.
+
+    The handler is called as ``handler(progress, user_id, **params)`` inside an app
+    context, and returns the message shown when the job finishes. It should commit its
+    work in chunks and call ``progress(done, total)`` after each one.
+    """
+    def register(func):
+        JOB_HANDLERS[name] = func
+        return func
+    return register
+
+
+def _job_key(job_id):
+    return f"{current_app.config['CACHE_KEY_PREFIX']}job:{job_id}"
+
+
+def _queue_key():
+    return f"{current_app.config['CACHE_KEY_PREFIX']}jobs:queue"
+
+
+def _encode(fields):
+    return {name: json.dumps(value) for name, value in fields.items()}
+
+
+def _save_job(job_id, **fields):
+    try:
+        pipe = current_app.config["SESSION_REDIS"].pipeline()
+        pipe.hset(_job_key(job_id), mapping=_encode(fields))
+        pipe.expire(_job_key(job_id), JOB_TTL)
+        pipe.execute()
+    except redis.RedisError as e:
+        current_app.logger.warning("Could not save state of job %s: %s", job_id, e)
+
+
+def get_job(job_id):
+    """
+    Return the state of a job as a dict, or None if it is unknown or Redis is unavailable.
+    """
+    try:
+        raw = current_app.config["SESSION_REDIS"].hgetall(_job_key(job_id))
+    except redis.RedisError as e:
+        current_app.logger.warning("Could not read state of job %s: %s", job_id, e)
+        return None
+    if not raw:
+        return None
+    return {(name.decode() if isinstance(name, bytes) else name): json.loads(value) for name, value in raw.items()}
+
+
+def enqueue_job(name, user_id, return_url=None, **params):
+    """
+    Queue a job for a worker, or run it right away when jobs run inline.
+
+    Args:
+        name (str): Registered job name.
+        user_id (int): User the job runs for; only they can see its progress.
+        return_url (str): Where the progress page links once the job is done.
+        **params: JSON serializable arguments passed on to the handler.
+
+    Returns:
+        str: The job ID.
+    """
+    if name not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job: {name}")
+    job_id = uuid.uuid4().hex
+    state = {
+        "id": job_id,
+        "name": name,
+        "user_id": user_id,
+        "params": params,
+        "return_url": return_url,
+        "status": QUEUED,
+        "done": 0,
+        "total": None,
+        "message": None,
+        "created_at": time.time(),
+    }
+    if not current_app.config.get("JOBS_RUN_INLINE"):
+        try:
+            pipe = current_app.config["SESSION_REDIS"].pipeline()
+            pipe.hset(_job_key(job_id), mapping=_encode(state))
+            pipe.expire(_job_key(job_id), JOB_TTL)
+            pipe.rpush(_queue_key(), job_id)
+            pipe.execute()
+            current_app.logger.info("Queued %s job %s for user %s", name, job_id, user_id)
+            return job_id
+        except redis.RedisError as e:
+            current_app.logger.warning("Could not queue %s job for user %s, running it inline: %s", name, user_id, e)
+
+    _save_job(job_id, **state)
+    run_job(job_id, state)
+    return job_id
+
+
+def run_job(job_id, state=None):
+    """
+    Run a job and record its outcome; failures are logged and stored, never raised.
+    """
+    state = state if state is not None else get_job(job_id)
+    if state is None:
+        current_app.logger.warning("Skipping job %s: its state has expired or is unavailable", job_id)
+        return
+    handler = JOB_HANDLERS.get(state["name"])
+    if handler is None:
+        current_app.logger.error("Skipping job %s: no handler for %s", job_id, state["name"])
+        _save_job(job_id, status=FAILED, message="This job can no longer be run.")
+        return
+
+    def progress(done, total=None):
+        fields = {"done": done}
+        if total is not None:
+            fields["total"] = total
+        _save_job(job_id, **fields)
+
+    _save_job(job_id, status=RUNNING)
+    started = time.monotonic()
+    try:
+        message = handler(progress, state["user_id"], **state["params"])
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error("Job %s (%s) failed: %s", job_id, state["name"], e)
+        _save_job(job_id, status=FAILED, message="The job failed. Please try again.")
+        return
+    _save_job(job_id, status=FINISHED, message=message)
+    current_app.logger.info("Job %s (%s) finished in %.1fs: %s", job_id, state["name"], time.monotonic() - started, message)
+
+
+def work(poll_timeout=5, burst=False):
+    """
+    Run queued jobs one at a time until interrupted, or until the queue is empty in burst mode.
+
+    Each job runs in a fresh app context, like a request, so nothing memoized on
+    ``flask.g`` by one job is seen by the next.
+    """
+    app = current_app._get_current_object()
+    connection = app.config["SESSION_REDIS"]
+    while True:
+        item = connection.blpop([_queue_key()], timeout=poll_timeout)
+        if item is None:
+            if burst:
+                return
+            continue
+        job_id = item[1].decode() if isinstance(item[1], bytes) else item[1]
+        with app.app_context():
+            try:
+                run_job(job_id)
+            finally:
+                db.session.remove()
+
+
+@click.command("run-jobs")
+@click.option("--burst", is_flag=True, help="Exit once the queue is empty.")
+@with_appcontext
+def run_jobs_command(burst):
+    """Run queued background jobs."""
+    current_app.logger.info("Job worker started (burst=%s)", burst)
+    work(burst=burst)
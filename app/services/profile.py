@@ -1,6 +1,9 @@
 from flask import current_app
+from sqlalchemy import update
 from app import db
 from app.models.family import Family
+from app.models.transaction import Transaction
+from app.services.rollup import rebuild_family_rollup
 
 
 def update_user_profile(user, username, email, family_name):
@@ -9,6 +12,7 @@ def update_user_profile(user, username, email, family_name):
         user.id, username, email, family_name
     )
     try:
+        previous_family_id = user.family_id
         user.username = username.strip()
         user.email = email.strip()
 
@@ -24,6 +28,16 @@ def update_user_profile(user, username, email, family_name):
             current_app.logger.debug("No family name provided for user ID %s", user.id)
 
         db.session.add(user)
+        family_changed = user.family_id != previous_family_id
+        if family_changed:
+            # The user's transactions now count towards a different family.
+            db.session.flush()
+            db.session.execute(
+                update(Transaction).where(Transaction.user_id == user.id).values(family_id=user.family_id)
+            )
+            rebuild_family_rollup(previous_family_id)
+            rebuild_family_rollup(user.family_id)
+        # Committing the new family_id also invalidates both families' cached members.
         db.session.commit()
         current_app.logger.info("Profile updated successfully for user ID %s", user.id)
         return True
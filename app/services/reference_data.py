@@ -0,0 +1,94 @@
+import threading
+from collections import OrderedDict, namedtuple
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models.account_type import AccountType
+from app.models.category import Category
+from app.models.import_rule import ImportRule
+from app.services.cache import REFERENCE, cached_family_value, get_family_version, mark_families_changed
+
+# A family's categories and account types are cached in Redis and in a small per-worker
+# LRU, both under the family's reference data version. Category, account type and import
+# rule writes bump that version when they commit.
+REFERENCE_CACHE_EXTENSION = "reference_data_cache"
+REFERENCE_CACHE_SIZE = 512
+
+REFERENCE_MODELS = (Category, AccountType, ImportRule)
+
+ReferenceItem = namedtuple("ReferenceItem", ["id", "name"])
+
+_lru_lock = threading.Lock()
+
+
+def _load_names(model, family_id):
+    rows = db.session.query(model.id, model.name).filter(model.family_id == family_id).order_by(model.name.asc()).all()
+    return [[row.id, row.name] for row in rows]
+
+
+def _cached_reference(family_id, name, model):
+    """
+    Return the (id, name) items of ``model`` for a family, ordered by name.
+
+    The per-worker LRU answers while the family's version is unchanged, Redis answers for
+    the other workers, and the database only on a miss in both. Without a family there is
+    nothing to list; without Redis the items are loaded every time.
+    """
+    if not family_id:
+        return []
+    version = get_family_version(family_id, REFERENCE)
+    if version is None:
+        return [ReferenceItem(*row) for row in _load_names(model, family_id)]
+
+    key = (family_id, name)
+    with _lru_lock:
+        lru = current_app.extensions.setdefault(REFERENCE_CACHE_EXTENSION, OrderedDict())
+        cached = lru.get(key)
+        if cached is not None and cached[0] == version:
+            lru.move_to_end(key)
+            return cached[1]
+
+    rows = cached_family_value(family_id, name, {}, lambda: _load_names(model, family_id), kind=REFERENCE)
+    items = [ReferenceItem(*row) for row in rows]
+    with _lru_lock:
+        lru[key] = (version, items)
+        lru.move_to_end(key)
+        while len(lru) > REFERENCE_CACHE_SIZE:
+            lru.popitem(last=False)
+    current_app.logger.debug("Loaded %d %s for family_id=%s (version %s)", len(items), name, family_id, version)
+    return items
+
+
+def get_family_categories(family_id):
+    """
+    Return the family's categories as cached (id, name) items ordered by name.
+    """
+    return _cached_reference(family_id, "categories", Category)
+
+
+def get_family_category_names(family_id):
+    """
+    Return the family's category names keyed by id, in name order.
+    """
+    return {category.id: category.name for category in get_family_categories(family_id)}
+
+
+def get_family_account_types(family_id):
+    """
+    Return the family's account types as cached (id, name) items ordered by name.
+    """
+    return _cached_reference(family_id, "account_types", AccountType)
+
+
+@event.listens_for(Session, "before_flush")
+def _mark_reference_changes(session, flush_context, instances):
+    family_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, REFERENCE_MODELS):
+            continue
+        family_ids.add(obj.family_id)
+        # A row moved to another family changes the old family's lists as well.
+        family_ids.update(inspect(obj).attrs.family_id.history.deleted or ())
+    if family_ids:
+        mark_families_changed(session, family_ids, kind=REFERENCE)
@@ -1,11 +1,14 @@
+from collections import namedtuple
 from datetime import datetime
-from sqlalchemy import extract, func, case
 from flask import current_app
-from app import db
-from app.models.transaction import Transaction
 from app.models.user import User
-from app.models.category import Category
-from app.models.account_type import AccountType
+from app.services.family import family_transaction_filter
+from app.services.reference_data import get_family_account_types, get_family_categories
+from app.services.reports.cache import cached_report
+from app.services.rollup import get_monthly_totals
+
+
+AnnualTotal = namedtuple("AnnualTotal", ["year", "total_income", "total_expense"])
 
 
 def parse_filters(request_args) -> dict:
@@ -21,93 +24,122 @@ def parse_filters(request_args) -> dict:
     return filters
 
 
-def get_family_user_ids(current_user: User) -> list:
+def parse_date_filters(filters: dict, current_user: User) -> tuple:
     """
-    Retrieve the IDs of all users in the same family as the current user.
+    Parse the start and end date filters into datetimes, None where a filter is empty.
+    Raises ValueError on an invalid date format.
     """
-    try:
-        if current_user.family_id:
-            family_user_ids = User.query.with_entities(User.id)\
-                .filter_by(family_id=current_user.family_id).all()
-            user_ids = [user_id[0] for user_id in family_user_ids]  # Extract IDs from tuples
-            current_app.logger.debug("Retrieved family user IDs for family_id %s: %s", current_user.family_id, user_ids)
-            return user_ids
-        else:
-            current_app.logger.debug("User %s does not belong to a family; using their own ID.", current_user.id)
-            return [current_user.id]
-    except Exception as e:
-        current_app.logger.error("Error retrieving family user IDs for user %s: %s", current_user.id, e)
-        return [current_user.id]
+    parsed = []
+    for name in ('start_date', 'end_date'):
+        value = None
+        if filters[name]:
+            try:
+                value = datetime.strptime(filters[name], '%Y-%m-%d')
+                current_app.logger.debug("Applied %s filter: %s", name, value)
+            except ValueError as e:
+                current_app.logger.error("Invalid %s format: %s for user %s. Error: %s", name, filters[name], current_user.id, e)
+                raise
+        parsed.append(value)
+    return tuple(parsed)
+
+
+def normalize_filters(filters: dict, current_user: User) -> dict:
+    """
+    Return the filters with the dates resolved to ISO strings (None when empty), so that
+    equivalent filters compare equal. Raises ValueError on an invalid date format.
+    """
+    start_dt, end_dt = parse_date_filters(filters, current_user)
+    return dict(
+        filters,
+        start_date=start_dt.date().isoformat() if start_dt else None,
+        end_date=end_dt.date().isoformat() if end_dt else None
+    )
 
 
-def build_query(filters: dict, family_user_ids: list, current_user: User):
+def get_annual_totals(filters: dict, current_user: User):
     """
-    Build the SQLAlchemy query for the annual overview report.
+    Aggregate income and expense per year for the annual overview report.
     Returns None if there's any invalid date format.
     """
     try:
-        income_sum = func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0))
-        expense_sum = func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0))
-
-        query = db.session.query(
-            extract('year', Transaction.timestamp).label('year'),
-            income_sum.label('total_income'),
-            expense_sum.label('total_expense')
-        ).filter(
-            Transaction.user_id.in_(family_user_ids),
-            Transaction.is_transfer.is_(False)
+        start_dt, end_dt = parse_date_filters(filters, current_user)
+    except ValueError:
+        return None
+
+    try:
+        monthly_totals = get_monthly_totals(
+            current_user.family_id,
+            family_transaction_filter(current_user),
+            start_dt,
+            end_dt,
+            category_id=filters['category_id'],
+            account_id=filters['account_id']
         )
+        yearly = {}
+        for row in monthly_totals:
+            income, expense = yearly.get(row.year, (0, 0))
+            yearly[row.year] = (income + row.income, expense + row.expense)
+        annual_totals = [AnnualTotal(year, income, expense) for year, (income, expense) in sorted(yearly.items())]
+        current_app.logger.debug("Annual totals for user %s: %s", current_user.id, annual_totals)
+        return annual_totals
+    except Exception as e:
+        current_app.logger.error("Error aggregating annual totals for user %s: %s", current_user.id, e)
+        return None
 
-        # Validate and apply date filters
-        if filters['start_date']:
-            try:
-                start_dt = datetime.strptime(filters['start_date'], '%Y-%m-%d')
-                query = query.filter(Transaction.timestamp >= start_dt)
-                current_app.logger.debug("Applied start_date filter: %s", start_dt)
-            except ValueError as e:
-                current_app.logger.error("Invalid start_date format: %s for user %s. Error: %s", filters['start_date'], current_user.id, e)
-                return None
 
-        if filters['end_date']:
-            try:
-                end_dt = datetime.strptime(filters['end_date'], '%Y-%m-%d')
-                query = query.filter(Transaction.timestamp <= end_dt)
-                current_app.logger.debug("Applied end_date filter: %s", end_dt)
-            except ValueError as e:
-                current_app.logger.error("Invalid end_date format: %s for user %s. Error: %s", filters['end_date'], current_user.id, e)
-                return None
-
-        if filters['category_id']:
-            query = query.filter(Transaction.category_id == filters['category_id'])
-            current_app.logger.debug("Applied category filter: %s", filters['category_id'])
-        if filters['account_id']:
-            query = query.filter(Transaction.account_id == filters['account_id'])
-            current_app.logger.debug("Applied account filter: %s", filters['account_id'])
-
-        query = query.group_by('year').order_by('year')
-        current_app.logger.debug("Built query: %s", query)
-        return query
-    except Exception as e:
-        current_app.logger.error("Error building query for user %s: %s", current_user.id, e)
+def build_annual_report(annual_totals: list) -> dict:
+    """
+    Turn yearly totals into the table rows and chart series of the annual overview.
+    """
+    annual_data = []
+    labels = []
+    incomes = []
+    expenses = []
+    for row in annual_totals:
+        year = int(row.year)
+        total_income = row.total_income or 0
+        total_expense = abs(row.total_expense) if row.total_expense else 0
+
+        annual_data.append({
+            'year': year,
+            'total_income': total_income,
+            'total_expense': total_expense,
+            'net': total_income - total_expense
+        })
+        labels.append(str(year))
+        incomes.append(total_income)
+        expenses.append(total_expense)
+    return {'annual_data': annual_data, 'labels': labels, 'incomes': incomes, 'expenses': expenses}
+
+
+def get_annual_report(filters: dict, current_user: User):
+    """
+    Return the annual overview data, cached per family and normalized filters until the
+    family's next transaction write. Returns None if there's any invalid date format.
+    """
+    try:
+        normalized = normalize_filters(filters, current_user)
+    except ValueError:
         return None
 
+    def load():
+        annual_totals = get_annual_totals(normalized, current_user)
+        return build_annual_report(annual_totals) if annual_totals is not None else None
+
+    return cached_report("annual", current_user.family_id, normalized, load)
+
 
 def get_dropdown_options(current_user: User) -> tuple:
     """
     Retrieve dropdown options for categories and accounts.
+
+    Categories and accounts belong to a family, so a user without one has none.
     """
     try:
-        if current_user.family_id:
-            filter_field = 'family_id'
-            filter_value = current_user.family_id
-        else:
-            filter_field = 'user_id'
-            filter_value = current_user.id
-
-        categories = Category.query.filter_by(**{filter_field: filter_value}).all()
-        accounts = AccountType.query.filter_by(**{filter_field: filter_value}).all()
-        current_app.logger.debug("Retrieved %d categories and %d accounts for %s=%s",
-                                 len(categories), len(accounts), filter_field, filter_value)
+        categories = get_family_categories(current_user.family_id)
+        accounts = get_family_account_types(current_user.family_id)
+        current_app.logger.debug("Retrieved %d categories and %d accounts for family_id=%s",
+                                 len(categories), len(accounts), current_user.family_id)
         return categories, accounts
     except Exception as e:
         current_app.logger.error("Error retrieving dropdown options for user %s: %s", current_user.id, e)
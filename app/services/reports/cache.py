@@ -0,0 +1,68 @@
+import redis
+from flask import current_app
+from app.services.cache import cached_family_value
+
+# Report results are cached per family, report and filter set under the family's
+# transaction version, so a cached report is always as fresh as the family's data.
+# Hits and misses are counted in one Redis hash shared by all workers.
+REPORT_CACHE_METRICS = "report_cache_metrics"
+
+
+def _metrics_key():
+    return f"{current_app.config['CACHE_KEY_PREFIX']}{REPORT_CACHE_METRICS}"
+
+
+def record_report_cache_result(report, hit):
+    """
+    Count a report cache hit or miss.
+    """
+    try:
+        current_app.config["SESSION_REDIS"].hincrby(_metrics_key(), f"{report}:{'hits' if hit else 'misses'}", 1)
+    except redis.RedisError as e:
+        current_app.logger.warning("Could not record report cache metrics for %s: %s", report, e)
+
+
+def cached_report(report, family_id, filters, loader):
+    """
+    Return ``loader()`` for a report, cached per family and normalized filters until the
+    family's next transaction write.
+
+    Args:
+        report (str): Report name, e.g. ``"annual"``.
+        family_id (int): Family the report is built for.
+        filters (dict): The report's filters with dates resolved to ISO strings.
+        loader (callable): Builds the report payload on a miss; it must be JSON
+            serializable, or None when the report could not be built.
+
+    Returns:
+        The cached or freshly built payload.
+    """
+    loaded = []
+
+    def load():
+        loaded.append(True)
+        return loader()
+
+    payload = cached_family_value(family_id, f"report:{report}", filters, load)
+    record_report_cache_result(report, hit=not loaded)
+    current_app.logger.debug("Report %s for family_id=%s served from %s", report, family_id, "database" if loaded else "cache")
+    return payload
+
+
+def get_report_cache_metrics():
+    """
+    Return the hit and miss counts and hit ratio of each report, or None if Redis is unavailable.
+    """
+    try:
+        raw = current_app.config["SESSION_REDIS"].hgetall(_metrics_key())
+    except redis.RedisError as e:
+        current_app.logger.warning("Could not read report cache metrics: %s", e)
+        return None
+    metrics = {}
+    for field, count in raw.items():
+        report, outcome = (field.decode() if isinstance(field, bytes) else field).rsplit(":", 1)
+        metrics.setdefault(report, {"hits": 0, "misses": 0})[outcome] = int(count)
+    for counts in metrics.values():
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_ratio"] = round(counts["hits"] / lookups, 4) if lookups else None
+    return metrics
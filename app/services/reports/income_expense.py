@@ -1,13 +1,11 @@
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
-from sqlalchemy import extract, func, case
 from sqlalchemy.exc import SQLAlchemyError
 from flask import current_app
-from app import db
-from app.models.transaction import Transaction
-from app.models.user import User
-from app.models.category import Category
-from app.models.account_type import AccountType
+from app.services.family import family_transaction_filter
+from app.services.reference_data import get_family_account_types, get_family_categories
+from app.services.reports.cache import cached_report
+from app.services.rollup import get_monthly_totals
 
 
 def get_date_filters(request_args):
@@ -60,62 +58,35 @@ def parse_date_range(start_date_str, end_date_str):
     return start_dt, end_dt
 
 
-def get_family_user_ids(current_user):
+def get_monthly_results(current_user, start_dt, end_dt, category_id=None, account_id=None):
     """
-    Retrieve the list of user IDs for the current user's family or the user alone.
+    Retrieve income and expense totals per month for the provided filters.
+    Returns None if the totals could not be loaded.
     """
     try:
-        if current_user.family_id:
-            family_users = User.query.filter_by(family_id=current_user.family_id).all()
-            user_ids = [u.id for u in family_users]
-            current_app.logger.debug("Family user IDs: %s", user_ids)
-            return user_ids
-        else:
-            current_app.logger.debug("User %s has no family_id, returning own ID.", current_user.id)
-            return [current_user.id]
-    except Exception as e:
-        current_app.logger.error("Error in get_family_user_ids for user %s: %s", current_user.id, e)
-        return [current_user.id]
-
-
-def build_transaction_query(user_ids, start_dt, end_dt, category_id=None, account_id=None):
-    """
-    Build the SQLAlchemy query for transactions based on the provided filters.
-    """
-    try:
-        query = db.session.query(Transaction).filter(
-            Transaction.user_id.in_(user_ids),
-            Transaction.is_transfer.is_(False),
-            Transaction.timestamp >= start_dt,
-            Transaction.timestamp <= end_dt
+        results = get_monthly_totals(
+            current_user.family_id,
+            family_transaction_filter(current_user),
+            start_dt,
+            end_dt,
+            category_id=category_id,
+            account_id=account_id
         )
-        if category_id:
-            query = query.filter(Transaction.category_id == category_id)
-        if account_id:
-            query = query.filter(Transaction.account_id == account_id)
-
         current_app.logger.debug(
-            "Built transaction query with filters: user_ids=%s, start_dt=%s, end_dt=%s, category_id=%s, account_id=%s",
-            user_ids, start_dt, end_dt, category_id, account_id
+            "Retrieved monthly results with filters: family_id=%s, start_dt=%s, end_dt=%s, category_id=%s, account_id=%s",
+            current_user.family_id, start_dt, end_dt, category_id, account_id
         )
-        return query
+        return results
     except Exception as e:
-        current_app.logger.error("Error in build_transaction_query: %s", e)
-        return db.session.query(Transaction).filter(False)  # return an empty query
+        current_app.logger.error("Error in get_monthly_results: %s", e)
+        return None
 
 
-def process_transaction_results(query):
+def process_transaction_results(results):
     """
-    Summarize the transaction query results into labels, incomes, and expenses per month.
+    Summarize monthly results into labels, incomes, and expenses per month.
     """
     try:
-        results = query.with_entities(
-            extract('year', Transaction.timestamp).label('year'),
-            extract('month', Transaction.timestamp).label('month'),
-            func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)).label('income'),
-            func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0)).label('expense')
-        ).group_by('year', 'month').order_by('year', 'month').all()
-
         current_app.logger.debug("Raw transaction results: %s", results)
         sorted_results = sorted(results, key=lambda r: (r.year, r.month))
         labels = []
@@ -135,12 +106,35 @@ def process_transaction_results(query):
         return [], [], []
 
 
+def get_income_expense_report(current_user, start_dt, end_dt, category_id=None, account_id=None):
+    """
+    Return the monthly income and expense series, cached per family and filters until the
+    family's next transaction write. A failed load yields empty series and is not cached.
+    """
+    filters = {
+        'start_date': start_dt.date().isoformat() if isinstance(start_dt, datetime) else start_dt.isoformat(),
+        'end_date': end_dt.date().isoformat() if isinstance(end_dt, datetime) else end_dt.isoformat(),
+        'category_id': category_id,
+        'account_id': account_id,
+    }
+
+    def load():
+        results = get_monthly_results(current_user, start_dt, end_dt, category_id, account_id)
+        if results is None:
+            return None
+        labels, incomes, expenses = process_transaction_results(results)
+        return {'labels': labels, 'incomes': incomes, 'expenses': expenses}
+
+    report = cached_report("income_expense", current_user.family_id, filters, load)
+    return report if report is not None else {'labels': [], 'incomes': [], 'expenses': []}
+
+
 def get_cached_categories(current_user):
     """
-    Retrieve and cache the list of categories for the current user's family.
+    Retrieve the cached list of categories for the current user's family.
     """
     try:
-        categories = Category.query.filter_by(family_id=current_user.family_id).all()
+        categories = get_family_categories(current_user.family_id)
         current_app.logger.debug("Loaded %d categories for family_id %s", len(categories), current_user.family_id)
         return categories
     except SQLAlchemyError as e:
@@ -153,10 +147,10 @@ def get_cached_categories(current_user):
 
 def get_cached_accounts(current_user):
     """
-    Retrieve and cache the list of accounts for the current user's family.
+    Retrieve the cached list of accounts for the current user's family.
     """
     try:
-        accounts = AccountType.query.filter_by(family_id=current_user.family_id).all()
+        accounts = get_family_account_types(current_user.family_id)
         current_app.logger.debug("Loaded %d accounts for family_id %s", len(accounts), current_user.family_id)
         return accounts
     except SQLAlchemyError as e:
@@ -1,13 +1,11 @@
 import calendar
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
-from sqlalchemy import extract, func
 from flask import current_app
-from app import db
-from app.models.transaction import Transaction
-from app.models.user import User
-from app.models.category import Category
-from app.models.account_type import AccountType
+from app.services.family import family_transaction_filter
+from app.services.reference_data import get_family_account_types, get_family_categories
+from app.services.reports.cache import cached_report
+from app.services.rollup import get_monthly_totals
 
 
 def get_date_range(today, time_filter, start_date_str=None, end_date_str=None):
@@ -77,83 +75,59 @@ def get_family_filter(current_user):
     """
     Build the family filter for transactions based on the current user.
     """
-    if current_user.family_id:
-        current_app.logger.debug("Building family filter for family_id: %s", current_user.family_id)
-        return Transaction.user.has(User.family_id == current_user.family_id)
-    else:
-        current_app.logger.debug("User %s has no family_id; filtering by user_id.", current_user.id)
-        return Transaction.user_id == current_user.id
+    current_app.logger.debug("Building family filter for user %s (family_id: %s)", current_user.id, current_user.family_id)
+    return family_transaction_filter(current_user)
 
 
-def build_base_query(family_filter, start_date, end_date, category_id=None, account_id=None):
-    """
-    Build the base query for transactions within the specified date range.
-    """
-    current_app.logger.debug("Building base query with start_date: %s, end_date: %s, category_id: %s, account_id: %s",
-                             start_date, end_date, category_id, account_id)
-    query = db.session.query(Transaction).filter(
-        family_filter,
-        Transaction.is_transfer.is_(False),
-        Transaction.timestamp >= start_date,
-        Transaction.timestamp <= end_date
-    )
-    if category_id:
-        query = query.filter(Transaction.category_id == category_id)
-        current_app.logger.debug("Added category filter: %s", category_id)
-    if account_id:
-        query = query.filter(Transaction.account_id == account_id)
-        current_app.logger.debug("Added account filter: %s", account_id)
-    return query
-
-
-def generate_chart_data(family_filter, start_date, end_date, category_id=None, account_id=None):
+def generate_chart_data(family_filter, start_date, end_date, category_id=None, account_id=None, family_id=None):
     """
     Generate chart data for the monthly spending report (only negative amounts).
+    Whole months are served from the monthly rollup when family_id is given.
     """
     current_app.logger.debug("Generating chart data with family_filter: %s, start_date: %s, end_date: %s, category_id: %s, account_id: %s",
                              family_filter, start_date, end_date, category_id, account_id)
-    chart_query = db.session.query(
-        extract('year', Transaction.timestamp).label('year'),
-        extract('month', Transaction.timestamp).label('month'),
-        func.sum(Transaction.amount).label('total')
-    ).filter(
-        family_filter,
-        Transaction.amount < 0,
-        Transaction.is_transfer.is_(False),
-        Transaction.timestamp >= start_date,
-        Transaction.timestamp <= end_date
-    )
-    if category_id:
-        chart_query = chart_query.filter(Transaction.category_id == category_id)
-        current_app.logger.debug("Added category filter to chart_query: %s", category_id)
-    if account_id:
-        chart_query = chart_query.filter(Transaction.account_id == account_id)
-        current_app.logger.debug("Added account filter to chart_query: %s", account_id)
-
-    chart_query = chart_query.group_by('year', 'month').order_by('year', 'month')
-    current_app.logger.debug("Final chart query: %s", chart_query)
-    results = chart_query.all()
-    current_app.logger.debug("Chart query returned %d rows", len(results))
-    sorted_results = sorted(results, key=lambda r: (r.year, r.month))
+    results = get_monthly_totals(family_id, family_filter, start_date, end_date, category_id=category_id, account_id=account_id)
+    current_app.logger.debug("Monthly totals returned %d rows", len(results))
     labels = []
     totals = []
 
-    for row in sorted_results:
+    for row in results:
+        if not row.expense:
+            continue
         label = f"{int(row.year)}-{int(row.month):02d} ({calendar.month_abbr[int(row.month)]})"
         labels.append(label)
-        totals.append(abs(float(row.total)) if row.total else 0)
+        totals.append(abs(float(row.expense)))
     current_app.logger.debug("Generated chart data - labels: %s, totals: %s", labels, totals)
     return labels, totals
 
 
+def get_monthly_report(family_filter, start_date, end_date, category_id=None, account_id=None, family_id=None):
+    """
+    Return the monthly spending chart data, cached per family and resolved date range
+    until the family's next transaction write.
+    """
+    filters = {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'category_id': category_id,
+        'account_id': account_id,
+    }
+
+    def load():
+        labels, totals = generate_chart_data(family_filter, start_date, end_date, category_id, account_id, family_id=family_id)
+        return {'labels': labels, 'totals': totals}
+
+    return cached_report("monthly", family_id, filters, load)
+
+
 def get_dropdown_options(current_user):
     """
     Retrieve dropdown options for categories and accounts (family-based).
     """
     current_app.logger.debug("Retrieving dropdown options for user: %s", current_user.id)
     if current_user.family_id:
-        categories = Category.query.filter_by(family_id=current_user.family_id).all()
-        accounts = AccountType.query.filter_by(family_id=current_user.family_id).all()
+        categories = get_family_categories(current_user.family_id)
+        accounts = get_family_account_types(current_user.family_id)
         current_app.logger.debug("Found %d categories and %d accounts for family_id: %s",
                                  len(categories), len(accounts), current_user.family_id)
     else:
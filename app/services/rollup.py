@@ -0,0 +1,385 @@
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+from dateutil.relativedelta import relativedelta
+from flask import current_app
+from sqlalchemy import event, extract, func, case, select, insert, update, delete, tuple_, bindparam, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.models.monthly_category_rollup import MonthlyCategoryRollup
+from app.services.cache import mark_families_changed
+
+
+# Transaction ids are looked up in chunks to keep IN lists bounded on large imports.
+ID_CHUNK_SIZE = 500
+
+BUCKET_COLUMNS = ("family_id", "account_id", "category_id", "year", "month", "is_transfer")
+
+BucketDelta = namedtuple("BucketDelta", list(BUCKET_COLUMNS) + ["income", "expense", "count"])
+
+MonthlyTotal = namedtuple("MonthlyTotal", ["year", "month", "category_id", "income", "expense", "count"])
+
+rollup_table = MonthlyCategoryRollup.__table__
+
+
+def bucket_aggregate_select():
+    """
+    Build a SELECT that aggregates transactions into rollup buckets.
+
+    Callers add their own WHERE clause (transaction ids, a family, ...).
+    """
+    return select(
+        Transaction.family_id.label("family_id"),
+        Transaction.account_id.label("account_id"),
+        Transaction.category_id.label("category_id"),
+        extract('year', Transaction.timestamp).label("year"),
+        extract('month', Transaction.timestamp).label("month"),
+        func.coalesce(Transaction.is_transfer, False).label("is_transfer"),
+        func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)).label("income"),
+        func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0)).label("expense"),
+        func.count(Transaction.id).label("count"),
+    ).where(
+        Transaction.family_id.isnot(None),
+        Transaction.timestamp.isnot(None)
+    ).group_by(
+        Transaction.family_id,
+        Transaction.account_id,
+        Transaction.category_id,
+        extract('year', Transaction.timestamp),
+        extract('month', Transaction.timestamp),
+        func.coalesce(Transaction.is_transfer, False)
+    )
+
+
+def _aggregate_ids(connection, transaction_ids):
+    """
+    Aggregate the stored state of the given transactions into bucket rows.
+    """
+    rows = []
+    transaction_ids = list(transaction_ids)
+    for i in range(0, len(transaction_ids), ID_CHUNK_SIZE):
+        chunk = transaction_ids[i:i + ID_CHUNK_SIZE]
+        rows.extend(connection.execute(bucket_aggregate_select().where(Transaction.id.in_(chunk))).all())
+    return rows
+
+
+def _bucket_key(row):
+    return (row.family_id, row.account_id, row.category_id, int(row.year), int(row.month), bool(row.is_transfer))
+
+
+def apply_bucket_deltas(connection, rows, sign=1):
+    """
+    Add (sign=1) or subtract (sign=-1) aggregated bucket rows to the rollup table.
+
+    Existing buckets are looked up in one query per chunk and updated with a single
+    executemany UPDATE; new buckets go in with one multi-row INSERT. Buckets that end
+    up without transactions are removed.
+    """
+    deltas = {}
+    for row in rows:
+        key = _bucket_key(row)
+        income, expense, count = deltas.get(key, (0.0, 0.0, 0))
+        deltas[key] = (
+            income + sign * float(row.income or 0),
+            expense + sign * float(row.expense or 0),
+            count + sign * int(row.count or 0),
+        )
+    deltas = {key: totals for key, totals in deltas.items() if any(totals)}
+    if not deltas:
+        return
+
+    bucket_columns = [rollup_table.c[column] for column in BUCKET_COLUMNS]
+    existing = {}
+    keys = list(deltas)
+    for i in range(0, len(keys), ID_CHUNK_SIZE):
+        chunk = keys[i:i + ID_CHUNK_SIZE]
+        for row in connection.execute(select(rollup_table.c.id, *bucket_columns).where(tuple_(*bucket_columns).in_(chunk))):
+            existing[_bucket_key(row)] = row.id
+
+    updates = [
+        {"bucket_id": existing[key], "delta_income": income, "delta_expense": expense, "delta_count": count}
+        for key, (income, expense, count) in deltas.items() if key in existing
+    ]
+    if updates:
+        connection.execute(
+            update(rollup_table).where(rollup_table.c.id == bindparam("bucket_id")).values(
+                income=rollup_table.c.income + bindparam("delta_income"),
+                expense=rollup_table.c.expense + bindparam("delta_expense"),
+                count=rollup_table.c.count + bindparam("delta_count"),
+            ),
+            updates
+        )
+    inserts = [
+        dict(zip(BUCKET_COLUMNS, key), income=income, expense=expense, count=count)
+        for key, (income, expense, count) in deltas.items() if key not in existing and count > 0
+    ]
+    if inserts:
+        connection.execute(insert(rollup_table), inserts)
+    shrunk = [existing[key] for key, (_, _, count) in deltas.items() if key in existing and count < 0]
+    for i in range(0, len(shrunk), ID_CHUNK_SIZE):
+        connection.execute(delete(rollup_table).where(rollup_table.c.id.in_(shrunk[i:i + ID_CHUNK_SIZE]), rollup_table.c.count <= 0))
+
+
+@event.listens_for(Session, "before_flush")
+def _assign_transaction_families(session, flush_context, instances):
+    """
+    Fill in the denormalized family_id of new transactions from their user.
+
+    Write paths set it explicitly; this covers transactions created elsewhere so the
+    rollup and the family-scoped queries never miss them.
+    """
+    for obj in session.new:
+        if isinstance(obj, Transaction) and obj.family_id is None and obj.user_id is not None:
+            user = session.get(User, obj.user_id)
+            obj.family_id = user.family_id if user else None
+
+
+DEDUP_KEY_SOURCES = ("timestamp", "amount", "account_id")
+
+
+@event.listens_for(Session, "before_flush")
+def _assign_dedup_keys(session, flush_context, instances):
+    """
+    Compute the dedup_key of new transactions and of those whose date, amount or account changed.
+    """
+    timestamp_default = Transaction.__table__.c.timestamp.default
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            if obj.timestamp is None and timestamp_default is not None and timestamp_default.is_scalar:
+                # Apply the column default now so the key is computed from the stored date.
+                obj.timestamp = timestamp_default.arg
+            obj.dedup_key = Transaction.compute_dedup_key(obj.timestamp, obj.amount, obj.account_id)
+    for obj in session.dirty:
+        if isinstance(obj, Transaction):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in DEDUP_KEY_SOURCES):
+                obj.dedup_key = Transaction.compute_dedup_key(obj.timestamp, obj.amount, obj.account_id)
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_rollup_removals(session, flush_context, instances):
+    """
+    Subtract the stored state of transactions about to be updated or deleted.
+
+    The database still holds the previous values at this point, so old buckets are
+    read back from it rather than from (possibly expired) attribute history.
+    """
+    pending = [obj for obj in session.new if isinstance(obj, Transaction)]
+    changed_ids = set()
+    for obj in session.dirty:
+        if isinstance(obj, Transaction) and session.is_modified(obj) and obj.id is not None:
+            pending.append(obj)
+            changed_ids.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Transaction) and obj.id is not None:
+            changed_ids.add(obj.id)
+
+    session.info["rollup_pending"] = pending
+    if changed_ids:
+        connection = session.connection()
+        rows = _aggregate_ids(connection, changed_ids)
+        mark_families_changed(session, (row.family_id for row in rows))
+        apply_bucket_deltas(connection, rows, sign=-1)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_rollup_additions(session, flush_context):
+    """
+    Add the freshly written state of inserted and updated transactions.
+    """
+    pending = session.info.pop("rollup_pending", [])
+    transaction_ids = {obj.id for obj in pending if obj.id is not None and obj not in session.deleted}
+    if transaction_ids:
+        connection = session.connection()
+        rows = _aggregate_ids(connection, transaction_ids)
+        mark_families_changed(session, (row.family_id for row in rows))
+        apply_bucket_deltas(connection, rows, sign=1)
+
+
+def remove_transactions(query):
+    """
+    Subtract every transaction matched by an ORM query from the rollup.
+
+    Bulk ``query.delete()`` bypasses the flush events, so call this before it.
+    """
+    ids = [tx_id for (tx_id,) in query.with_entities(Transaction.id).all()]
+    current_app.logger.debug("Removing %d transactions from the monthly rollup", len(ids))
+    connection = db.session.connection()
+    rows = _aggregate_ids(connection, ids)
+    mark_families_changed(db.session, (row.family_id for row in rows))
+    apply_bucket_deltas(connection, rows, sign=-1)
+
+
+def add_inserted_transactions(family_id, rows):
+    """
+    Add transactions written with a core ``insert(Transaction)`` to the rollup.
+
+    Bulk inserts bypass the flush events, so the buckets are aggregated here from the
+    inserted value dictionaries instead. Users without a family have no rollup.
+    """
+    if not family_id or not rows:
+        return
+    buckets = {}
+    for row in rows:
+        timestamp = row["timestamp"]
+        key = (family_id, row["account_id"], row["category_id"], timestamp.year, timestamp.month, bool(row.get("is_transfer")))
+        income, expense, count = buckets.get(key, (0.0, 0.0, 0))
+        amount = float(row["amount"])
+        buckets[key] = (income + max(amount, 0.0), expense + min(amount, 0.0), count + 1)
+    mark_families_changed(db.session, [family_id])
+    apply_bucket_deltas(db.session.connection(), [BucketDelta(*key, *totals) for key, totals in buckets.items()], sign=1)
+
+
+def rebuild_family_rollup(family_id):
+    """
+    Recompute every rollup bucket for a family from its transactions.
+
+    Used when transactions change family (a user joins another family); the caller commits.
+    """
+    if not family_id:
+        return
+    current_app.logger.info("Rebuilding monthly rollup for family_id=%s", family_id)
+    mark_families_changed(db.session, [family_id])
+    db.session.execute(delete(rollup_table).where(rollup_table.c.family_id == family_id))
+    aggregate = bucket_aggregate_select().where(Transaction.family_id == family_id).subquery()
+    columns = list(BUCKET_COLUMNS) + ["income", "expense", "count"]
+    db.session.execute(insert(rollup_table).from_select(columns, select(*(aggregate.c[column] for column in columns))))
+
+
+def _as_date(value):
+    if value is None or (isinstance(value, date) and not isinstance(value, datetime)):
+        return value
+    return value.date()
+
+
+def _month_start(value):
+    return value.replace(day=1)
+
+
+def split_date_range(start_date, end_date):
+    """
+    Split an inclusive date range into whole months and partial edge ranges.
+
+    Returns ``(month_range, partial_ranges)``: ``month_range`` is a half-open
+    ``(first_month, end_month)`` pair of month starts (either side may be None for
+    an open range) or None when the range covers no whole month; ``partial_ranges``
+    is a list of half-open ``(start, end)`` date pairs that must be read from the
+    transaction table.
+    """
+    start_date = _as_date(start_date)
+    end_exclusive = _as_date(end_date) + timedelta(days=1) if end_date is not None else None
+
+    first_month = start_date
+    if start_date is not None and start_date.day != 1:
+        first_month = _month_start(start_date) + relativedelta(months=1)
+    end_month = end_exclusive
+    if end_exclusive is not None and end_exclusive.day != 1:
+        end_month = _month_start(end_exclusive)
+
+    if first_month is not None and end_month is not None and first_month >= end_month:
+        return None, [(start_date, end_exclusive)]
+
+    partial_ranges = []
+    if start_date is not None and first_month != start_date:
+        partial_ranges.append((start_date, first_month))
+    if end_exclusive is not None and end_month != end_exclusive:
+        partial_ranges.append((end_month, end_exclusive))
+    return (first_month, end_month), partial_ranges
+
+
+def _rollup_totals(family_id, month_range, category_id, account_id, by_category):
+    first_month, end_month = month_range
+    category_column = MonthlyCategoryRollup.category_id if by_category else db.literal(None)
+    query = db.session.query(
+        MonthlyCategoryRollup.year.label("year"),
+        MonthlyCategoryRollup.month.label("month"),
+        category_column.label("category_id"),
+        func.sum(MonthlyCategoryRollup.income).label("income"),
+        func.sum(MonthlyCategoryRollup.expense).label("expense"),
+        func.sum(MonthlyCategoryRollup.count).label("count"),
+    ).filter(
+        MonthlyCategoryRollup.family_id == family_id,
+        MonthlyCategoryRollup.is_transfer.is_(False)
+    )
+    period = tuple_(MonthlyCategoryRollup.year, MonthlyCategoryRollup.month)
+    if first_month is not None:
+        query = query.filter(period >= tuple_(first_month.year, first_month.month))
+    if end_month is not None:
+        query = query.filter(period < tuple_(end_month.year, end_month.month))
+    if category_id:
+        query = query.filter(MonthlyCategoryRollup.category_id == category_id)
+    if account_id:
+        query = query.filter(MonthlyCategoryRollup.account_id == account_id)
+    group_columns = [MonthlyCategoryRollup.year, MonthlyCategoryRollup.month]
+    if by_category:
+        group_columns.append(MonthlyCategoryRollup.category_id)
+    return query.group_by(*group_columns).all()
+
+
+def _live_totals(family_filter, start_date, end_date, category_id, account_id, by_category):
+    year = extract('year', Transaction.timestamp)
+    month = extract('month', Transaction.timestamp)
+    category_column = Transaction.category_id if by_category else db.literal(None)
+    query = db.session.query(
+        year.label("year"),
+        month.label("month"),
+        category_column.label("category_id"),
+        func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)).label("income"),
+        func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0)).label("expense"),
+        func.count(Transaction.id).label("count"),
+    ).filter(
+        family_filter,
+        Transaction.is_transfer.is_(False)
+    )
+    if start_date is not None:
+        query = query.filter(Transaction.timestamp >= datetime.combine(start_date, time.min))
+    if end_date is not None:
+        query = query.filter(Transaction.timestamp < datetime.combine(end_date, time.min))
+    if category_id:
+        query = query.filter(Transaction.category_id == category_id)
+    if account_id:
+        query = query.filter(Transaction.account_id == account_id)
+    group_columns = [year, month]
+    if by_category:
+        group_columns.append(Transaction.category_id)
+    return query.group_by(*group_columns).all()
+
+
+def get_monthly_totals(family_id, family_filter, start_date=None, end_date=None, category_id=None, account_id=None, by_category=False):
+    """
+    Return non-transfer income and expense totals per month for an inclusive date range.
+
+    Whole months are read from the rollup table; only the partial months at either
+    edge of the range are aggregated from transactions. Users without a family are
+    aggregated from transactions entirely, using ``family_filter``.
+
+    Returns a list of MonthlyTotal tuples sorted by (year, month). ``category_id`` on
+    each tuple is only populated when ``by_category`` is set.
+    """
+    if family_id:
+        month_range, partial_ranges = split_date_range(start_date, end_date)
+    else:
+        end_exclusive = _as_date(end_date) + timedelta(days=1) if end_date is not None else None
+        month_range, partial_ranges = None, [(_as_date(start_date), end_exclusive)]
+
+    rows = []
+    if month_range is not None:
+        rows.extend(_rollup_totals(family_id, month_range, category_id, account_id, by_category))
+    for partial_start, partial_end in partial_ranges:
+        rows.extend(_live_totals(family_filter, partial_start, partial_end, category_id, account_id, by_category))
+
+    merged = {}
+    for row in rows:
+        key = (int(row.year), int(row.month), row.category_id)
+        income, expense, count = merged.get(key, (0.0, 0.0, 0))
+        merged[key] = (income + float(row.income or 0), expense + float(row.expense or 0), count + int(row.count or 0))
+
+    current_app.logger.debug(
+        "Monthly totals for family_id=%s from %s to %s: %d buckets (%d partial ranges)",
+        family_id, start_date, end_date, len(merged), len(partial_ranges)
+    )
+    return [
+        MonthlyTotal(year, month, category, income, expense, count)
+        for (year, month, category), (income, expense, count) in sorted(merged.items(), key=lambda item: item[0][:2])
+    ]
@@ -2,8 +2,7 @@ from flask import render_template, redirect, url_for, flash, current_app
 from flask_login import current_user
 from app import db
 from app.models.transaction import Transaction
-from app.models.category import Category
-from app.models.account_type import AccountType
+from app.services.reference_data import get_family_account_types, get_family_categories
 from app.services.transactions.utilities import create_or_get_category
 
 
@@ -40,6 +39,7 @@ def process_add_transaction(form):
             description=description,
             category_id=category_name,  # use category_name as in original code
             user_id=current_user.id,
+            family_id=current_user.family_id,
             account_id=account_id
         )
         db.session.add(new_transaction)
@@ -60,8 +60,8 @@ def render_add_transaction_form():
     """
     current_app.logger.debug("Rendering add transaction form for user %s", current_user.id)
     try:
-        categories = Category.query.filter_by(family_id=current_user.family_id).all()
-        account_types = AccountType.query.filter_by(family_id=current_user.family_id).all()
+        categories = get_family_categories(current_user.family_id)
+        account_types = get_family_account_types(current_user.family_id)
         current_app.logger.debug("Retrieved %d categories and %d account types for family_id %s",
                                  len(categories), len(account_types), current_user.family_id)
     except Exception as e:
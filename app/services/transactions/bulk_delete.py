@@ -2,17 +2,24 @@ from flask import flash, redirect, url_for, render_template, request, current_ap
 from flask_login import current_user
 from app import db
 from app.models.transaction import Transaction
-from app.models.category import Category
-from app.models.account_type import AccountType
-from app.services.transactions.utilities import apply_date_filter
+from app.models.user import User
+from app.services.transactions.utilities import apply_date_filter, list_view_options
+from app.services.rollup import remove_transactions
+from app.services.reference_data import get_family_account_types, get_family_categories
+from app.services.transactions.pagination import cached_count, keyset_paginate
+from app.services.family import family_transaction_filter
+from app.services.jobs import enqueue_job, job_handler
 
+# "Delete all" runs as a job that deletes matching transactions in chunks of ids,
+# committing each one, so no single transaction holds locks on the whole result.
+DELETE_CHUNK_SIZE = 1000
 
-def build_transaction_query(family_user_ids):
+
+def build_transaction_query(family_filter):
     """
     Build the base query for filtering transactions and extract filter values.
     """
-    current_app.logger.debug("Building transaction query for family_user_ids: %s", family_user_ids)
-    query = Transaction.query.filter(Transaction.user_id.in_(family_user_ids))
+    current_app.logger.debug("Building transaction query for family_filter: %s", family_filter)
     filters = {
         "start_date": request.args.get("start_date"),
         "end_date": request.args.get("end_date"),
@@ -20,6 +27,13 @@ def build_transaction_query(family_user_ids):
         "account_id": request.args.get("account_id", type=int),
     }
     current_app.logger.debug("Extracted filters: %s", filters)
+    return apply_filters(Transaction.query.filter(family_filter), filters), filters
+
+
+def apply_filters(query, filters):
+    """
+    Apply the bulk delete page's date, category and account filters to a transaction query.
+    """
     if filters["start_date"]:
         current_app.logger.debug("Applying start_date filter: %s", filters["start_date"])
         query = apply_date_filter(query, filters["start_date"], "start")
@@ -33,24 +47,51 @@ def build_transaction_query(family_user_ids):
         current_app.logger.debug("Applying account filter: %s", filters["account_id"])
         query = query.filter(Transaction.account_id == filters["account_id"])
     current_app.logger.debug("Built query: %s", query)
-    return query, filters
+    return query
 
 
-def delete_all_transactions(query):
+def delete_all_transactions(query, progress=None):
     """
-    Delete all transactions matching the query.
+    Delete all transactions matching the query, one committed chunk of ids at a time.
+
+    Args:
+        query: Transaction query to delete the results of.
+        progress (callable): Called as ``progress(done, total)`` after each chunk.
+
+    Returns:
+        int: The number of deleted transactions.
     """
+    current_app.logger.debug("Attempting to delete transactions with query: %s", query)
+    total = query.order_by(None).count()
+    count = 0
     try:
-        current_app.logger.debug("Attempting to delete transactions with query: %s", query)
-        count = query.delete(synchronize_session="fetch")
-        db.session.commit()
-        current_app.logger.info("Deleted %d transactions matching the query.", count)
-        flash(f"Deleted all {count} matching transactions.", "success")
+        while True:
+            ids = [row.id for row in query.with_entities(Transaction.id).order_by(Transaction.id).limit(DELETE_CHUNK_SIZE)]
+            if not ids:
+                break
+            chunk = Transaction.query.filter(Transaction.id.in_(ids))
+            remove_transactions(chunk)
+            count += chunk.delete(synchronize_session=False)
+            db.session.commit()
+            if progress:
+                progress(count, total)
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error("Error deleting all transactions: %s", str(e))
-        flash("Error deleting transactions.", "danger")
-    return redirect(url_for("transactions.bulk_delete"))
+        current_app.logger.error("Error deleting all transactions after %d: %s", count, str(e))
+        raise
+    current_app.logger.info("Deleted %d transactions matching the query.", count)
+    return count
+
+
+@job_handler("bulk_delete")
+def bulk_delete_job(progress, user_id, filters):
+    """
+    Background job deleting every family transaction matching the bulk delete filters.
+    """
+    user = db.session.get(User, user_id)
+    query = apply_filters(Transaction.query.filter(family_transaction_filter(user)), filters)
+    count = delete_all_transactions(query, progress)
+    return f"Deleted all {count} matching transactions."
 
 
 def delete_selected_transactions(filters):
@@ -61,7 +102,9 @@ def delete_selected_transactions(filters):
     current_app.logger.debug("Selected transaction IDs for deletion: %s", selected_ids)
     if selected_ids:
         try:
-            count = Transaction.query.filter(Transaction.id.in_(selected_ids)).delete(synchronize_session="fetch")
+            selected_query = Transaction.query.filter(Transaction.id.in_(selected_ids))
+            remove_transactions(selected_query)
+            count = selected_query.delete(synchronize_session="fetch")
             db.session.commit()
             current_app.logger.info("Deleted %d selected transactions.", count)
             flash(f"Deleted {count} transactions.", "success")
@@ -82,7 +125,8 @@ def handle_post_request(query, filters):
     current_app.logger.debug("Handling POST request for bulk deletion with filters: %s", filters)
     if request.form.get("delete_all"):
         current_app.logger.debug("Bulk delete triggered for all transactions")
-        return delete_all_transactions(query)
+        job_id = enqueue_job("bulk_delete", current_user.id, return_url=url_for("transactions.bulk_delete"), filters=filters)
+        return redirect(url_for("jobs.job_progress", job_id=job_id))
     else:
         current_app.logger.debug("Bulk delete triggered for selected transactions")
         return delete_selected_transactions(filters)
@@ -93,14 +137,17 @@ def render_bulk_delete_page(query, filters):
     Render the bulk deletion page with pagination and filter data.
     """
     current_app.logger.debug("Rendering bulk delete page with filters: %s", filters)
-    page = request.args.get('page', 1, type=int)
+    after = request.args.get("after")
+    before = request.args.get("before")
+    page = request.args.get("page", type=int)
     per_page = 20  # Adjust as needed
     try:
-        pagination = query.order_by(Transaction.timestamp.desc()).paginate(page=page, per_page=per_page, error_out=False)
+        pagination = keyset_paginate(query.options(*list_view_options()), per_page, after=after, before=before, page=page,
+                                     total=cached_count(query, filters))
         transactions = pagination.items
-        current_app.logger.debug("Retrieved %d transactions for page %d", len(transactions), page)
-        categories = Category.query.filter_by(family_id=current_user.family_id).order_by(Category.name.asc()).all()
-        account_types = AccountType.query.filter_by(family_id=current_user.family_id).order_by(AccountType.name.asc()).all()
+        current_app.logger.debug("Retrieved %d transactions after %s / before %s", len(transactions), after, before)
+        categories = get_family_categories(current_user.family_id)
+        account_types = get_family_account_types(current_user.family_id)
         current_app.logger.debug("Retrieved %d categories and %d account types for family_id %s",
                                  len(categories), len(account_types), current_user.family_id)
     except Exception as e:
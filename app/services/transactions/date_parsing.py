@@ -0,0 +1,111 @@
+from datetime import datetime
+from dateutil import parser
+from flask import current_app
+
+
+# Number of rows at the top of each upload used to infer the date format
+DATE_SAMPLE_SIZE = 20
+
+# Marker for dates handled by datetime.fromisoformat
+ISO_FORMAT = "iso"
+
+# Month-first layouts come before day-first ones, matching dateutil's default.
+CANDIDATE_FORMATS = (
+    ISO_FORMAT,
+    "%m/%d/%Y",
+    "%m/%d/%y",
+    "%m-%d-%Y",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %I:%M:%S %p",
+    "%m/%d/%Y %I:%M %p",
+    "%Y/%m/%d",
+    "%d/%m/%Y",
+    "%d.%m.%Y",
+    "%d-%b-%Y",
+    "%d %b %Y",
+    "%b %d, %Y",
+    "%B %d, %Y",
+)
+
+# Detected formats are cached per worker under the account type's id and date column,
+# so editing an account type's date_field stops the old entry from being used.
+DATE_FORMAT_CACHE_EXTENSION = "import_date_formats"
+
+
+def parse_with_format(value, date_format):
+    """
+    Parse a date string with a detected format; raises ValueError on a mismatch.
+    """
+    if date_format == ISO_FORMAT:
+        return datetime.fromisoformat(value)
+    return datetime.strptime(value, date_format)
+
+
+def _matches_format(samples, date_format, expected=None):
+    try:
+        parsed = [parse_with_format(value, date_format) for value in samples]
+    except ValueError:
+        return False
+    return expected is None or all(value in readings for value, readings in zip(parsed, expected))
+
+
+def detect_date_format(samples):
+    """
+    Return the first candidate format that parses every sample the way dateutil can read it.
+
+    Each sample must match dateutil's month-first or day-first reading, so a day-first
+    export is recognised even when its first rows are ambiguous. Samples dateutil cannot
+    parse are ignored. Returns None when no candidate fits.
+    """
+    values, expected = [], []
+    for value in samples:
+        value = (value or "").strip()
+        try:
+            expected.append((parser.parse(value), parser.parse(value, dayfirst=True)))
+            values.append(value)
+        except (ValueError, OverflowError):
+            continue
+    if not values:
+        return None
+    for date_format in CANDIDATE_FORMATS:
+        if _matches_format(values, date_format, expected):
+            return date_format
+    return None
+
+
+class DateParser:
+    """
+    Parses the date column of one upload, using a fixed format when one was detected.
+
+    Attributes:
+        date_format (str): Detected strptime format, ISO_FORMAT, or None for dateutil only.
+        fallbacks (int): Number of values that did not match the format and went to dateutil.
+    """
+
+    def __init__(self, date_format=None):
+        self.date_format = date_format
+        self.fallbacks = 0
+
+    def parse(self, value):
+        if self.date_format:
+            try:
+                return parse_with_format(value.strip(), self.date_format)
+            except ValueError:
+                self.fallbacks += 1
+        return parser.parse(value)
+
+
+def get_date_parser(acc_type_obj, samples):
+    """
+    Return a DateParser for an account type, reusing its cached format while the samples still fit.
+    """
+    cache = current_app.extensions.setdefault(DATE_FORMAT_CACHE_EXTENSION, {})
+    key = (acc_type_obj.id, acc_type_obj.date_field)
+    samples = [value.strip() for value in samples if value and value.strip()]
+    date_format = cache.get(key)
+    if date_format is None or not _matches_format(samples, date_format):
+        date_format = detect_date_format(samples)
+        current_app.logger.debug("Detected date format %s for account type %s", date_format, acc_type_obj.name)
+        if date_format:
+            cache[key] = date_format
+    return DateParser(date_format)
@@ -1,7 +1,7 @@
 from flask import current_app
 from app import db
 from app.models.transaction import Transaction
-from app.services.transactions.utilities import get_family_user_ids
+from app.services.family import family_transaction_filter
 from flask_login import current_user
 
 
@@ -13,7 +13,7 @@ def get_transaction_by_id(transaction_id):
     try:
         transaction = Transaction.query.filter(
             Transaction.id == transaction_id,
-            Transaction.user_id.in_(get_family_user_ids())
+            family_transaction_filter()
         ).first()
         if transaction:
             current_app.logger.debug("Found transaction: %s", transaction)
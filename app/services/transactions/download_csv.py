@@ -1,20 +1,25 @@
 import csv
 import io
-from flask import Response, request, current_app
+from flask import Response, request, current_app, stream_with_context
 from datetime import datetime
 from calendar import monthrange
 from sqlalchemy.exc import SQLAlchemyError
 from app.models.transaction import Transaction
+from app.models.category import Category
+from app.models.account_type import AccountType
 
+# Rows are fetched from a server-side cursor and written out in chunks of this size.
+EXPORT_BATCH_SIZE = 1000
 
-def build_transaction_query(family_user_ids, filter_type, category_id, account_id):
+
+def build_transaction_query(family_filter, filter_type, category_id, account_id):
     """
     Build a query to fetch transactions based on filters.
     """
     try:
-        current_app.logger.debug("Building transaction query for family_user_ids: %s", family_user_ids)
+        current_app.logger.debug("Building transaction query for family_filter: %s", family_filter)
         query = Transaction.query.filter(
-            Transaction.user_id.in_(family_user_ids),
+            family_filter,
             Transaction.is_transfer.is_(False)
         )
         if category_id:
@@ -72,41 +77,59 @@ def apply_time_filter(query, time_filter):
         return query
 
 
-def fetch_transactions(query):
+def fetch_export_rows(query):
+    """
+    Return an iterator over the exported columns of the matching transactions, newest first.
+
+    Only the five exported values are selected, with the category and account names
+    joined in, and rows are streamed from a server-side cursor in batches of
+    EXPORT_BATCH_SIZE instead of being loaded as ORM objects.
     """
-    Execute the query and return all transactions.
+    return query.outerjoin(Category, Transaction.category_id == Category.id).outerjoin(
+        AccountType, Transaction.account_id == AccountType.id
+    ).with_entities(
+        Transaction.timestamp,
+        Transaction.description,
+        Transaction.amount,
+        AccountType.name.label("account_name"),
+        Category.name.label("category_name")
+    ).order_by(Transaction.timestamp.desc(), Transaction.id.desc()).yield_per(EXPORT_BATCH_SIZE)
+
+
+def generate_csv_rows(rows):
     """
+    Yield the CSV file in chunks: the header right away, then one chunk per EXPORT_BATCH_SIZE rows.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["Date", "Description", "Amount", "Account Type", "Category"])
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    count = 0
     try:
-        transactions = query.order_by(Transaction.timestamp.desc()).all()
-        current_app.logger.debug("Fetched %d transactions", len(transactions))
-        return transactions
+        for row in rows:
+            tx_date = row.timestamp.strftime("%Y-%m-%d") if row.timestamp else ""
+            writer.writerow([tx_date, row.description, f"{row.amount:.2f}", row.account_name or "", row.category_name or "Uncategorized"])
+            count += 1
+            if count % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
     except SQLAlchemyError as e:
-        current_app.logger.error("Database error while fetching transactions: %s", e)
-        return []
+        # The response has already started, so the file just ends early.
+        current_app.logger.error("Database error while streaming transactions after %d rows: %s", count, e)
+    yield buffer.getvalue()
+    current_app.logger.debug("Streamed %d transactions to CSV", count)
 
 
-def generate_csv_response(transactions):
+def generate_csv_response(rows):
     """
-    Generate and return a CSV Response from the transactions list.
+    Return a streamed CSV Response for the exported rows (see fetch_export_rows).
     """
-    try:
-        current_app.logger.debug("Generating CSV response for %d transactions", len(transactions))
-        si = io.StringIO()
-        writer = csv.writer(si)
-        writer.writerow(["Date", "Description", "Amount", "Account Type", "Category"])
-        for tx in transactions:
-            tx_date = tx.timestamp.strftime("%Y-%m-%d") if tx.timestamp else ""
-            category = tx.category.name if tx.category else "Uncategorized"
-            account_name = tx.account.name if hasattr(tx, "account") and tx.account and tx.account.name else ""
-            writer.writerow([tx_date, tx.description, f"{tx.amount:.2f}", account_name, category])
-        output = si.getvalue()
-        si.close()
-        headers = {
-            "Content-Disposition": "attachment; filename=transactions.csv",
-            "Content-type": "text/csv"
-        }
-        current_app.logger.debug("CSV response generated successfully")
-        return Response(output, headers=headers)
-    except Exception as e:
-        current_app.logger.error("Error generating CSV response: %s", e)
-        return Response("Error generating CSV", status=500)
+    headers = {
+        "Content-Disposition": "attachment; filename=transactions.csv",
+        "Content-type": "text/csv"
+    }
+    return Response(stream_with_context(generate_csv_rows(rows)), headers=headers)
@@ -0,0 +1,96 @@
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert, delete, select
+from app import db
+from app.models.import_batch import ImportBatch, ImportStagedRow
+
+
+def create_import_batch(user_id):
+    """
+    Start a new import batch for a user, discarding any batch they left unfinished.
+    """
+    discard_import_batches(user_id)
+    batch = ImportBatch(user_id=user_id, total_rows=0, total_duplicates=0, current_index=0, total_imported=0)
+    db.session.add(batch)
+    db.session.flush()
+    current_app.logger.debug("Created import batch %s for user_id=%s", batch.id, user_id)
+    return batch
+
+
+def stage_rows(batch, processed_data):
+    """
+    Append processed rows to a batch with a single multi-row insert.
+    """
+    if not processed_data:
+        return
+    db.session.execute(insert(ImportStagedRow), [
+        {
+            "batch_id": batch.id,
+            "position": batch.total_rows + offset,
+            "tx_date": datetime.strptime(tx["tx_date"], "%m/%d/%Y").date(),
+            "description": tx["description"],
+            "amount": tx["amount"],
+            "category_field": tx["category_field"],
+            "account_id": tx["account_id"],
+            "account_name": tx["account_name"],
+            "is_duplicate": bool(tx["is_duplicate"]),
+            "force_import": bool(tx.get("force_import", False)),
+            "is_transfer": bool(tx["is_transfer"]),
+        }
+        for offset, tx in enumerate(processed_data)
+    ])
+    batch.total_rows += len(processed_data)
+    batch.total_duplicates += sum(1 for tx in processed_data if tx["is_duplicate"])
+
+
+def get_import_batch(batch_id, user_id):
+    """
+    Return the user's import batch with the given ID, or None.
+    """
+    if not batch_id:
+        return None
+    return ImportBatch.query.filter_by(id=batch_id, user_id=user_id).first()
+
+
+def staged_row_to_tx(row):
+    """
+    Convert a staged row into the dictionary shape used by the import preview and confirmation.
+    """
+    return {
+        "position": row.position,
+        "tx_date": row.tx_date.strftime("%m/%d/%Y"),
+        "amount": row.amount,
+        "description": row.description,
+        "category_field": row.category_field,
+        "account_id": row.account_id,
+        "account_name": row.account_name,
+        "is_duplicate": row.is_duplicate,
+        "force_import": row.force_import,
+        "is_transfer": row.is_transfer,
+    }
+
+
+def get_staged_rows(batch, start, count=None):
+    """
+    Return up to ``count`` staged rows of a batch from position ``start`` as dictionaries.
+    """
+    query = ImportStagedRow.query.filter(
+        ImportStagedRow.batch_id == batch.id,
+        ImportStagedRow.position >= start
+    )
+    if count is not None:
+        query = query.filter(ImportStagedRow.position < start + count)
+    return [staged_row_to_tx(row) for row in query.order_by(ImportStagedRow.position).all()]
+
+
+def discard_import_batches(user_id, batch_id=None):
+    """
+    Delete a user's import batches (or one of them) together with their staged rows.
+    """
+    batch_filter = [ImportBatch.user_id == user_id]
+    if batch_id is not None:
+        batch_filter.append(ImportBatch.id == batch_id)
+    db.session.execute(delete(ImportStagedRow).where(
+        ImportStagedRow.batch_id.in_(select(ImportBatch.id).where(*batch_filter))
+    ))
+    db.session.execute(delete(ImportBatch).where(*batch_filter))
@@ -1,20 +1,40 @@
 import io
 import csv
+from itertools import chain, islice
 from datetime import datetime
 from dateutil import parser
 from flask import render_template, redirect, url_for, flash, current_app, session
 from app.models.transaction import Transaction
 from app.models.category import Category
 from app.models.account_type import AccountType
-from app.models.import_rule import ImportRule
+from app.models.user import User
 from app import db
-from app.services.transactions.utilities import get_family_user_ids, create_or_get_category
-from sqlalchemy import func
+from sqlalchemy import insert
+from app.services.family import family_transaction_filter
+from app.services.transactions.utilities import get_or_create_categories
+from app.services.rollup import add_inserted_transactions
+from app.services.import_rules import get_compiled_rules
+from app.services.jobs import enqueue_job, job_handler
+from app.services.reference_data import get_family_account_types, get_family_categories
+from app.services.transactions.date_parsing import DATE_SAMPLE_SIZE, get_date_parser
+from app.services.transactions.import_staging import (
+    create_import_batch,
+    stage_rows,
+    get_import_batch,
+    get_staged_rows,
+    discard_import_batches,
+)
 
 
 # Batch size constant
 PER_BATCH = 10
 
+# Uploaded rows are checked against stored transactions in chunks of this size
+IMPORT_CHUNK_SIZE = 1000
+
+# Rows without a category (blank in the CSV, or a rule whose category was deleted) land here
+UNCATEGORIZED = "Uncategorized"
+
 
 def get_account_type(account_id, current_user):
     try:
@@ -48,25 +68,35 @@ def validate_csv(file):
 
 
 def parse_csv(file, acc_type_obj, delimiter=","):
+    """
+    Yield parsed rows from an uploaded CSV file.
+
+    The upload stream is decoded incrementally, so only the current row is held in memory.
+    The date format is inferred from the first rows and used for the rest of the file.
+    """
+    stream = io.TextIOWrapper(file.stream, encoding="utf-8", newline=None)
     try:
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
         csv_input = csv.DictReader(stream, delimiter=delimiter)
-        transactions_data = []
-
-        for row in csv_input:
-            transaction = parse_csv_row(row, acc_type_obj)
+        sample = list(islice(csv_input, DATE_SAMPLE_SIZE))
+        date_parser = get_date_parser(acc_type_obj, [row.get(acc_type_obj.date_field) for row in sample])
+        for row in chain(sample, csv_input):
+            transaction = parse_csv_row(row, acc_type_obj, date_parser)
             if transaction:
-                transactions_data.append(transaction)
-        return transactions_data
+                yield transaction
+        if date_parser.fallbacks:
+            current_app.logger.info("%d dates in %s did not match format %s", date_parser.fallbacks, file.filename, date_parser.date_format)
     except Exception as e:
         current_app.logger.error("Error parsing CSV file: %s", e)
         flash("An error occurred while parsing the CSV file. Please check the file format and try again.", "danger")
-        return []
+    finally:
+        # Leave the upload stream open for its owner.
+        stream.detach()
 
 
-def parse_csv_row(row, acc_type_obj):
+def parse_csv_row(row, acc_type_obj, date_parser=None):
     try:
-        tx_date = parser.parse(row[acc_type_obj.date_field])
+        date_value = row[acc_type_obj.date_field]
+        tx_date = date_parser.parse(date_value) if date_parser else parser.parse(date_value)
         description = row[acc_type_obj.description_field]
         if row.get("Memo"):
             description += " " + row["Memo"]
@@ -74,7 +104,7 @@ def parse_csv_row(row, acc_type_obj):
         if acc_type_obj.positive_expense:
             amount = -amount
 
-        category_name = row.get(acc_type_obj.category_field, "").strip() or "Uncategorized"
+        category_name = row.get(acc_type_obj.category_field, "").strip() or UNCATEGORIZED
         current_app.logger.debug(
             "Parsed Transaction - Date: %s, Description: %s, Amount: %s, Category: %s",
             tx_date,
@@ -91,100 +121,116 @@ def parse_csv_row(row, acc_type_obj):
 
 
 def apply_import_rules(transactions_data, acc_type_obj):
-    processed_data = []
-    rules = ImportRule.query.filter(
-        (ImportRule.account_type.is_(None)) | (ImportRule.account_type == acc_type_obj.name)
-    ).all()
+    """
+    Yield a processed row for each parsed row, applying the account type's import rules.
+
+    Category names are resolved, and missing categories created, once per chunk of rows.
+    """
+    rules = get_compiled_rules(acc_type_obj.family_id, acc_type_obj.name)
 
     local_seen = set()  # Track keys within the current file
 
-    for tx_date, description, amount, category_name in transactions_data:
-        is_transfer, category_name = apply_rules_to_transaction(description, category_name, rules)
-        category_obj = create_or_get_category(category_name)
-        tx_key = (tx_date.date(), round(amount, 2))
-        duplicate_in_file = tx_key in local_seen
-        processed_data.append({
-            "tx_date": tx_date.strftime("%m/%d/%Y"),
-            "amount": amount,
-            "description": description,
-            "category_field": category_obj.name,
-            "account_id": acc_type_obj.id,
-            "account_name": acc_type_obj.name,
-            "is_duplicate": duplicate_in_file,
-            "tx_key": tx_key,
-            "is_transfer": is_transfer
-        })
-        local_seen.add(tx_key)
+    for chunk in iter_chunks(transactions_data, IMPORT_CHUNK_SIZE):
+        ruled = [
+            (tx_date, description, amount) + rules.apply(description, category_name)
+            for tx_date, description, amount, category_name in chunk
+        ]
+        get_or_create_categories({category_name or UNCATEGORIZED for *_, category_name in ruled}, acc_type_obj.family_id)
+        for tx_date, description, amount, is_transfer, category_name in ruled:
+            category_name = category_name or UNCATEGORIZED
+            tx_key = (tx_date.date(), round(amount, 2))
+            duplicate_in_file = tx_key in local_seen
+            yield {
+                "tx_date": tx_date.strftime("%m/%d/%Y"),
+                "amount": amount,
+                "description": description,
+                "category_field": category_name,
+                "account_id": acc_type_obj.id,
+                "account_name": acc_type_obj.name,
+                "is_duplicate": duplicate_in_file,
+                "tx_key": tx_key,
+                "is_transfer": is_transfer
+            }
+            local_seen.add(tx_key)
+
+
+def iter_chunks(iterable, size):
+    """
+    Yield lists of up to ``size`` items from an iterable.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def mark_duplicates(processed_data, existing_keys, global_seen):
+    """
+    Flag rows that already exist in the database or in an earlier uploaded file.
+
+    Rows only repeated within their own file stay importable by default.
+    """
+    for tx in processed_data:
+        tx_date_obj = datetime.strptime(tx["tx_date"], "%m/%d/%Y")
+        duplicate_global = tx["tx_key"] in global_seen
+        duplicate_db = duplicate_key(tx_date_obj, tx["amount"], tx["account_id"], tx["description"]) in existing_keys
+
+        if duplicate_global or duplicate_db:
+            tx["is_duplicate"] = True
+            tx["force_import"] = False
+        elif tx["is_duplicate"]:
+            tx["force_import"] = True
+        else:
+            tx["force_import"] = False
 
-    return processed_data
 
+def duplicate_key(tx_date, amount, account_id, description):
+    """
+    Build the key used to match an imported row against stored transactions.
+    """
+    return (tx_date.date(), round(amount, 2), account_id, description)
 
-def apply_rules_to_transaction(description, category_name, rules):
-    is_transfer = False
-    for rule in rules:
-        value = description if rule.field_to_match.lower() == "description" else category_name
-        if rule.match_pattern in value:
-            if rule.is_transfer:
-                is_transfer = True
-            if rule.override_category_id:
-                category_name = rule.override_category_display
-    return is_transfer, category_name
 
+def find_existing_duplicate_keys(processed_data, user=None):
+    """
+    Resolve duplicates for a whole batch of processed transactions at once.
 
-def check_duplicate(tx_date, amount, account_id, description):
-    try:
-        existing = Transaction.query.filter(
-            Transaction.user_id.in_(get_family_user_ids()),
-            func.date(Transaction.timestamp) == tx_date.date(),
-            func.round(Transaction.amount, 2) == round(amount, 2),
-            Transaction.account_id == account_id,
-            Transaction.description == description
-        ).first()
-        return True if existing else False
-    except Exception as e:
-        current_app.logger.error(
-            "Error checking duplicates for date %s, amount %s, account_id %s, description %s: %s",
-            tx_date, amount, account_id, description, e
-        )
-        return False
-
-
-def create_transaction_from_tx(tx, current_user):
+    Stored transactions of the user's (default: current_user) family sharing a row's
+    dedup_key (date, rounded amount and account) are looked up through the
+    (family_id, dedup_key) index, one query per chunk of keys. Their (date, rounded
+    amount, account, description) keys are returned as a set, so each row can be
+    checked in memory.
+    """
+    if not processed_data:
+        return set()
     try:
-        tx_date = datetime.strptime(tx["tx_date"], "%m/%d/%Y")
-        amount = tx["amount"]
-        description = tx["description"]
-        account_id = tx["account_id"]
-        category_name = tx["category_field"]
-        is_transfer = tx.get("is_transfer", False)
-        force_import = tx.get("force_import", False)
-
-        category_obj = create_or_get_category(category_name)
-
-        if check_duplicate(tx_date, amount, account_id, description) and not force_import:
-            current_app.logger.debug(
-                "Skipped duplicate transaction: Date=%s, Amount=%s, Description=%s",
-                tx_date, amount, description
-            )
-            return False
+        dedup_keys = sorted({
+            Transaction.compute_dedup_key(datetime.strptime(tx["tx_date"], "%m/%d/%Y"), tx["amount"], tx["account_id"])
+            for tx in processed_data
+        })
+        family_filter = family_transaction_filter(user)
+        existing_keys = set()
+        for i in range(0, len(dedup_keys), IMPORT_CHUNK_SIZE):
+            rows = db.session.query(
+                Transaction.timestamp,
+                Transaction.amount,
+                Transaction.account_id,
+                Transaction.description
+            ).filter(
+                family_filter,
+                Transaction.dedup_key.in_(dedup_keys[i:i + IMPORT_CHUNK_SIZE])
+            ).all()
+            existing_keys.update(duplicate_key(ts, amount, account_id, description) for ts, amount, account_id, description in rows)
         current_app.logger.debug(
-            "Adding Transaction - Date: %s, Amount: %s, Description: %s, Account ID: %s, Category: %s, Is Transfer: %s",
-            tx_date, amount, description, account_id, category_name, is_transfer,
-        )
-        new_tx = Transaction(
-            amount=amount,
-            description=description,
-            timestamp=tx_date,
-            user_id=current_user.id,
-            category_id=category_obj.id,
-            account_id=account_id,
-            is_transfer=is_transfer,
+            "Resolved %d existing duplicate keys for %d transactions (%d fingerprints)",
+            len(existing_keys), len(processed_data), len(dedup_keys)
         )
-        db.session.add(new_tx)
-        return True
+        return existing_keys
     except Exception as e:
-        current_app.logger.error("Error importing transaction: %s", e)
-        return False
+        current_app.logger.error("Error resolving duplicates for %d transactions: %s", len(processed_data), e)
+        return set()
 
 
 def update_tx_from_form(tx, i, form):
@@ -211,30 +257,100 @@ def update_tx_from_form(tx, i, form):
         tx["force_import"] = form.get(key_force) == "on"
 
 
+def import_rows(rows, current_user):
+    """
+    Insert confirmed rows in bulk, skipping duplicates unless forced. Returns the number imported.
+
+    Duplicates and categories are resolved for the whole chunk up front, and the
+    transactions are written with one executemany INSERT. The caller commits.
+    """
+    existing_keys = find_existing_duplicate_keys(rows, current_user)
+    accepted = []
+    for tx in rows:
+        tx_date = datetime.strptime(tx["tx_date"], "%m/%d/%Y")
+        tx_key = duplicate_key(tx_date, tx["amount"], tx["account_id"], tx["description"])
+        if tx_key in existing_keys and not tx.get("force_import", False):
+            current_app.logger.debug(
+                "Skipped duplicate transaction: Date=%s, Amount=%s, Description=%s",
+                tx_date, tx["amount"], tx["description"]
+            )
+            continue
+        existing_keys.add(tx_key)
+        accepted.append((tx, tx_date, tx["category_field"] or UNCATEGORIZED))
+    if not accepted:
+        return 0
+
+    category_ids = get_or_create_categories({category_name for *_, category_name in accepted}, current_user.family_id)
+    values = [
+        {
+            "amount": tx["amount"],
+            "description": tx["description"],
+            "timestamp": tx_date,
+            "user_id": current_user.id,
+            "family_id": current_user.family_id,
+            "category_id": category_ids[category_name],
+            "account_id": tx["account_id"],
+            "is_transfer": bool(tx.get("is_transfer", False)),
+            "dedup_key": Transaction.compute_dedup_key(tx_date, tx["amount"], tx["account_id"]),
+        }
+        for tx, tx_date, category_name in accepted
+    ]
+    db.session.execute(insert(Transaction), values)
+    add_inserted_transactions(current_user.family_id, values)
+    current_app.logger.debug("Bulk inserted %d of %d confirmed transactions", len(values), len(rows))
+    return len(values)
+
+
 def process_import_all(req, current_user):
-    processed_data = session.get("processed_data")
-    current_app.logger.info("Import All: session processed_data: %s", processed_data)
-    if not processed_data:
+    batch = get_import_batch(session.get("import_batch_id"), current_user.id)
+    if not batch:
         flash("No transactions to import.", "danger")
         return redirect(url_for("transactions.import_transactions"))
 
-    for i, tx in enumerate(processed_data):
-        update_tx_from_form(tx, i, req.form)
-    session.modified = True
+    # The rest of the batch may be large, so it is imported by a job; the batch now belongs to it.
+    session.pop("import_batch_id", None)
+    job_id = enqueue_job("import_all", current_user.id, return_url=url_for("transactions.transactions"),
+                         batch_id=batch.id, form=req.form.to_dict())
+    current_app.logger.info("Import All: enqueued job %s for batch %s", job_id, batch.id)
+    return redirect(url_for("jobs.job_progress", job_id=job_id))
+
+
+@job_handler("import_all")
+def import_all_job(progress, user_id, batch_id, form):
+    """
+    Background job importing every remaining row of an import batch.
+
+    Edits submitted with the page being shown apply to its rows; the rest import as
+    staged. Each chunk is committed with the batch's progress counters.
+    """
+    current_user = db.session.get(User, user_id)
+    batch = get_import_batch(batch_id, user_id)
+    if not batch:
+        return "No transactions to import."
+    current_app.logger.info("Import All: batch %s from row %s of %s", batch.id, batch.current_index, batch.total_rows)
+
+    page = get_staged_rows(batch, batch.current_index, PER_BATCH)
+    for i, tx in enumerate(page):
+        update_tx_from_form(tx, i, form)
+    newly_imported = import_rows(page, current_user)
+    batch.current_index = min(batch.current_index + PER_BATCH, batch.total_rows)
+    batch.total_imported += newly_imported
+    db.session.commit()
+    progress(batch.current_index, batch.total_rows)
 
-    newly_imported = 0
-    for tx in processed_data:
-        if create_transaction_from_tx(tx, current_user):
-            newly_imported += 1
+    while batch.current_index < batch.total_rows:
+        imported_count = import_rows(get_staged_rows(batch, batch.current_index, IMPORT_CHUNK_SIZE), current_user)
+        batch.current_index = min(batch.current_index + IMPORT_CHUNK_SIZE, batch.total_rows)
+        batch.total_imported += imported_count
+        db.session.commit()
+        progress(batch.current_index, batch.total_rows)
+        current_app.logger.info("Import All: batch %s imported %s, at row %s of %s",
+                                batch.id, batch.total_imported, batch.current_index, batch.total_rows)
 
-    session["total_imported"] = session.get("total_imported", 0) + newly_imported
+    total_imported = batch.total_imported
+    discard_import_batches(user_id, batch.id)
     db.session.commit()
-    session.pop("processed_data", None)
-    session.pop("current_index", None)
-
-    flash(f"Total imported: {session['total_imported']} transactions.", "success")
-    session.pop("total_imported", None)
-    return redirect(url_for("transactions.transactions"))
+    return f"Total imported: {total_imported} transactions."
 
 
 def process_file_upload(req, current_user):
@@ -248,112 +364,87 @@ def process_file_upload(req, current_user):
     if not acc_type_obj:
         return redirect(url_for("transactions.import_transactions"))
 
+    batch = create_import_batch(current_user.id)
     global_seen = set()
-    all_processed_data = []
     for file in files:
         if not validate_csv(file):
             flash(f"File {file.filename} is not a valid CSV file.", "danger")
             continue
         file.stream.seek(0)
-        transactions_data = parse_csv(file, acc_type_obj)
-        processed_data = apply_import_rules(transactions_data, acc_type_obj)
-
-        for tx in processed_data:
-            tx_key = tx["tx_key"]
-            tx_date_obj = datetime.strptime(tx["tx_date"], "%m/%d/%Y")
-            duplicate_global = tx_key in global_seen
-            duplicate_db = check_duplicate(tx_date_obj, tx["amount"], tx["account_id"], tx["description"])
-
-            if duplicate_global or duplicate_db:
-                tx["is_duplicate"] = True
-                tx["force_import"] = False
-            elif tx["is_duplicate"]:
-                tx["force_import"] = True
-            else:
-                tx["force_import"] = False
-
-        global_seen.update(tx["tx_key"] for tx in processed_data)
-        all_processed_data.extend(processed_data)
-
-    if not all_processed_data:
+        processed_rows = apply_import_rules(parse_csv(file, acc_type_obj), acc_type_obj)
+        file_keys = set()
+        for processed_data in iter_chunks(processed_rows, IMPORT_CHUNK_SIZE):
+            existing_keys = find_existing_duplicate_keys(processed_data)
+            mark_duplicates(processed_data, existing_keys, global_seen)
+            file_keys.update(tx["tx_key"] for tx in processed_data)
+            stage_rows(batch, processed_data)
+        global_seen.update(file_keys)
+
+    if not batch.total_rows:
+        discard_import_batches(current_user.id, batch.id)
+        db.session.commit()
         flash("No valid transactions found in the uploaded files.", "danger")
         return redirect(url_for("transactions.import_transactions"))
 
-    return prepare_import_preview(all_processed_data, current_user)
+    db.session.commit()
+    return prepare_import_preview(batch, current_user)
 
 
 def process_batch_confirmation(req, current_user):
-    processed_data = session.get("processed_data")
-    current_app.logger.info("Batch confirmation: session processed_data: %s", processed_data)
-    if not processed_data:
+    batch = get_import_batch(session.get("import_batch_id"), current_user.id)
+    if not batch:
         flash("No transactions to import. Please start the import process again.", "danger")
         return redirect(url_for("transactions.import_transactions"))
+    current_app.logger.info("Batch confirmation: batch %s from row %s of %s", batch.id, batch.current_index, batch.total_rows)
 
-    current_index = session.get("current_index", 0)
-    batch_end = min(current_index + PER_BATCH, len(processed_data))
-    for rel_idx, abs_idx in enumerate(range(current_index, batch_end)):
-        update_tx_from_form(processed_data[abs_idx], rel_idx, req.form)
-    session.modified = True
-
-    imported_count = 0
-    for i in range(current_index, batch_end):
-        if create_transaction_from_tx(processed_data[i], current_user):
-            imported_count += 1
+    page = get_staged_rows(batch, batch.current_index, PER_BATCH)
+    for i, tx in enumerate(page):
+        update_tx_from_form(tx, i, req.form)
+    imported_count = import_rows(page, current_user)
 
-    session["current_index"] += PER_BATCH
-    session["total_imported"] += imported_count
-    session.modified = True
+    batch.current_index += PER_BATCH
+    batch.total_imported += imported_count
 
-    if session["current_index"] < len(processed_data):
+    if batch.current_index < batch.total_rows:
         db.session.commit()
-        batch_data = processed_data[session["current_index"]:session["current_index"] + PER_BATCH]
-        categories = Category.query.filter_by(family_id=current_user.family_id).all()
-        total_duplicates = sum(1 for tx in processed_data if tx["is_duplicate"])
-
-        return render_template(
-            "transactions/import_preview.html",
-            transactions_data=batch_data,
-            categories=categories,
-            total_transactions=len(processed_data),
-            total_imported=session["total_imported"],
-            current_batch=(session["current_index"] // PER_BATCH) + 1,
-            total_batches=(len(processed_data) + PER_BATCH - 1) // PER_BATCH,
-            total_duplicates=total_duplicates
-        )
+        return render_import_preview(batch, current_user)
     else:
-        total_imported = session.pop("total_imported", 0)
-        session.pop("processed_data", None)
-        session.pop("current_index", None)
+        total_imported = batch.total_imported
+        discard_import_batches(current_user.id, batch.id)
+        session.pop("import_batch_id", None)
         db.session.commit()
         flash(f"Total imported: {total_imported} transactions.", "success")
         return redirect(url_for("transactions.transactions"))
 
 
 def render_import_page_service(current_user):
-    account_types = AccountType.query.filter_by(family_id=current_user.family_id).all()
+    account_types = get_family_account_types(current_user.family_id)
     return render_template("transactions/import_transactions.html", accounts=account_types)
 
 
-def prepare_import_preview(all_processed_data, current_user):
+def render_import_preview(batch, current_user):
+    """
+    Render the preview page for the batch's next unconfirmed rows.
+    """
+    batch_data = get_staged_rows(batch, batch.current_index, PER_BATCH)
+    categories = get_family_categories(current_user.family_id)
+    return render_template(
+        "transactions/import_preview.html",
+        transactions_data=batch_data,
+        categories=categories,
+        total_transactions=batch.total_rows,
+        total_imported=batch.total_imported,
+        current_batch=(batch.current_index // PER_BATCH) + 1,
+        total_batches=(batch.total_rows + PER_BATCH - 1) // PER_BATCH,
+        total_duplicates=batch.total_duplicates
+    )
+
+
+def prepare_import_preview(batch, current_user):
     try:
-        session["processed_data"] = all_processed_data
-        session["current_index"] = 0
-        session["total_imported"] = 0
-        session.modified = True
-
-        batch_data = all_processed_data[:PER_BATCH]
-        categories = Category.query.filter_by(family_id=current_user.family_id).all()
-        total_duplicates = sum(1 for tx in all_processed_data if tx["is_duplicate"])
-        return render_template(
-            "transactions/import_preview.html",
-            transactions_data=batch_data,
-            categories=categories,
-            total_transactions=len(all_processed_data),
-            current_batch=1,
-            total_batches=(len(all_processed_data) + PER_BATCH - 1) // PER_BATCH,
-            total_imported=0,
-            total_duplicates=total_duplicates
-        )
+        # Only the batch id lives in the session; rows are read a page at a time.
+        session["import_batch_id"] = batch.id
+        return render_import_preview(batch, current_user)
     except Exception as e:
         current_app.logger.error("Error during session setup or rendering: %s", e)
         flash("An error occurred while preparing the import preview. Please try again.", "danger")
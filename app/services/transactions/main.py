@@ -1,13 +1,19 @@
+from collections import namedtuple
 from flask import current_app, request
 from flask_login import current_user
-from sqlalchemy import func, case, and_
+from sqlalchemy import func, case
 from datetime import datetime
 from calendar import monthrange
 from app import db
 from app.models.transaction import Transaction
-from app.models.category import Category
-from app.models.account_type import AccountType
-from app.services.transactions.utilities import get_family_user_ids
+from app.services.cache import cached_family_value
+from app.services.family import family_transaction_filter
+from app.services.reference_data import get_family_account_types, get_family_category_names
+from app.services.transactions.pagination import keyset_paginate
+from app.services.transactions.utilities import list_view_options
+
+
+TransactionSummary = namedtuple("TransactionSummary", ["total_count", "total_income", "total_expense"])
 
 
 def apply_time_filter(query, time_filter):
@@ -59,6 +65,21 @@ def calculate_summary(query):
         return None
 
 
+def get_transaction_summary(query, filters):
+    """
+    Return the count, income and expense of the filtered transactions from one aggregate.
+
+    The result feeds both the summary card and the pagination total, and is cached per
+    family and filter set until the family's next transaction write.
+    """
+    def load():
+        summary = calculate_summary(query)
+        return list(summary) if summary is not None else None
+
+    values = cached_family_value(current_user.family_id, "transaction_summary", filters, load)
+    return TransactionSummary(*values) if values is not None else None
+
+
 def apply_filters(query, category_id, category_ids, account_id):
     try:
         current_app.logger.debug("Applying filters with category_id: %s, category_ids: %s, account_id: %s",
@@ -74,32 +95,33 @@ def apply_filters(query, category_id, category_ids, account_id):
     return query
 
 
-def handle_duplicates(query, family_user_ids, category_id, category_ids, account_id):
-    from app.models.transaction import Transaction  # local import
+def handle_duplicates(query, family_filter, category_id, category_ids, account_id):
+    """
+    Find transactions sharing a dedup_key (same day, rounded amount and account) and group them.
+
+    The keys that occur more than once come from a GROUP BY served by the
+    (family_id, dedup_key) index alone; only the transactions in those groups are loaded.
+    """
     try:
-        current_app.logger.debug("Handling duplicates with family_user_ids: %s, category_id: %s, category_ids: %s, account_id: %s",
-                                 family_user_ids, category_id, category_ids, account_id)
-        subq = db.session.query(
-            func.date(Transaction.timestamp).label('dup_date'),
-            Transaction.amount.label('dup_amount')
-        ).filter(Transaction.user_id.in_(family_user_ids)).group_by(
-            func.date(Transaction.timestamp),
-            Transaction.amount
-        ).having(func.count(Transaction.id) > 1).subquery()
-
-        duplicate_transactions_query = Transaction.query.join(
-            subq,
-            and_(
-                func.date(Transaction.timestamp) == subq.c.dup_date,
-                Transaction.amount == subq.c.dup_amount
-            )
-        ).filter(Transaction.user_id.in_(family_user_ids))
+        current_app.logger.debug("Handling duplicates with family_filter: %s, category_id: %s, category_ids: %s, account_id: %s",
+                                 family_filter, category_id, category_ids, account_id)
+        duplicate_keys = db.session.query(Transaction.dedup_key).filter(
+            family_filter,
+            Transaction.dedup_key.isnot(None)
+        ).group_by(Transaction.dedup_key).having(func.count() > 1)
+
+        duplicate_transactions_query = Transaction.query.filter(
+            family_filter,
+            Transaction.dedup_key.in_(duplicate_keys.scalar_subquery())
+        )
         duplicate_transactions_query = apply_filters(duplicate_transactions_query, category_id, category_ids, account_id)
-        duplicate_transactions = duplicate_transactions_query.all()
+        duplicate_transactions = duplicate_transactions_query.options(*list_view_options()).order_by(
+            Transaction.timestamp.desc(), Transaction.id
+        ).all()
         current_app.logger.debug("Found %d duplicate transactions", len(duplicate_transactions))
         grouped_duplicates = {}
         for tx in duplicate_transactions:
-            key = (tx.timestamp.strftime('%Y-%m-%d'), tx.amount)
+            key = (tx.timestamp.strftime('%Y-%m-%d'), round(tx.amount, 2), tx.account_id)
             grouped_duplicates.setdefault(key, []).append(tx)
         summary = calculate_summary(duplicate_transactions_query)
         current_app.logger.debug("Calculated duplicate transactions summary: %s", summary)
@@ -109,33 +131,33 @@ def handle_duplicates(query, family_user_ids, category_id, category_ids, account
         return {}, None
 
 
-def process_transactions_view(filter_type, time_filter, category_id, category_ids, account_id, page, per_page):
-    current_app.logger.debug("Processing transactions view with filter_type: %s, time_filter: %s, category_id: %s, category_ids: %s, account_id: %s, page: %s, per_page: %s",
-                             filter_type, time_filter, category_id, category_ids, account_id, page, per_page)
-    family_user_ids = get_family_user_ids()
+def process_transactions_view(filter_type, time_filter, category_id, category_ids, account_id, per_page, after=None, before=None, page=None):
+    current_app.logger.debug("Processing transactions view with filter_type: %s, time_filter: %s, category_id: %s, category_ids: %s, account_id: %s, per_page: %s, after: %s, before: %s, page: %s",
+                             filter_type, time_filter, category_id, category_ids, account_id, per_page, after, before, page)
+    family_filter = family_transaction_filter()
     if filter_type == "transfers":
         current_app.logger.debug("Filtering for transfers")
         query = Transaction.query.filter(
-            Transaction.user_id.in_(family_user_ids),
+            family_filter,
             Transaction.is_transfer.is_(True)
         )
         date_range_display = "Transfer Transactions"
     else:
         query = Transaction.query.filter(
-            Transaction.user_id.in_(family_user_ids),
+            family_filter,
             Transaction.is_transfer.is_(False)
         )
     query = apply_filters(query, category_id, category_ids, account_id)
     if filter_type == "duplicates":
         current_app.logger.debug("Processing duplicates view")
-        grouped_duplicates, summary = handle_duplicates(query, family_user_ids, category_id, category_ids, account_id)
-        account_types = AccountType.query.filter_by(family_id=current_user.family_id).all()
+        grouped_duplicates, summary = handle_duplicates(query, family_filter, category_id, category_ids, account_id)
+        account_types = get_family_account_types(current_user.family_id)
         current_app.logger.debug("Returning duplicates view with %d duplicate groups", len(grouped_duplicates))
         return {
             "grouped_duplicates": grouped_duplicates,
             "account_types": account_types,
             "selected_account": account_id,
-            "categories": Category.query.all(),
+            "categories": get_family_category_names(current_user.family_id),
             "selected_category": category_id,
             "filter_type": filter_type,
             "time_filter": time_filter,
@@ -151,17 +173,25 @@ def process_transactions_view(filter_type, time_filter, category_id, category_id
             current_app.logger.debug("Filtering expense transactions")
             query = query.filter(Transaction.amount < 0)
         query, date_range_display = apply_time_filter(query, time_filter)
-        query = query.order_by(Transaction.timestamp.desc())
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        # The displayed range pins down relative time filters such as "month" or "ytd".
+        summary = get_transaction_summary(query, {
+            "filter_type": filter_type,
+            "date_range": date_range_display,
+            "category_id": category_id,
+            "category_ids": category_ids,
+            "account_id": account_id,
+        })
+        # The summary already counts the matching rows, so the pages need no COUNT of their own.
+        pagination = keyset_paginate(query.options(*list_view_options()), per_page, after=after, before=before, page=page,
+                                     total=summary.total_count if summary else None)
         user_transactions = pagination.items
-        summary = calculate_summary(query)
-        account_types = AccountType.query.filter_by(family_id=current_user.family_id).all()
+        account_types = get_family_account_types(current_user.family_id)
         current_app.logger.debug("Processed transactions view: %d transactions, date_range_display: %s", len(user_transactions), date_range_display)
         return {
             "transactions": user_transactions,
             "account_types": account_types,
             "selected_account": account_id,
-            "categories": Category.query.all(),
+            "categories": get_family_category_names(current_user.family_id),
             "selected_category": category_id,
             "filter_type": filter_type,
             "time_filter": time_filter,
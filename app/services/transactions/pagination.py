@@ -0,0 +1,139 @@
+import base64
+import binascii
+from datetime import datetime
+from flask import current_app
+from flask_login import current_user
+from sqlalchemy import or_
+from app.models.transaction import Transaction
+from app.services.cache import cached_family_value
+
+# The first pages can be opened by number with a cheap shallow OFFSET; deeper pages
+# are only reached through the Previous/Next cursors.
+NUMBERED_PAGES = 5
+
+
+class KeysetPagination:
+    """
+    One page of transactions ordered newest first, navigated with (timestamp, id) cursors.
+
+    Attributes:
+        items (list): The transactions on this page.
+        per_page (int): Page size.
+        has_prev (bool): Whether newer transactions exist before this page.
+        has_next (bool): Whether older transactions exist after this page.
+        prev_cursor (str): Cursor to pass as ``before`` for the previous page.
+        next_cursor (str): Cursor to pass as ``after`` for the next page.
+        total (int): Number of matching transactions, or None when not counted.
+        page (int): Number of this page, or None when it is not known.
+        pages (int): Number of pages, or None when the total is not known.
+        prev_num (int): Number of the previous page, or None.
+        next_num (int): Number of the next page, or None.
+    """
+
+    def __init__(self, items, per_page, has_prev, has_next, total=None, page=None):
+        self.items = items
+        self.per_page = per_page
+        self.has_prev = has_prev and bool(items)
+        self.has_next = has_next and bool(items)
+        self.prev_cursor = encode_cursor(items[0]) if self.has_prev else None
+        self.next_cursor = encode_cursor(items[-1]) if self.has_next else None
+        self.total = total
+        self.page = 1 if not self.has_prev else page
+        self.pages = -(-total // per_page) if total is not None else None
+        self.prev_num = self.page - 1 if self.page and self.has_prev else None
+        self.next_num = self.page + 1 if self.page and self.has_next else None
+
+    def iter_pages(self):
+        """
+        Yield the page numbers to link directly: the first NUMBERED_PAGES pages, then None
+        for a gap and the current page when it lies beyond them.
+        """
+        last = min(NUMBERED_PAGES, self.pages) if self.pages is not None else min(NUMBERED_PAGES, self.page or 1)
+        yield from range(1, last + 1)
+        if self.page and self.page > last:
+            if self.page > last + 1:
+                yield None
+            yield self.page
+        elif self.has_next and (self.pages is None or self.pages > last):
+            yield None
+
+
+def encode_cursor(transaction):
+    """
+    Return an opaque URL-safe cursor for the transaction's position in the list.
+    """
+    raw = f"{transaction.timestamp.isoformat()}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Return the (timestamp, id) position encoded in a cursor, or None when it is missing or malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, transaction_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(transaction_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        current_app.logger.warning("Ignoring invalid pagination cursor %r: %s", cursor, e)
+        return None
+
+
+def keyset_paginate(query, per_page, after=None, before=None, total=None, page=None):
+    """
+    Return the page of ``query`` that follows ``after`` or precedes ``before``.
+
+    Rows are ordered by (timestamp, id) descending and the cursor becomes a range condition
+    on that key, so every page is an index range scan of ``per_page + 1`` rows no matter
+    how deep it is. Without a cursor, ``page`` opens one of the first NUMBERED_PAGES pages
+    by OFFSET; otherwise the newest page is returned.
+
+    Args:
+        query: Unordered Transaction query with all filters applied.
+        per_page (int): Page size.
+        after (str): Cursor of the last row of the previous page.
+        before (str): Cursor of the first row of the next page.
+        total (int): Optional number of matching rows, shown as the page count.
+        page (int): Page number; with a cursor it only labels the page.
+
+    Returns:
+        KeysetPagination: The page and its navigation cursors.
+    """
+    before_key = decode_cursor(before)
+    if before_key is not None:
+        timestamp, transaction_id = before_key
+        rows = query.filter(
+            Transaction.timestamp >= timestamp,
+            or_(Transaction.timestamp > timestamp, Transaction.id > transaction_id)
+        ).order_by(Transaction.timestamp.asc(), Transaction.id.asc()).limit(per_page + 1).all()
+        if rows:
+            return KeysetPagination(list(reversed(rows[:per_page])), per_page, len(rows) > per_page, True, total, page)
+        current_app.logger.debug("No rows before cursor %s; showing the newest page", before)
+
+    after_key = decode_cursor(after) if before_key is None else None
+    ordered = query.order_by(Transaction.timestamp.desc(), Transaction.id.desc())
+    if after_key is not None:
+        timestamp, transaction_id = after_key
+        rows = ordered.filter(
+            Transaction.timestamp <= timestamp,
+            or_(Transaction.timestamp < timestamp, Transaction.id < transaction_id)
+        ).limit(per_page + 1).all()
+        return KeysetPagination(rows[:per_page], per_page, True, len(rows) > per_page, total, page)
+
+    if before_key is None and page and 1 < page <= NUMBERED_PAGES:
+        rows = ordered.offset((page - 1) * per_page).limit(per_page + 1).all()
+        if rows:
+            return KeysetPagination(rows[:per_page], per_page, True, len(rows) > per_page, total, page)
+        current_app.logger.debug("Page %s is past the last row; showing the newest page", page)
+    rows = ordered.limit(per_page + 1).all()
+    return KeysetPagination(rows[:per_page], per_page, False, len(rows) > per_page, total, 1)
+
+
+def cached_count(query, filters):
+    """
+    Return the number of rows matching ``query``, cached per family and filter set until
+    the family's next transaction write.
+    """
+    return cached_family_value(current_user.family_id, "transaction_count", filters, query.count)
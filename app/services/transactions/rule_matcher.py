@@ -0,0 +1,149 @@
+from collections import deque
+from bisect import bisect_right
+
+
+class PatternAutomaton:
+    """
+    Aho-Corasick automaton reporting every pattern contained in a text.
+
+    Attributes:
+        goto (list[dict]): Trie transitions per state.
+        fail (list[int]): Failure link per state.
+        output (list[tuple]): Pattern ids ending at each state (failure outputs merged in).
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        self.always = ()
+
+        always = []
+        for pattern_id, pattern in enumerate(patterns):
+            if not pattern:
+                # An empty pattern is contained in every string.
+                always.append(pattern_id)
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                state = next_state
+            self.output[state] += (pattern_id,)
+        self.always = tuple(always)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] += self.output[self.fail[next_state]]
+
+    def search(self, text):
+        """
+        Return the set of pattern ids found anywhere in ``text``.
+        """
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set(self.always)
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class CompiledImportRules:
+    """
+    Import rules compiled once so each row is scanned in a single pass per field.
+
+    Evaluation matches the original sequential loop: rules apply in order, the
+    last matching rule with an override category wins, any matching transfer
+    rule marks the row as a transfer, and category rules are tested against the
+    category as overridden by earlier rules.
+    """
+
+    def __init__(self, rules):
+        self.rules = [
+            (rule.is_transfer, rule.override_category_display if rule.override_category_id else None)
+            for rule in rules
+        ]
+        description_patterns, self._description_rules = {}, []
+        category_patterns, self._category_rules = {}, []
+        for index, rule in enumerate(rules):
+            if rule.field_to_match.lower() == "description":
+                self._add_pattern(description_patterns, self._description_rules, rule.match_pattern, index)
+            else:
+                self._add_pattern(category_patterns, self._category_rules, rule.match_pattern, index)
+        self._description_automaton = PatternAutomaton(list(description_patterns))
+        self._category_automaton = PatternAutomaton(list(category_patterns))
+        self._category_cache = {}
+
+    @staticmethod
+    def _add_pattern(pattern_ids, pattern_rules, pattern, index):
+        # Rules sharing a pattern share one automaton entry.
+        pattern_id = pattern_ids.get(pattern)
+        if pattern_id is None:
+            pattern_ids[pattern] = len(pattern_rules)
+            pattern_rules.append([index])
+        else:
+            pattern_rules[pattern_id].append(index)
+
+    def __len__(self):
+        return len(self.rules)
+
+    @staticmethod
+    def _matching_rules(automaton, pattern_rules, text):
+        indexes = []
+        for pattern_id in automaton.search(text):
+            indexes.extend(pattern_rules[pattern_id])
+        return sorted(indexes)
+
+    def _category_matches(self, category_name):
+        matches = self._category_cache.get(category_name)
+        if matches is None:
+            matches = self._matching_rules(self._category_automaton, self._category_rules, category_name)
+            self._category_cache[category_name] = matches
+        return matches
+
+    @staticmethod
+    def _next_match(matches, position):
+        index = bisect_right(matches, position)
+        return matches[index] if index < len(matches) else None
+
+    def apply(self, description, category_name):
+        """
+        Return ``(is_transfer, category_name)`` after applying the rules to one row.
+        """
+        is_transfer = False
+        description_matches = self._matching_rules(self._description_automaton, self._description_rules, description)
+        category_matches = self._category_matches(category_name)
+        position = -1
+        while True:
+            candidates = [
+                index for index in (
+                    self._next_match(description_matches, position),
+                    self._next_match(category_matches, position),
+                ) if index is not None
+            ]
+            if not candidates:
+                return is_transfer, category_name
+            position = min(candidates)
+            rule_is_transfer, override_name = self.rules[position]
+            if rule_is_transfer:
+                is_transfer = True
+            if override_name is not None and override_name != category_name:
+                # Later category rules see the overridden name, as in the sequential loop.
+                category_name = override_name
+                category_matches = self._category_matches(category_name)
@@ -1,28 +1,37 @@
-from flask import current_app, flash
+from flask import current_app, flash, g, has_request_context
 from flask_login import current_user
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload, load_only
 from datetime import datetime
-from app.models.user import User
+from app.models.account_type import AccountType
 from app.models.category import Category
+from app.models.transaction import Transaction
+from app.services.cache import REFERENCE, mark_families_changed
 from app import db
 
 
-def get_family_user_ids():
+def _category_id_map(family_id):
     """
-    Retrieve IDs of all users in the current user's family.
+    Return the name -> ID map of categories already resolved for a family during this request.
     """
-    current_app.logger.debug("Getting family user IDs for current_user id=%s, family_id=%s", current_user.id, getattr(current_user, "family_id", None))
-    try:
-        if current_user.family_id:
-            family_users = User.query.filter_by(family_id=current_user.family_id).all()
-            ids = [user.id for user in family_users]
-            current_app.logger.debug("Found family user IDs: %s", ids)
-            return ids
-        current_app.logger.debug("No family_id found for current_user, returning own id: %s", current_user.id)
-        return [current_user.id]
-    except SQLAlchemyError as e:
-        current_app.logger.error("Error fetching family user IDs: %s", e)
-        return [current_user.id]
+    return g.setdefault("category_ids", {}).setdefault(family_id, {})
+
+
+def list_view_options():
+    """
+    Return the loader options for pages that list transactions.
+
+    Only the columns the list templates show (plus the category and account keys) are
+    loaded, and the category and account names are joined into the same query, so
+    rendering a page adds no per-row queries.
+    Apply them to the query that loads the rows, not to aggregates built from it.
+    """
+    return (
+        load_only(Transaction.id, Transaction.timestamp, Transaction.description, Transaction.amount,
+                  Transaction.category_id, Transaction.account_id),
+        joinedload(Transaction.category).load_only(Category.name),
+        joinedload(Transaction.account).load_only(AccountType.name),
+    )
 
 
 def create_or_get_category(category_name):
@@ -31,6 +40,11 @@ def create_or_get_category(category_name):
     """
     current_app.logger.debug("Creating or getting category '%s' for family_id=%s", category_name, getattr(current_user, "family_id", None))
     try:
+        category_ids = _category_id_map(current_user.family_id)
+        if category_name in category_ids:
+            category_obj = db.session.get(Category, category_ids[category_name])
+            if category_obj is not None:
+                return category_obj
         category_obj = Category.query.filter_by(name=category_name, family_id=current_user.family_id).first()
         if not category_obj:
             current_app.logger.debug("Category '%s' not found; creating new category.", category_name)
@@ -40,6 +54,7 @@ def create_or_get_category(category_name):
             current_app.logger.info("Created new category '%s' for family_id=%s", category_name, current_user.family_id)
         else:
             current_app.logger.debug("Found existing category '%s'", category_name)
+        category_ids[category_name] = category_obj.id
         return category_obj
     except Exception as e:
         db.session.rollback()
@@ -48,6 +63,47 @@ def create_or_get_category(category_name):
         return None
 
 
+def get_or_create_categories(category_names, family_id):
+    """
+    Resolve a set of category names for a family to their IDs, creating missing ones.
+
+    Names already resolved during this request come from an in-request map; the rest are
+    loaded with one IN query and missing ones are inserted with a single multi-row INSERT.
+    The caller commits. Returns a dict mapping each name to its ID.
+    """
+    names = {name for name in category_names if name}
+    if not names:
+        return {}
+    known = _category_id_map(family_id)
+
+    def load(requested):
+        rows = db.session.query(Category.name, Category.id).filter(
+            Category.family_id == family_id,
+            Category.name.in_(requested)
+        ).all()
+        # Case-insensitive collations (MySQL) may return a differently cased stored name.
+        stored = {name: category_id for name, category_id in rows}
+        folded = {name.casefold(): category_id for name, category_id in rows}
+        return {name: stored.get(name, folded.get(name.casefold())) for name in requested if name in stored or name.casefold() in folded}
+
+    category_ids = {name: known[name] for name in names if name in known}
+    unresolved = names - category_ids.keys()
+    if unresolved:
+        category_ids.update(load(unresolved))
+    missing = names - category_ids.keys()
+    if missing:
+        # Names differing only in case become one category, as a case-insensitive unique key requires.
+        new_names = {name.casefold(): name for name in sorted(missing, reverse=True)}
+        db.session.execute(insert(Category), [{"name": name, "family_id": family_id} for name in sorted(new_names.values())])
+        category_ids.update(load(missing))
+        # The bulk insert bypasses the ORM, so the new categories are not seen by flush listeners.
+        mark_families_changed(db.session, [family_id], kind=REFERENCE)
+        current_app.logger.info("Created %d new categories for family_id=%s", len(new_names), family_id)
+    known.update(category_ids)
+    current_app.logger.debug("Resolved %d category names for family_id=%s", len(category_ids), family_id)
+    return category_ids
+
+
 def apply_date_filter(query, date_str, date_type):
     """
     Apply a date filter to the query based on a date string.
@@ -55,7 +111,6 @@ def apply_date_filter(query, date_str, date_type):
     current_app.logger.debug("Applying %s date filter with date string: %s", date_type, date_str)
     try:
         date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-        from app.models.transaction import Transaction
         if date_type == "start":
             query = query.filter(Transaction.timestamp >= date_obj)
             current_app.logger.debug("Applied start date filter: %s", date_obj)
@@ -64,5 +119,6 @@ def apply_date_filter(query, date_str, date_type):
             current_app.logger.debug("Applied end date filter: %s", date_obj)
     except ValueError:
         current_app.logger.error("Invalid %s date format: %s", date_type, date_str)
-        flash(f"Invalid {date_type} date format.", "danger")
+        if has_request_context():
+            flash(f"Invalid {date_type} date format.", "danger")
     return query
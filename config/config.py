@@ -6,11 +6,14 @@ class BaseConfig:
     SECRET_KEY = os.environ.get("SECRET_KEY", "default_secret_key")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     VERSION = "1.0.4"
+    # Run background jobs in the web process instead of queueing them for `flask run-jobs`
+    JOBS_RUN_INLINE = os.environ.get("JOBS_RUN_INLINE", "false").lower() == "true"
 
 
 class DevelopmentConfig(BaseConfig):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///finance_tracker_dev.db"
+    JOBS_RUN_INLINE = True
 
 
 class ProductionConfig(BaseConfig):
@@ -60,3 +63,4 @@ class TestingConfig(BaseConfig):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     WTF_CSRF_ENABLED = False
+    JOBS_RUN_INLINE = True
@@ -0,0 +1,77 @@
+"""add monthly_category_rollup
+
+Revision ID: 3f9a7c2b5d1e
+Revises: 8c1d2e4f6a7b
+Create Date: 2026-10-18 11:03:27.540912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a7c2b5d1e'
+down_revision = '8c1d2e4f6a7b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    rollup = op.create_table('monthly_category_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('family_id', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('is_transfer', sa.Boolean(), nullable=False),
+    sa.Column('income', sa.Float(), nullable=False),
+    sa.Column('expense', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account_types.id'], ),
+    sa.ForeignKeyConstraint(['category_id'], ['category.id'], ),
+    sa.ForeignKeyConstraint(['family_id'], ['family.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('family_id', 'account_id', 'category_id', 'year', 'month', 'is_transfer', name='_rollup_bucket_uc')
+    )
+    with op.batch_alter_table('monthly_category_rollup', schema=None) as batch_op:
+        batch_op.create_index('ix_rollup_family_transfer_period', ['family_id', 'is_transfer', 'year', 'month'], unique=False)
+
+    # Backfill the rollup from the existing transaction history.
+    transaction = sa.table('transaction',
+        sa.column('id', sa.Integer), sa.column('amount', sa.Float), sa.column('timestamp', sa.DateTime),
+        sa.column('user_id', sa.Integer), sa.column('category_id', sa.Integer), sa.column('account_id', sa.Integer),
+        sa.column('is_transfer', sa.Boolean))
+    user = sa.table('user', sa.column('id', sa.Integer), sa.column('family_id', sa.Integer))
+    year = sa.extract('year', transaction.c.timestamp)
+    month = sa.extract('month', transaction.c.timestamp)
+    is_transfer = sa.func.coalesce(transaction.c.is_transfer, False)
+    buckets = sa.select(
+        user.c.family_id,
+        transaction.c.account_id,
+        transaction.c.category_id,
+        year,
+        month,
+        is_transfer,
+        sa.func.sum(sa.case((transaction.c.amount > 0, transaction.c.amount), else_=0)),
+        sa.func.sum(sa.case((transaction.c.amount < 0, transaction.c.amount), else_=0)),
+        sa.func.count(transaction.c.id),
+    ).select_from(
+        transaction.join(user, user.c.id == transaction.c.user_id)
+    ).where(
+        user.c.family_id.isnot(None),
+        transaction.c.timestamp.isnot(None)
+    ).group_by(
+        user.c.family_id, transaction.c.account_id, transaction.c.category_id, year, month, is_transfer
+    )
+    op.execute(rollup.insert().from_select(
+        ['family_id', 'account_id', 'category_id', 'year', 'month', 'is_transfer', 'income', 'expense', 'count'],
+        buckets
+    ))
+
+
+def downgrade():
+    with op.batch_alter_table('monthly_category_rollup', schema=None) as batch_op:
+        batch_op.drop_index('ix_rollup_family_transfer_period')
+
+    op.drop_table('monthly_category_rollup')
@@ -0,0 +1,59 @@
+"""add import_batch and import_staged_row
+
+Revision ID: 5b2e9d7c4a10
+Revises: 3f9a7c2b5d1e
+Create Date: 2026-10-18 14:22:41.108273
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2e9d7c4a10'
+down_revision = '3f9a7c2b5d1e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('import_batch',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('total_rows', sa.Integer(), nullable=False),
+    sa.Column('total_duplicates', sa.Integer(), nullable=False),
+    sa.Column('current_index', sa.Integer(), nullable=False),
+    sa.Column('total_imported', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('import_batch', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_import_batch_user_id'), ['user_id'], unique=False)
+
+    op.create_table('import_staged_row',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('batch_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('tx_date', sa.Date(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('category_field', sa.String(length=100), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('account_name', sa.String(length=64), nullable=True),
+    sa.Column('is_duplicate', sa.Boolean(), nullable=False),
+    sa.Column('force_import', sa.Boolean(), nullable=False),
+    sa.Column('is_transfer', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account_types.id'], ),
+    sa.ForeignKeyConstraint(['batch_id'], ['import_batch.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('batch_id', 'position', name='_staged_row_position_uc')
+    )
+
+
+def downgrade():
+    op.drop_table('import_staged_row')
+    with op.batch_alter_table('import_batch', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_import_batch_user_id'))
+
+    op.drop_table('import_batch')
@@ -0,0 +1,29 @@
+"""add composite indexes on transaction
+
+Revision ID: 8c1d2e4f6a7b
+Revises: 615f3ee0a9d2
+Create Date: 2026-10-18 09:12:41.318207
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1d2e4f6a7b'
+down_revision = '615f3ee0a9d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_user_transfer_timestamp', ['user_id', 'is_transfer', 'timestamp'], unique=False)
+        batch_op.create_index('ix_transaction_user_category_timestamp', ['user_id', 'category_id', 'timestamp'], unique=False)
+        batch_op.create_index('ix_transaction_account_timestamp', ['account_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_account_timestamp')
+        batch_op.drop_index('ix_transaction_user_category_timestamp')
+        batch_op.drop_index('ix_transaction_user_transfer_timestamp')
@@ -0,0 +1,45 @@
+"""add family_id to transaction
+
+Revision ID: 9d4f1a6b2c83
+Revises: 5b2e9d7c4a10
+Create Date: 2026-10-18 16:21:05.482913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f1a6b2c83'
+down_revision = '5b2e9d7c4a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('family_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_transaction_family_id', 'family', ['family_id'], ['id'])
+
+    # Backfill from the owning user's family.
+    transaction = sa.table('transaction', sa.column('user_id', sa.Integer), sa.column('family_id', sa.Integer))
+    user = sa.table('user', sa.column('id', sa.Integer), sa.column('family_id', sa.Integer))
+    op.execute(transaction.update().values(
+        family_id=sa.select(user.c.family_id).where(user.c.id == transaction.c.user_id).scalar_subquery()
+    ))
+
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_family_transfer_timestamp', ['family_id', 'is_transfer', 'timestamp'], unique=False)
+        batch_op.create_index('ix_transaction_family_category_timestamp', ['family_id', 'category_id', 'timestamp'], unique=False)
+        batch_op.create_index('ix_transaction_family_timestamp', ['family_id', 'timestamp'], unique=False)
+        batch_op.drop_index('ix_transaction_user_category_timestamp')
+
+
+def downgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_user_category_timestamp', ['user_id', 'category_id', 'timestamp'], unique=False)
+        batch_op.drop_index('ix_transaction_family_timestamp')
+        batch_op.drop_index('ix_transaction_family_category_timestamp')
+        batch_op.drop_index('ix_transaction_family_transfer_timestamp')
+        batch_op.drop_constraint('fk_transaction_family_id', type_='foreignkey')
+        batch_op.drop_column('family_id')
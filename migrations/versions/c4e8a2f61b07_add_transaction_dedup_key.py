@@ -0,0 +1,72 @@
+"""add dedup_key to transaction
+
+Revision ID: c4e8a2f61b07
+Revises: 9d4f1a6b2c83
+Create Date: 2026-10-18 18:02:41.190274
+
+"""
+import datetime
+import hashlib
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a2f61b07'
+down_revision = '9d4f1a6b2c83'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK_SIZE = 5000
+
+
+def dedup_key(timestamp, amount, account_id):
+    # Frozen copy of Transaction.compute_dedup_key at the time of this migration.
+    if timestamp is None or amount is None:
+        return None
+    if isinstance(timestamp, str):
+        timestamp = datetime.datetime.fromisoformat(timestamp)
+    day = timestamp.date() if isinstance(timestamp, datetime.datetime) else timestamp
+    cents = round(float(amount), 2) + 0.0
+    raw = f"{day.isoformat()}|{cents:.2f}|{account_id}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def upgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('dedup_key', sa.String(length=16), nullable=True))
+
+    # The key is a hash, so it is backfilled in Python, one chunk of ids at a time.
+    transaction = sa.table(
+        'transaction',
+        sa.column('id', sa.Integer),
+        sa.column('timestamp', sa.DateTime),
+        sa.column('amount', sa.Float),
+        sa.column('account_id', sa.Integer),
+        sa.column('dedup_key', sa.String),
+    )
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(transaction.c.id, transaction.c.timestamp, transaction.c.amount, transaction.c.account_id)
+            .where(transaction.c.id > last_id)
+            .order_by(transaction.c.id)
+            .limit(BACKFILL_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            transaction.update().where(transaction.c.id == sa.bindparam('row_id')).values(dedup_key=sa.bindparam('key')),
+            [{'row_id': row.id, 'key': dedup_key(row.timestamp, row.amount, row.account_id)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_family_dedup_key', ['family_id', 'dedup_key'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_family_dedup_key')
+        batch_op.drop_column('dedup_key')
@@ -0,0 +1,90 @@
+"""
+Benchmark confirming an import row by row versus the bulk insert path.
+
+Uses a temporary SQLite file by default; set BENCH_DATABASE_URI to run against MySQL.
+Run with ``python -m tests.benchmarks.bench_bulk_import [rows]`` (default 20000).
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from flask_login import login_user
+from app import create_app, db
+from app.models.user import User
+from app.models.account_type import AccountType
+from app.models.transaction import Transaction
+from app.services.transactions.import_transaction import IMPORT_CHUNK_SIZE, import_rows
+from app.services.transactions.utilities import create_or_get_category
+from tests.seed_test_data import seed_db_for_tests
+
+
+def build_rows(count, account, prefix):
+    start = date(2012, 1, 1)
+    return [
+        {
+            "tx_date": (start + timedelta(days=index % 4000)).strftime("%m/%d/%Y"),
+            "amount": -(index % 500) - 0.25,
+            "description": f"{prefix} {index}",
+            "category_field": f"Bench Category {index % 30}",
+            "account_id": account.id,
+            "account_name": account.name,
+            "is_duplicate": False,
+            "force_import": False,
+            "is_transfer": index % 50 == 0,
+        }
+        for index in range(count)
+    ]
+
+
+def row_by_row(rows, user):
+    """The pre-bulk path: one category lookup and one ORM add per row."""
+    for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+        for tx in rows[start:start + IMPORT_CHUNK_SIZE]:
+            category = create_or_get_category(tx["category_field"])
+            db.session.add(Transaction(
+                amount=tx["amount"],
+                description=tx["description"],
+                timestamp=datetime.strptime(tx["tx_date"], "%m/%d/%Y"),
+                user_id=user.id,
+                family_id=user.family_id,
+                category_id=category.id,
+                account_id=tx["account_id"],
+                is_transfer=tx["is_transfer"],
+            ))
+        db.session.commit()
+
+
+def bulk(rows, user):
+    for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+        import_rows(rows[start:start + IMPORT_CHUNK_SIZE], user)
+        db.session.commit()
+
+
+def timed(label, func, rows, user):
+    started = time.perf_counter()
+    func(rows, user)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<11} {elapsed:7.2f}s  {len(rows) / elapsed:>10,.0f} rows/s")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as workdir:
+        uri = os.environ.get("BENCH_DATABASE_URI", f"sqlite:///{workdir}/bench.db")
+        app = create_app({"SQLALCHEMY_DATABASE_URI": uri, "TESTING": True})
+        with app.test_request_context():
+            db.drop_all()
+            db.create_all()
+            seed_db_for_tests()
+            user = User.query.filter_by(username="user1").first()
+            login_user(user)
+            account = AccountType.query.filter_by(family_id=user.family_id).first()
+            print(f"{count} rows on {db.engine.dialect.name}")
+            timed("row by row", row_by_row, build_rows(count, account, "Row"), user)
+            timed("bulk", bulk, build_rows(count, account, "Bulk"), user)
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
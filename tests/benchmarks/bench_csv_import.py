@@ -0,0 +1,98 @@
+"""
+Benchmark peak memory of the CSV import pipeline on a large synthetic export.
+
+Compares decoding the whole upload and building lists (the previous approach)
+with the streaming pipeline consumed chunk by chunk. Only parsing and rule
+application are measured; the in-file duplicate keys are the one structure
+that still grows with the number of rows.
+
+Run with ``python -m tests.benchmarks.bench_csv_import [megabytes]`` (default 100).
+"""
+import csv
+import io
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from types import SimpleNamespace
+from flask_login import login_user
+from app import create_app, db
+from app.models.user import User
+from app.services.transactions.import_transaction import (
+    IMPORT_CHUNK_SIZE,
+    apply_import_rules,
+    iter_chunks,
+    parse_csv,
+    parse_csv_row,
+)
+from tests.seed_test_data import seed_db_for_tests
+
+ACCOUNT = SimpleNamespace(
+    id=1, name="Benchmark Checking", family_id=1, date_field="Date", description_field="Description",
+    amount_field="Amount", category_field="Category", positive_expense=False,
+)
+MERCHANTS = ["GROCERY OUTLET", "SHELL OIL", "AMAZON MKTP", "PAYROLL DEPOSIT", "CITY WATER", "NETFLIX.COM"]
+
+
+def write_export(target, megabytes):
+    rng = random.Random(7)
+    text = io.TextIOWrapper(target, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(["Date", "Description", "Amount", "Category"])
+    day = date(2010, 1, 1)
+    rows = 0
+    while target.tell() < megabytes * 1024 * 1024:
+        for _ in range(1000):
+            writer.writerow([day.isoformat(), f"{rng.choice(MERCHANTS)} #{rng.randint(1000, 99999)}",
+                             f"{rng.uniform(-250, 250):.2f}", "Shopping"])
+            day += timedelta(minutes=20)
+        rows += 1000
+        text.flush()
+    text.detach()
+    target.seek(0)
+    return rows
+
+
+def run_eager(upload):
+    stream = io.StringIO(upload.stream.read().decode("UTF8"), newline=None)
+    transactions_data = [tx for tx in map(lambda row: parse_csv_row(row, ACCOUNT), csv.DictReader(stream)) if tx]
+    return len(list(apply_import_rules(transactions_data, ACCOUNT)))
+
+
+def run_streaming(upload):
+    count = 0
+    for chunk in iter_chunks(apply_import_rules(parse_csv(upload, ACCOUNT), ACCOUNT), IMPORT_CHUNK_SIZE):
+        count += len(chunk)
+    return count
+
+
+def measure(label, func, upload):
+    upload.stream.seek(0)
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = func(upload)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {count:>9} rows  {elapsed:8.1f}s  peak {peak / 1024 / 1024:8.1f} MiB")
+
+
+def main():
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "TESTING": True})
+    with app.test_request_context(), tempfile.TemporaryFile() as export:
+        db.create_all()
+        seed_db_for_tests()
+        login_user(User.query.filter_by(username="user1").first())
+        rows = write_export(export, megabytes)
+        print(f"{megabytes} MB export, {rows} rows")
+
+        upload = SimpleNamespace(filename="export.csv", stream=export)
+        measure("eager", run_eager, upload)
+        measure("streaming", run_streaming, upload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark the dashboard aggregates and the full /dashboard page for a large family.
+
+Uses a temporary SQLite file by default; set BENCH_DATABASE_URI to run against MySQL.
+Run with ``python -m tests.benchmarks.bench_dashboard [transactions]`` (default 500000).
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from sqlalchemy import insert
+from app import create_app, db
+from app.models.user import User
+from app.models.category import Category
+from app.models.account_type import AccountType
+from app.models.transaction import Transaction
+from app.services.dashboard import get_dashboard_data
+from app.services.rollup import rebuild_family_rollup
+from tests.seed_test_data import seed_db_for_tests
+
+INSERT_CHUNK_SIZE = 20000
+RUNS = 50
+
+
+def seed(count, user):
+    category_ids = [c.id for c in Category.query.filter_by(family_id=user.family_id).all()]
+    account_ids = [a.id for a in AccountType.query.filter_by(family_id=user.family_id).all()]
+    # Spread the rows over the last five years, ending today.
+    start = datetime.combine(date.today(), datetime.min.time()) - timedelta(days=5 * 365)
+    step = timedelta(days=5 * 365) / count
+    for offset in range(0, count, INSERT_CHUNK_SIZE):
+        db.session.execute(insert(Transaction), [
+            {
+                "amount": 2500.0 if i % 20 == 0 else -(i % 300) - 0.99,
+                "description": f"Bench transaction {i}",
+                "timestamp": start + step * i,
+                "user_id": user.id,
+                "family_id": user.family_id,
+                "category_id": category_ids[i % len(category_ids)],
+                "account_id": account_ids[i % len(account_ids)],
+                "is_transfer": i % 25 == 0,
+                "dedup_key": Transaction.compute_dedup_key(start + step * i, 2500.0 if i % 20 == 0 else -(i % 300) - 0.99,
+                                                           account_ids[i % len(account_ids)]),
+            }
+            for i in range(offset, min(offset + INSERT_CHUNK_SIZE, count))
+        ])
+    rebuild_family_rollup(user.family_id)
+    db.session.commit()
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p50 = timings[len(timings) // 2] * 1000
+    p95 = timings[int(len(timings) * 0.95) - 1] * 1000
+    print(f"{label:<16} p50 {p50:7.1f} ms  p95 {p95:7.1f} ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    with tempfile.TemporaryDirectory() as workdir:
+        uri = os.environ.get("BENCH_DATABASE_URI", f"sqlite:///{workdir}/bench.db")
+        app = create_app({"SQLALCHEMY_DATABASE_URI": uri, "TESTING": True, "WTF_CSRF_ENABLED": False})
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            seed_db_for_tests()
+            user = User.query.filter_by(username="user1").first()
+            print(f"Seeding {count} transactions on {db.engine.dialect.name}...")
+            seed(count, user)
+            timings = []
+            for _ in range(RUNS):
+                started = time.perf_counter()
+                get_dashboard_data(user, date.today())
+                timings.append(time.perf_counter() - started)
+            report("dashboard data", timings)
+
+            client = app.test_client()
+            client.post("/login", data={"username": "user1", "password": "test123"})
+            timings = []
+            for _ in range(RUNS):
+                started = time.perf_counter()
+                response = client.get("/dashboard")
+                timings.append(time.perf_counter() - started)
+                assert response.status_code == 200
+            report("/dashboard page", timings)
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark the monthly report's old correlated EXISTS family filter against the shared
+``Transaction.family_id`` filter, next to the annual report for scale.
+
+The live aggregation (no rollup) is timed for a custom range with partial edge months.
+Uses a temporary SQLite file by default; set BENCH_DATABASE_URI to run against MySQL.
+Run with ``python -m tests.benchmarks.bench_family_filter [transactions]`` (default 500000).
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+from flask_login import login_user
+from app import create_app, db
+from app.models.user import User
+from app.models.transaction import Transaction
+from app.services.family import family_transaction_filter
+from app.services.reports import annual, monthly
+from app.services.rollup import get_monthly_totals
+from tests.benchmarks.bench_dashboard import seed
+from tests.seed_test_data import seed_db_for_tests
+
+RUNS = 10
+START, END = date(2022, 1, 10), date(2024, 12, 20)
+
+
+def timed(label, func):
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"{label:<34} median {timings[len(timings) // 2] * 1000:8.1f} ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    with tempfile.TemporaryDirectory() as workdir:
+        uri = os.environ.get("BENCH_DATABASE_URI", f"sqlite:///{workdir}/bench.db")
+        app = create_app({"SQLALCHEMY_DATABASE_URI": uri, "TESTING": True})
+        with app.test_request_context():
+            db.drop_all()
+            db.create_all()
+            seed_db_for_tests()
+            user = User.query.filter_by(username="user1").first()
+            login_user(user)
+            print(f"Seeding {count} transactions on {db.engine.dialect.name}...")
+            seed(count, user)
+
+            exists_filter = Transaction.user.has(User.family_id == user.family_id)
+            # family_id=None forces every month through the live transaction aggregation.
+            timed("live, correlated EXISTS", lambda: get_monthly_totals(None, exists_filter, START, END))
+            timed("live, family_id = ?", lambda: get_monthly_totals(None, family_transaction_filter(user), START, END))
+            timed("monthly report (rollup + edges)", lambda: monthly.generate_chart_data(
+                monthly.get_family_filter(user), START, END, family_id=user.family_id))
+            filters = {"start_date": START.isoformat(), "end_date": END.isoformat(), "category_id": None, "account_id": None}
+            timed("annual report (rollup + edges)", lambda: annual.get_annual_totals(filters, user))
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import uuid
 import pytest
 from app import create_app, db
 from tests.seed_test_data import seed_db_for_tests
@@ -11,6 +12,8 @@ def app():
         "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
         "TESTING": True,
         "WTF_CSRF_ENABLED": False,
+        # Each app gets its own namespace so cached data never leaks between tests.
+        "CACHE_KEY_PREFIX": f"test:{uuid.uuid4().hex}:",
     }
     app = create_app(test_config)
 
@@ -104,3 +104,45 @@ def test_transaction_relationships(app):
     # Verify the reverse relationship (backrefs).
     assert transaction in category.transactions
     assert transaction in account_type.transactions
+
+
+def test_dedup_key_matches_same_day_amount_and_account():
+    """
+    Transactions on the same day, for the same amount in cents and on the same account share a key.
+    """
+    key = Transaction.compute_dedup_key(datetime.datetime(2024, 3, 1, 9, 0), -12.004, 1)
+    assert len(key) == 16
+    assert Transaction.compute_dedup_key(datetime.datetime(2024, 3, 1, 18, 45), "-12.00", 1) == key
+    assert Transaction.compute_dedup_key(datetime.date(2024, 3, 1), -12.0, 1) == key
+    assert Transaction.compute_dedup_key(datetime.datetime(2024, 3, 1), -12.0, 2) != key
+    assert Transaction.compute_dedup_key(datetime.datetime(2024, 3, 2), -12.0, 1) != key
+    assert Transaction.compute_dedup_key(datetime.datetime(2024, 3, 1), -0.001, 1) == Transaction.compute_dedup_key(datetime.datetime(2024, 3, 1), 0.0, 1)
+    assert Transaction.compute_dedup_key(None, -12.0, 1) is None
+
+
+def test_dedup_key_is_kept_up_to_date(app):
+    """
+    The dedup_key is computed on insert and recomputed when the date, amount or account changes.
+    """
+    user = get_seeded_user()
+    category = get_seeded_category()
+    account_type = get_seeded_account_type()
+    tx = Transaction(amount=-20.0, description="Dedup", timestamp=datetime.datetime(2024, 3, 1, 9, 0),
+                     user_id=user.id, category_id=category.id, account_id=account_type.id)
+    db.session.add(tx)
+    db.session.commit()
+    assert tx.dedup_key == Transaction.compute_dedup_key(tx.timestamp, -20.0, account_type.id)
+
+    tx.description = "Renamed"
+    db.session.commit()
+    assert tx.dedup_key == Transaction.compute_dedup_key(datetime.datetime(2024, 3, 1), -20.0, account_type.id)
+
+    tx.amount = -25.0
+    db.session.commit()
+    assert tx.dedup_key == Transaction.compute_dedup_key(datetime.datetime(2024, 3, 1), -25.0, account_type.id)
+
+    untimed = Transaction(amount=-5.0, description="Default timestamp", user_id=user.id,
+                          category_id=category.id, account_id=account_type.id)
+    db.session.add(untimed)
+    db.session.commit()
+    assert untimed.dedup_key == Transaction.compute_dedup_key(untimed.timestamp, -5.0, account_type.id)
@@ -0,0 +1,44 @@
+# tests/query_plan.py
+import re
+from contextlib import contextmanager
+from sqlalchemy import event
+
+
+@contextmanager
+def capture_queries(engine):
+    """
+    Record every SQL statement (and its parameters) the engine executes inside the block.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def explain(connection, statement, parameters):
+    """
+    Return the plan lines for a statement on SQLite (EXPLAIN QUERY PLAN) or MySQL (EXPLAIN).
+    """
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql("EXPLAIN " + statement, parameters).mappings().all()
+    return [f"{row['table']} type={row['type']} key={row['key']}" for row in rows]
+
+
+def indexes_used(connection, statement, parameters):
+    """
+    Return the names of the indexes the planner picked for a statement.
+    """
+    used = set()
+    for line in explain(connection, statement, parameters):
+        match = re.search(r"USING (?:COVERING )?INDEX (\w+)", line) or re.search(r"key=(\w+)", line)
+        if match and match.group(1) != "None":
+            used.add(match.group(1))
+    return used
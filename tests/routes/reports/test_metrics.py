@@ -0,0 +1,35 @@
+from datetime import datetime
+from app import db
+from app.models.account_type import AccountType
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.models.user import User
+from tests.routes.utils import login
+
+
+def test_report_cache_metrics_count_hits_and_misses(client):
+    login(client, "user1", "test123")
+    for _ in range(2):
+        assert client.get("/reports/annual?start_date=2022-01-01&end_date=2022-12-31").status_code == 200
+    assert client.get("/reports/monthly?time_filter=ytd").status_code == 200
+
+    response = client.get("/reports/cache_metrics")
+    assert response.status_code == 200
+    assert response.json["annual"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+    assert response.json["monthly"]["misses"] == 1
+
+
+def test_report_cache_is_fresh_after_a_transaction_write(client):
+    login(client, "user1", "test123")
+    url = "/reports/annual?start_date=2021-01-01&end_date=2021-12-31"
+    assert b"1,234.56" not in client.get(url).data
+
+    with client.application.app_context():
+        user = User.query.filter_by(username="user1").first()
+        db.session.add(Transaction(amount=1234.56, description="Report cache", timestamp=datetime(2021, 6, 1),
+                                   user_id=user.id,
+                                   category_id=Category.query.filter_by(family_id=user.family_id).first().id,
+                                   account_id=AccountType.query.filter_by(family_id=user.family_id).first().id))
+        db.session.commit()
+    assert b"1,234.56" in client.get(url).data
+    assert client.get("/reports/cache_metrics").json["annual"]["hits"] == 0
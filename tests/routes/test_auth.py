@@ -1,3 +1,8 @@
+from app.models.family import Family
+from app.models.user import User
+from app.services.family import get_family_member_ids
+
+
 def test_get_login(client):
     """
     Ensure the login page is accessible.
@@ -34,6 +39,31 @@ def test_register_and_logout(client, app):
     assert b"Login" in response.data
 
 
+def test_register_into_existing_family_updates_members(client, app):
+    """
+    Registering into an existing family adds the new user to the cached member list.
+    """
+    family = Family.query.filter_by(name="Family_1").first()
+    with app.app_context():
+        # Warm the shared member cache before the new user joins.
+        members_before = get_family_member_ids(family.id)
+
+    reg_data = {
+        "username": "joiner",
+        "email": "joiner@example.com",
+        "family_name": "Family_1",
+        "password": "Test@123",
+        "confirm_password": "Test@123"
+    }
+    response = client.post("/register", data=reg_data, follow_redirects=True)
+    assert response.status_code == 200
+
+    joiner = User.query.filter_by(username="joiner").first()
+    assert joiner.family_id == family.id
+    with app.app_context():
+        assert get_family_member_ids(family.id) == tuple(sorted(members_before + (joiner.id,)))
+
+
 def test_change_password(client, app):
     """
     Test the change password flow.
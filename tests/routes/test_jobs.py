@@ -0,0 +1,34 @@
+import pytest
+from app.models.user import User
+from app.services.jobs import JOB_HANDLERS, enqueue_job
+from tests.routes.utils import login
+
+
+@pytest.fixture
+def job_id(client, monkeypatch):
+    monkeypatch.setitem(JOB_HANDLERS, "count_to", lambda progress, user_id, total: progress(total, total) or "Done counting.")
+    with client.application.test_request_context():
+        user = User.query.filter_by(username="user1").first()
+        return enqueue_job("count_to", user.id, return_url="/transactions", total=4)
+
+
+def test_job_status_and_progress_page(client, job_id):
+    login(client, "user1", "test123")
+    response = client.get(f"/jobs/{job_id}/status")
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "id": job_id, "name": "count_to", "status": "finished", "done": 4, "total": 4,
+        "message": "Done counting.", "return_url": "/transactions",
+    }
+
+    response = client.get(f"/jobs/{job_id}")
+    assert response.status_code == 200
+    assert b"Done counting." in response.data
+    assert b'href="/transactions"' in response.data
+
+
+def test_jobs_are_only_visible_to_their_user(client, job_id):
+    login(client, "user2", "test456")
+    assert client.get(f"/jobs/{job_id}/status").status_code == 404
+    assert client.get(f"/jobs/{job_id}").status_code == 404
+    assert client.get("/jobs/unknown/status").status_code == 404
@@ -1,9 +1,12 @@
 import io
 import csv
+from datetime import datetime
 from app.models.transaction import Transaction
 from app.models.user import User
 from app.models.category import Category
+from app.models.import_batch import ImportBatch, ImportStagedRow
 from tests.routes.utils import login
+from tests.query_plan import capture_queries
 from app import db
 
 
@@ -148,6 +151,32 @@ def test_download_csv(client):
     assert header == expected_header
 
 
+def test_download_csv_streams_joined_rows(client):
+    """The export is streamed from one query with the category and account names joined in."""
+    login(client, "user1", "test123")
+    with client.application.app_context():
+        user = User.query.filter_by(username="user1").first()
+        categories = Category.query.filter_by(family_id=user.family_id).limit(3).all()
+        for i in range(12):
+            db.session.add(Transaction(amount=-1.5 - i, description=f"Export {i}", timestamp=datetime(2024, 1, 1 + i),
+                                       user_id=user.id, category_id=categories[i % len(categories)].id, account_id=1))
+        db.session.commit()
+        expected_categories = {category.id: category.name for category in categories}
+
+    with capture_queries(db.engine) as statements:
+        response = client.get("/transactions/download?filter=normal&time_filter=all")
+        assert response.is_streamed
+        rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))[1:]
+
+    exported = [row for row in rows if row[1].startswith("Export ")]
+    assert [row[1] for row in exported] == [f"Export {i}" for i in reversed(range(12))]
+    assert exported[0] == ["2024-01-12", "Export 11", "-12.50", exported[0][3], expected_categories[categories[11 % len(categories)].id]]
+    assert all(row[3] for row in exported)
+    transaction_selects = [statement for statement, _ in statements if 'FROM "transaction"' in statement]
+    assert len(transaction_selects) == 1
+    assert not any(statement.lstrip().startswith("SELECT category") for statement, _ in statements)
+
+
 def test_transactions_family_isolation(client):
     """
     Verify that transactions are only visible to members of the same family.
@@ -168,3 +197,88 @@ def test_transactions_family_isolation(client):
     response = client.get("/transactions", follow_redirects=True)
     # Verify that the transaction does not appear.
     assert b"Family Isolation Test" not in response.data
+
+
+def test_transactions_page_lists_only_family_categories(client):
+    with client.application.app_context():
+        family_ids = {user.username: user.family_id for user in User.query.filter(User.username.in_(["user1", "frank"]))}
+        db.session.add_all([
+            Category(name="Family One Only", family_id=family_ids["user1"]),
+            Category(name="Awesome Only", family_id=family_ids["frank"]),
+        ])
+        db.session.commit()
+    login(client, "frank", "asdded123")
+    for filter_type in ("normal", "duplicates"):
+        response = client.get(f"/transactions?filter={filter_type}")
+        assert b"Awesome Only" in response.data
+        assert b"Family One Only" not in response.data
+
+
+def test_import_stages_rows_outside_the_session(client):
+    """
+    Uploaded rows are staged in the database; the session only carries the batch id
+    and each preview page renders its own slice of rows.
+    """
+    login(client, "user1", "test123")
+    lines = ["Transaction Date,Description,Amount,Category"]
+    lines += [f"03/{day:02d}/2024,Staged Import {day},-{day}.50,Groceries" for day in range(1, 26)]
+    upload = {"account_id": "1", "csv_file": (io.BytesIO("\n".join(lines).encode("utf-8")), "import.csv")}
+    response = client.post("/transactions/import", data=upload, content_type="multipart/form-data")
+    assert response.status_code == 200
+    assert b"Batch: 1 of 3" in response.data
+    assert response.data.count(b"Staged Import") == 2 * 10  # hidden input and visible text per row
+
+    with client.session_transaction() as sess:
+        assert "processed_data" not in sess
+        batch_id = sess["import_batch_id"]
+    with client.application.app_context():
+        assert ImportStagedRow.query.filter_by(batch_id=batch_id).count() == 25
+
+    response = client.post("/transactions/import", data={"confirm": "1"})
+    assert b"Batch: 2 of 3" in response.data
+    assert b"Imported: 10 of 25" in response.data
+
+    response = client.post("/transactions/import", data={"confirm": "1", "import_all": "1"}, follow_redirects=True)
+    assert b"Total imported: 25 transactions." in response.data
+    with client.session_transaction() as sess:
+        assert "import_batch_id" not in sess
+    with client.application.app_context():
+        assert ImportBatch.query.count() == 0
+        assert ImportStagedRow.query.count() == 0
+        assert Transaction.query.filter(Transaction.description.like("Staged Import%")).count() == 25
+
+
+def _add_list_rows(user, count, offset=0):
+    categories = Category.query.filter_by(family_id=user.family_id).all()
+    for i in range(offset, offset + count):
+        db.session.add(Transaction(amount=-2.0 - i, description=f"List row {i}", timestamp=datetime(2024, 2, 1 + i % 28),
+                                   user_id=user.id, category_id=categories[i % len(categories)].id, account_id=1 + i % 2))
+    db.session.commit()
+
+
+def _count_page_queries(client, url):
+    with capture_queries(db.engine) as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(statements)
+
+
+def _count_warm_page_queries(client, url):
+    # The first render fills the summary and dropdown caches; count the one after it.
+    client.get(url)
+    return _count_page_queries(client, url)
+
+
+def test_list_pages_issue_a_constant_number_of_queries(client):
+    """Rendering more rows does not add per-row category or account queries."""
+    login(client, "user1", "test123")
+    with client.application.app_context():
+        user = User.query.filter_by(username="user1").first()
+        _add_list_rows(user, 2)
+    few = {url: _count_warm_page_queries(client, url) for url in ("/transactions", "/transactions/bulk_delete")}
+
+    with client.application.app_context():
+        user = User.query.filter_by(username="user1").first()
+        _add_list_rows(user, 30, offset=2)
+    for url, count in few.items():
+        assert _count_warm_page_queries(client, url) == count, url
@@ -1,13 +1,14 @@
-import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from werkzeug.datastructures import MultiDict
 from app.services.reports.annual import (
     parse_filters,
-    get_family_user_ids,
-    build_query,
+    get_annual_totals,
+    get_annual_report,
     get_dropdown_options
 )
 from app.models.user import User
+from app.services.reports.cache import get_report_cache_metrics
+from app.services.rollup import MonthlyTotal
 
 
 def test_parse_filters_no_args(app):
@@ -36,61 +37,65 @@ def test_parse_filters_with_args(app):
         assert filters['account_id'] == 10
 
 
-@pytest.mark.parametrize("family_id, expected_ids", [
-    (None, [123]),
-    (999, [111, 222])
-])
-@patch("app.services.reports.annual.User")
-def test_get_family_user_ids(mock_user_class, family_id, expected_ids, app):
-    with app.app_context():
-        current_user = User(id=123, family_id=family_id)
-        query_mock = MagicMock()
-        if family_id:
-            query_mock.with_entities.return_value.filter_by.return_value.all.return_value = [
-                (uid,) for uid in expected_ids
-            ]
-        else:
-            query_mock.with_entities.return_value.filter_by.return_value.all.return_value = []
-        mock_user_class.query = query_mock
-        result = get_family_user_ids(current_user)
-        assert result == expected_ids
-
-
-@patch("app.services.reports.annual.db.session.query")
-def test_build_query(mock_query, app):
+@patch("app.services.reports.annual.get_monthly_totals")
+def test_get_annual_totals(mock_monthly_totals, app):
     with app.app_context():
         filters = {
             'start_date': '2023-01-01',
-            'end_date': '2023-01-31',
+            'end_date': '2024-01-31',
             'category_id': 10,
             'account_id': 20
         }
-        family_user_ids = [111, 222]
-        current_user = User(id=999)
-        query_instance = MagicMock()
-        query_instance.filter.return_value = query_instance
-        query_instance.group_by.return_value = query_instance
-        query_instance.order_by.return_value = query_instance
-        mock_query.return_value = query_instance
+        current_user = User(id=999, family_id=5)
+        mock_monthly_totals.return_value = [
+            MonthlyTotal(2023, 1, None, 100.0, -40.0, 3),
+            MonthlyTotal(2023, 2, None, 50.0, -10.0, 2),
+            MonthlyTotal(2024, 1, None, 0.0, -5.0, 1),
+        ]
+
+        annual_totals = get_annual_totals(filters, current_user)
+        assert annual_totals == [(2023, 150.0, -50.0), (2024, 0.0, -5.0)]
+        mock_monthly_totals.assert_called_once()
+        assert mock_monthly_totals.call_args.args[0] == 5
+        assert mock_monthly_totals.call_args.kwargs == {'category_id': 10, 'account_id': 20}
+
+
+def test_get_annual_totals_invalid_date(app):
+    with app.app_context():
+        filters = {'start_date': 'not-a-date', 'end_date': None, 'category_id': None, 'account_id': None}
+        assert get_annual_totals(filters, User(id=1, family_id=1)) is None
+
+
+@patch("app.services.reports.annual.get_monthly_totals", return_value=[MonthlyTotal(2023, 1, None, 100.0, -40.0, 3)])
+def test_get_annual_report_caches_equivalent_filters_once(mock_monthly_totals, app):
+    with app.app_context():
+        current_user = User(id=999, family_id=5)
+        equivalent = [
+            {'start_date': '2023-01-05', 'end_date': '', 'category_id': None, 'account_id': None},
+            {'start_date': '2023-1-5', 'end_date': None, 'category_id': None, 'account_id': None},
+        ]
+        reports = [get_annual_report(filters, current_user) for filters in equivalent]
 
-        returned_query = build_query(filters, family_user_ids, current_user)
-        assert returned_query is query_instance
-        mock_query.assert_called_once()
+        assert reports[0] == reports[1]
+        mock_monthly_totals.assert_called_once()
+        assert get_report_cache_metrics()["annual"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+        invalid = {'start_date': 'not-a-date', 'end_date': None, 'category_id': None, 'account_id': None}
+        assert get_annual_report(invalid, current_user) is None
 
 
-@patch("app.services.reports.annual.Category.query", new_callable=MagicMock)
-@patch("app.services.reports.annual.AccountType.query", new_callable=MagicMock)
-def test_get_dropdown_options(mock_account_query, mock_category_query, app):
+@patch("app.services.reports.annual.get_family_categories")
+@patch("app.services.reports.annual.get_family_account_types")
+def test_get_dropdown_options(mock_account_types, mock_categories, app):
     """
     The added 'app' parameter (from your conftest.py) ensures an active application context.
     """
     with app.app_context():
         current_user = User(id=123, family_id=999)
-        mock_category_query.filter_by.return_value.all.return_value = ["cat1", "cat2"]
-        mock_account_query.filter_by.return_value.all.return_value = ["acct1", "acct2"]
+        mock_categories.return_value = ["cat1", "cat2"]
+        mock_account_types.return_value = ["acct1", "acct2"]
 
         cats, accts = get_dropdown_options(current_user)
         assert cats == ["cat1", "cat2"]
         assert accts == ["acct1", "acct2"]
-        mock_category_query.filter_by.assert_called_once_with(family_id=999)
-        mock_account_query.filter_by.assert_called_once_with(family_id=999)
+        mock_categories.assert_called_once_with(999)
+        mock_account_types.assert_called_once_with(999)
@@ -0,0 +1,37 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+import redis
+from app.models.user import User
+from app.services.reports.cache import cached_report, get_report_cache_metrics
+from app.services.reports.income_expense import get_income_expense_report
+
+
+def test_cached_report_counts_hits_and_misses(app):
+    with app.app_context():
+        loader = MagicMock(return_value={"labels": ["2023"]})
+        filters = {"start_date": "2023-01-01", "end_date": "2023-12-31", "category_id": None, "account_id": None}
+
+        assert cached_report("annual", 1, filters, loader) == {"labels": ["2023"]}
+        assert cached_report("annual", 1, filters, loader) == {"labels": ["2023"]}
+        assert cached_report("annual", 1, dict(filters, category_id=5), loader) == {"labels": ["2023"]}
+        assert cached_report("annual", 2, filters, loader) == {"labels": ["2023"]}
+        assert loader.call_count == 3
+
+        assert get_report_cache_metrics() == {"annual": {"hits": 1, "misses": 3, "hit_ratio": 0.25}}
+
+
+def test_report_cache_metrics_without_redis(app):
+    with app.app_context():
+        app.config["SESSION_REDIS"] = MagicMock(**{"hgetall.side_effect": redis.ConnectionError("down")})
+        assert get_report_cache_metrics() is None
+
+
+@patch("app.services.reports.income_expense.get_monthly_results", return_value=None)
+def test_income_expense_report_failures_are_not_cached(mock_results, app):
+    with app.app_context():
+        user = User(id=1, family_id=1)
+        start_dt, end_dt = datetime(2023, 1, 1), datetime(2023, 12, 31)
+        for _ in range(2):
+            report = get_income_expense_report(user, start_dt, end_dt)
+            assert report == {"labels": [], "incomes": [], "expenses": []}
+        assert mock_results.call_count == 2
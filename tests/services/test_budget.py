@@ -1,9 +1,18 @@
+import datetime
 import pytest
 from app import db
+from app.models.account_type import AccountType
 from app.models.budget import Budget
 from app.models.category import Category
+from app.models.transaction import Transaction
 from app.models.user import User
-from app.services.budget import add_budget, edit_budget, delete_budget
+from app.services.budget import (
+    add_budget,
+    edit_budget,
+    delete_budget,
+    get_budget_progress,
+)
+from tests.query_plan import capture_queries
 
 
 # Fixture to clear budgets before (and after) tests
@@ -139,3 +148,81 @@ def test_delete_budget_success(app, clear_budgets, test_user, test_category):
         # Verify the budget no longer exists.
         deleted_budget = Budget.query.filter_by(id=budget.id).first()
         assert deleted_budget is None
+
+
+def budget_categories(family_id):
+    """Return a few categories of the family, creating them when the seed data has fewer."""
+    for name in ("Budget Groceries", "Budget Dining", "Budget Fuel"):
+        if not Category.query.filter_by(family_id=family_id, name=name).first():
+            db.session.add(Category(name=name, family_id=family_id))
+    db.session.commit()
+    return Category.query.filter_by(family_id=family_id).all()
+
+
+def add_budgets(user, categories, count):
+    """Create ``count`` budgets cycling over the given categories and month-long windows."""
+    for i in range(count):
+        month = i % 12 + 1
+        db.session.add(Budget(
+            user_id=user.id,
+            name=f"Budget {i}",
+            amount=100.0 + i,
+            start_date=datetime.date(2025, month, 1),
+            end_date=datetime.date(2025, month, 28),
+            categories=[categories[i % len(categories)], categories[(i + 1) % len(categories)]]
+        ))
+    db.session.commit()
+
+
+def test_budget_progress_matches_per_budget_sums(app, clear_budgets, test_user):
+    with app.app_context():
+        categories = budget_categories(test_user.family_id)
+        account = AccountType.query.filter_by(family_id=test_user.family_id).first()
+        for i in range(60):
+            db.session.add(Transaction(
+                amount=-(i + 1.5),
+                description=f"Budget tx {i}",
+                timestamp=datetime.datetime(2025, i % 12 + 1, i % 27 + 1, 12, 0),
+                user_id=test_user.id,
+                category_id=categories[i % len(categories)].id,
+                account_id=account.id
+            ))
+        add_budgets(test_user, categories, 12)
+        db.session.add(Budget(user_id=test_user.id, name="Open ended", amount=50.0, categories=[categories[0]]))
+        db.session.commit()
+
+        user_ids = [u.id for u in User.query.filter_by(family_id=test_user.family_id).all()]
+        progress = get_budget_progress(user_ids)
+        assert len(progress) == 13
+        for budget, spent in progress:
+            if budget.start_date is None:
+                # A budget without a window matches nothing (the per-budget query raised on it).
+                assert spent == 0
+                continue
+            category_ids = [c.id for c in budget.categories]
+            expected = db.session.query(db.func.sum(Transaction.amount)).filter(
+                Transaction.user_id.in_(user_ids),
+                Transaction.category_id.in_(category_ids),
+                Transaction.timestamp >= budget.start_date,
+                Transaction.timestamp <= budget.end_date
+            ).scalar() or 0
+            assert spent == pytest.approx(expected)
+        assert any(spent for _, spent in progress)
+
+
+def test_budget_progress_query_count_is_constant(app, clear_budgets, test_user):
+    with app.app_context():
+        categories = budget_categories(test_user.family_id)
+        user_ids = [test_user.id]
+
+        add_budgets(test_user, categories, 2)
+        with capture_queries(db.engine) as few:
+            get_budget_progress(user_ids)
+
+        add_budgets(test_user, categories, 40)
+        with capture_queries(db.engine) as many:
+            progress = get_budget_progress(user_ids)
+
+        assert len(progress) == 42
+        # One query loads the budgets and one grouped query sums their spending.
+        assert len(many) == len(few)
@@ -0,0 +1,96 @@
+from datetime import datetime
+import pytest
+import redis
+from unittest.mock import MagicMock
+from flask_login import login_user
+from app import db
+from app.models.user import User
+from app.models.category import Category
+from app.models.account_type import AccountType
+from app.models.transaction import Transaction
+from app.services.cache import cached_family_value, get_family_version
+from app.services.family import family_transaction_filter
+from app.services.transactions.main import get_transaction_summary
+from tests.query_plan import capture_queries
+
+
+@pytest.fixture
+def family_user(app):
+    with app.test_request_context():
+        user = User.query.filter_by(username="user1").first()
+        login_user(user)
+        yield user
+
+
+def _add(user, amount):
+    db.session.add(Transaction(
+        amount=amount,
+        description="Cache test",
+        timestamp=datetime(2024, 5, 1),
+        user_id=user.id,
+        category_id=Category.query.filter_by(family_id=user.family_id).first().id,
+        account_id=AccountType.query.filter_by(family_id=user.family_id).first().id,
+    ))
+
+
+def test_version_moves_on_commit_only(family_user):
+    family_id = family_user.family_id
+    version = get_family_version(family_id)
+
+    _add(family_user, -10.0)
+    db.session.flush()
+    assert get_family_version(family_id) == version
+    db.session.rollback()
+    db.session.commit()
+    assert get_family_version(family_id) == version
+
+    _add(family_user, -10.0)
+    db.session.commit()
+    assert get_family_version(family_id) == version + 1
+
+
+def test_cached_family_value_is_reused_until_the_next_write(family_user):
+    loader = MagicMock(side_effect=[{"n": 1}, {"n": 2}])
+    family_id = family_user.family_id
+
+    assert cached_family_value(family_id, "probe", {"a": 1}, loader) == {"n": 1}
+    assert cached_family_value(family_id, "probe", {"a": 1}, loader) == {"n": 1}
+    assert loader.call_count == 1
+
+    _add(family_user, 5.0)
+    db.session.commit()
+    assert cached_family_value(family_id, "probe", {"a": 1}, loader) == {"n": 2}
+    assert loader.call_count == 2
+
+
+def test_cached_family_value_skips_none_and_redis_errors(app, family_user):
+    loader = MagicMock(return_value=None)
+    assert cached_family_value(family_user.family_id, "probe", {}, loader) is None
+    assert cached_family_value(family_user.family_id, "probe", {}, loader) is None
+    assert loader.call_count == 2
+
+    app.config["SESSION_REDIS"] = MagicMock(**{"get.side_effect": redis.ConnectionError("down")})
+    assert cached_family_value(family_user.family_id, "probe", {}, lambda: 7) == 7
+
+
+def test_transaction_summary_is_one_cached_aggregate(family_user):
+    _add(family_user, 100.0)
+    _add(family_user, -40.0)
+    db.session.commit()
+    query = Transaction.query.filter(family_transaction_filter())
+    filters = {"filter_type": "normal", "date_range": "All Time"}
+
+    with capture_queries(db.engine) as statements:
+        summary = get_transaction_summary(query, filters)
+    assert len(statements) == 1
+    assert summary.total_count == query.count()
+
+    with capture_queries(db.engine) as statements:
+        assert get_transaction_summary(query, filters) == summary
+    assert statements == []
+
+    _add(family_user, -5.0)
+    db.session.commit()
+    refreshed = get_transaction_summary(query, filters)
+    assert refreshed.total_count == summary.total_count + 1
+    assert refreshed.total_expense == pytest.approx(summary.total_expense - 5.0)
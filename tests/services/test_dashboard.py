@@ -0,0 +1,185 @@
+import datetime
+import pytest
+from sqlalchemy import insert
+from app import db
+from app.models.account_type import AccountType
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services import dashboard
+from app.services.dashboard import WEEK, empty_dashboard_data, get_cash_flow_series, get_dashboard_data
+from app.services.rollup import rebuild_family_rollup
+from tests.query_plan import capture_queries
+
+
+TODAY = datetime.date(2024, 3, 15)
+
+
+def seed_transactions(user):
+    categories = Category.query.filter_by(family_id=user.family_id).all()
+    account = AccountType.query.filter_by(family_id=user.family_id).first()
+    start = datetime.datetime(2022, 11, 1, 9, 30)
+    db.session.execute(insert(Transaction), [
+        {
+            "amount": 1200.0 if i % 7 == 0 else -(i % 90) - 0.5,
+            "description": f"Dashboard tx {i}",
+            "timestamp": start + datetime.timedelta(days=i * 2, hours=i % 5),
+            "user_id": user.id,
+            "family_id": user.family_id,
+            "category_id": categories[i % len(categories)].id,
+            "account_id": account.id,
+            "is_transfer": i % 11 == 0,
+        }
+        for i in range(300)
+    ])
+    rebuild_family_rollup(user.family_id)
+    db.session.commit()
+
+
+def live_sum(user_ids, start, end, *conditions):
+    return db.session.query(db.func.sum(Transaction.amount)).filter(
+        Transaction.user_id.in_(user_ids),
+        Transaction.is_transfer.is_(False),
+        Transaction.timestamp >= start,
+        Transaction.timestamp < end,
+        *conditions
+    ).scalar() or 0
+
+
+def test_dashboard_data_matches_live_aggregates(app):
+    with app.app_context():
+        user = User.query.filter_by(username="user1").first()
+        seed_transactions(user)
+        user_ids = [u.id for u in User.query.filter_by(family_id=user.family_id).all()]
+
+        data = get_dashboard_data(user, TODAY)
+
+        year_start, year_end = datetime.datetime(2024, 1, 1), datetime.datetime(2025, 1, 1)
+        assert data["total_income"] == pytest.approx(live_sum(user_ids, year_start, year_end, Transaction.amount > 0))
+        assert data["total_expenses"] == pytest.approx(abs(live_sum(user_ids, year_start, year_end, Transaction.amount < 0)))
+        assert data["balance"] == pytest.approx(data["total_income"] - data["total_expenses"])
+
+        assert data["start_date"] == datetime.date(2023, 4, 1)
+        assert data["end_date"] == datetime.date(2024, 3, 31)
+        assert data["month_labels"][0] == "Apr" and data["month_labels"][-1] == "Mar"
+        month = datetime.datetime(2023, 4, 1)
+        for income, expense in zip(data["monthly_income"], data["monthly_expenses"]):
+            next_month = (month + datetime.timedelta(days=32)).replace(day=1)
+            assert income == pytest.approx(live_sum(user_ids, month, next_month, Transaction.amount > 0))
+            assert expense == pytest.approx(abs(live_sum(user_ids, month, next_month, Transaction.amount < 0)))
+            month = next_month
+
+        window = (datetime.datetime(2023, 4, 1), datetime.datetime(2024, 4, 1))
+        assert data["category_totals"]
+        for category, total in data["category_totals"]:
+            assert total == pytest.approx(live_sum(user_ids, *window, Transaction.category_id == category.id))
+
+        march = db.session.query(Transaction.amount).filter(
+            Transaction.user_id.in_(user_ids),
+            Transaction.is_transfer.is_(False),
+            Transaction.timestamp >= datetime.datetime(2024, 3, 1),
+            Transaction.timestamp < datetime.datetime(2024, 4, 1)
+        ).order_by(Transaction.timestamp).all()
+        assert data["cash_flow_data"][-1] == pytest.approx(sum(amount for amount, in march))
+        assert data["cash_flow_dates"] == sorted(set(data["cash_flow_dates"]))
+
+
+def test_dashboard_data_uses_few_queries(app):
+    with app.app_context():
+        user = User.query.filter_by(username="user1").first()
+        seed_transactions(user)
+        db.session.refresh(user)
+
+        with capture_queries(db.engine) as statements:
+            get_dashboard_data(user, TODAY)
+
+        # One rollup read for every monthly aggregate, the category names and the cash-flow series.
+        assert len(statements) == 3
+
+
+def test_empty_dashboard_data_keeps_month_labels():
+    data = empty_dashboard_data(TODAY)
+    assert len(data["month_labels"]) == 12
+    assert data["monthly_income"] == [0] * 12
+    assert data["category_totals"] == []
+
+
+def expected_daily_totals(user_ids, start, end):
+    totals = {}
+    for timestamp, amount in db.session.query(Transaction.timestamp, Transaction.amount).filter(
+        Transaction.user_id.in_(user_ids),
+        Transaction.is_transfer.is_(False),
+        Transaction.timestamp >= start,
+        Transaction.timestamp < end
+    ).all():
+        totals[timestamp.date()] = totals.get(timestamp.date(), 0) + amount
+    return totals
+
+
+@pytest.mark.parametrize("window_functions", [True, False])
+def test_cash_flow_series_sums_per_day(app, monkeypatch, window_functions):
+    monkeypatch.setattr(dashboard, "supports_window_functions", lambda dialect: window_functions)
+    with app.app_context():
+        user = User.query.filter_by(username="user1").first()
+        seed_transactions(user)
+        expected = expected_daily_totals([user.id], datetime.datetime(2023, 1, 1), datetime.datetime(2023, 4, 1))
+
+        points = get_cash_flow_series(Transaction.user_id == user.id, datetime.date(2023, 1, 1), datetime.date(2023, 3, 31))
+
+        assert [point.period for point in points] == sorted(expected)
+        running = 0
+        for point in points:
+            running += expected[point.period]
+            assert point.total == pytest.approx(expected[point.period])
+            assert point.cumulative == pytest.approx(running)
+
+
+@pytest.mark.parametrize("window_functions", [True, False])
+def test_cash_flow_series_by_week(app, monkeypatch, window_functions):
+    monkeypatch.setattr(dashboard, "supports_window_functions", lambda dialect: window_functions)
+    with app.app_context():
+        user = User.query.filter_by(username="user1").first()
+        seed_transactions(user)
+        expected = {}
+        for day, total in expected_daily_totals([user.id], datetime.datetime(2023, 1, 1), datetime.datetime(2023, 4, 1)).items():
+            week = day - datetime.timedelta(days=day.weekday())
+            expected[week] = expected.get(week, 0) + total
+
+        points = get_cash_flow_series(Transaction.user_id == user.id, datetime.date(2023, 1, 1), datetime.date(2023, 3, 31), granularity=WEEK)
+
+        assert [point.period for point in points] == sorted(expected)
+        assert all(point.period.weekday() == 0 for point in points)
+        running = 0
+        for point in points:
+            running += expected[point.period]
+            assert point.total == pytest.approx(expected[point.period])
+            assert point.cumulative == pytest.approx(running)
+        uncumulated = get_cash_flow_series(Transaction.user_id == user.id, datetime.date(2023, 1, 1), datetime.date(2023, 3, 31), granularity=WEEK, cumulative=False)
+        assert all(point.cumulative is None for point in uncumulated)
+        with pytest.raises(ValueError):
+            get_cash_flow_series(Transaction.user_id == user.id, datetime.date(2023, 1, 1), datetime.date(2023, 3, 31), granularity="month")
+
+
+def test_cash_flow_series_groups_weeks_in_the_database(app):
+    with app.app_context():
+        user = User.query.filter_by(username="user1").first()
+        category = Category.query.filter_by(family_id=user.family_id).first()
+        account = AccountType.query.filter_by(family_id=user.family_id).first()
+        # A Sunday and the Monday after it fall in different weeks; the rest of the week shares one row.
+        for day in (1, 2, 3, 8):
+            db.session.add(Transaction(
+                amount=-1.0, description=f"Week row {day}", timestamp=datetime.datetime(2023, 1, day, 12),
+                user_id=user.id, family_id=user.family_id, category_id=category.id, account_id=account.id
+            ))
+        db.session.commit()
+        family_filter = Transaction.description.like("Week row%")
+
+        with capture_queries(db.engine) as statements:
+            points = get_cash_flow_series(family_filter, datetime.date(2023, 1, 1), datetime.date(2023, 1, 8), granularity=WEEK)
+
+        assert [(point.period, point.total) for point in points] == [
+            (datetime.date(2022, 12, 26), -1.0),
+            (datetime.date(2023, 1, 2), -3.0),
+        ]
+        assert len(statements) == 1
+        assert "GROUP BY" in statements[0][0]
@@ -0,0 +1,72 @@
+import pytest
+import redis
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from flask import g
+from app import db
+from app.models.user import User
+from app.services.family import family_transaction_filter, get_family_member_ids, get_family_user_ids, invalidate_family_members
+from tests.query_plan import capture_queries
+
+
+@pytest.mark.parametrize("family_id, expected_ids", [
+    (None, [123]),
+    (999, [111, 222])
+])
+@patch("app.services.family.User")
+def test_get_family_user_ids(mock_user_class, family_id, expected_ids, app):
+    with app.app_context():
+        current_user = User(id=123, family_id=family_id)
+        query_mock = MagicMock()
+        query_mock.with_entities.return_value.filter_by.return_value.all.return_value = [
+            (uid,) for uid in expected_ids
+        ] if family_id else []
+        mock_user_class.query = query_mock
+        assert get_family_user_ids(current_user) == expected_ids
+
+
+def test_family_members_are_memoized_per_request_and_in_redis(app):
+    with app.app_context():
+        user = User.query.filter_by(username="user1").first()
+        family_id = user.family_id
+        expected = tuple(sorted(u.id for u in User.query.filter_by(family_id=family_id).all()))
+
+        with capture_queries(db.engine) as statements:
+            assert get_family_member_ids(family_id) == expected
+            assert get_family_member_ids(family_id) == expected
+        assert len(statements) == 1
+
+    # A later request finds the members in Redis.
+    with app.app_context():
+        with capture_queries(db.engine) as statements:
+            assert get_family_member_ids(family_id) == expected
+        assert statements == []
+
+        invalidate_family_members(family_id)
+        assert family_id not in g.family_member_ids
+        with capture_queries(db.engine) as statements:
+            assert get_family_member_ids(family_id) == expected
+        assert len(statements) == 1
+
+
+def test_family_members_fall_back_to_the_database_without_redis(app):
+    with app.app_context():
+        user = User.query.filter_by(username="user1").first()
+        family_id = user.family_id
+        app.config["SESSION_REDIS"] = MagicMock(**{
+            "get.side_effect": redis.ConnectionError("down"),
+            "set.side_effect": redis.ConnectionError("down"),
+        })
+        assert user.id in get_family_member_ids(family_id)
+
+
+def test_family_transaction_filter_compares_the_family_column(app):
+    with app.app_context():
+        user = User.query.filter_by(username="user1").first()
+        sql = str(family_transaction_filter(user).compile(db.engine, compile_kwargs={"literal_binds": True}))
+        assert "EXISTS" not in sql.upper()
+        assert sql == f'"transaction".family_id = {user.family_id}'
+
+        loner = SimpleNamespace(id=user.id, family_id=None)
+        sql = str(family_transaction_filter(loner).compile(db.engine, compile_kwargs={"literal_binds": True}))
+        assert sql == f'"transaction".user_id = {user.id}'
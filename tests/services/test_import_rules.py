@@ -4,6 +4,7 @@ from app.models.user import User
 from app.models.import_rule import ImportRule
 from app.models.category import Category
 from app.models.account_type import AccountType
+from app.services.family import get_family_member_ids
 from app.services.import_rules import (
     fetch_account_types_and_categories,
     process_override_category,
@@ -11,8 +12,8 @@ from app.services.import_rules import (
     update_import_rule,
     delete_import_rule,
     apply_rule_to_transactions,
-    get_family_user_ids,
-    get_transaction_field_value
+    get_transaction_field_value,
+    get_compiled_rules
 )
 
 
@@ -172,7 +173,7 @@ def test_apply_rule_to_transactions(app, family_user, request_context):
         db.session.commit()
 
         # 5) Apply the rule
-        fam_ids = get_family_user_ids(family_user.family_id)
+        fam_ids = list(get_family_member_ids(family_user.family_id))
         count = apply_rule_to_transactions(rule, fam_ids)
         assert count == 1, "One transaction should be updated."
         updated_tx = db.session.get(Transaction, tx.id)
@@ -239,3 +240,40 @@ def test_rules_are_family_specific_service(app, family_user, request_context):
         other_fam_rules = ImportRule.query.filter_by(family_id=999).all()
         assert any(r.match_pattern == "FAM999" for r in other_fam_rules)
         assert all(r.match_pattern != "FAM123" for r in other_fam_rules)
+
+
+def test_get_compiled_rules_is_family_scoped_and_cached(app, family_user, request_context):
+    with app.app_context():
+        db.session.add_all([
+            ImportRule(account_type="Chase Checking", field_to_match="Description", match_pattern="MINE",
+                       is_transfer=True, family_id=family_user.family_id),
+            ImportRule(account_type=None, field_to_match="Description", match_pattern="OTHER",
+                       is_transfer=True, family_id=999),
+        ])
+        db.session.commit()
+
+        rules = get_compiled_rules(family_user.family_id, "Chase Checking")
+        assert len(rules) == 1
+        assert rules.apply("PAY MINE", "Uncategorized") == (True, "Uncategorized")
+        assert rules.apply("PAY OTHER", "Uncategorized") == (False, "Uncategorized")
+
+        # A second lookup reuses the compiled set.
+        assert get_compiled_rules(family_user.family_id, "Chase Checking") is rules
+        assert get_compiled_rules(family_user.family_id, "Chase Savings") is not rules
+
+
+def test_rule_writes_invalidate_compiled_rules(app, family_user, request_context):
+    with app.app_context():
+        category = Category.query.filter_by(family_id=family_user.family_id).first()
+        create_import_rule(family_user.family_id, "Chase Checking", "Description", "GROCER", False, category.id)
+        rules = get_compiled_rules(family_user.family_id, "Chase Checking")
+        assert rules.apply("GROCER 12", "Uncategorized") == (False, category.name)
+
+        rule = ImportRule.query.filter_by(match_pattern="GROCER").one()
+        update_import_rule(rule, "Chase Checking", "Description", "MARKET", True, category.id)
+        rules = get_compiled_rules(family_user.family_id, "Chase Checking")
+        assert rules.apply("GROCER 12", "Uncategorized") == (False, "Uncategorized")
+        assert rules.apply("MARKET 12", "Uncategorized") == (True, category.name)
+
+        delete_import_rule(rule)
+        assert len(get_compiled_rules(family_user.family_id, "Chase Checking")) == 0
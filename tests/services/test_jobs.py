@@ -0,0 +1,93 @@
+import pytest
+import redis
+from unittest.mock import MagicMock
+from app import db
+from app.models.category import Category
+from app.services.transactions.utilities import get_or_create_categories
+from app.services.jobs import (
+    FAILED,
+    FINISHED,
+    JOB_HANDLERS,
+    QUEUED,
+    enqueue_job,
+    get_job,
+    work
+)
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    calls = []
+
+    def count_to(progress, user_id, total):
+        for done in range(1, total + 1):
+            progress(done, total)
+        calls.append((user_id, total))
+        return f"Counted to {total}."
+
+    def resolve_category(progress, user_id, category_name):
+        calls.append(get_or_create_categories({category_name}, 1)[category_name])
+        db.session.commit()
+
+    def broken(progress, user_id):
+        db.session.add(Category(name="Never Committed", family_id=1))
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(JOB_HANDLERS, "count_to", count_to)
+    monkeypatch.setitem(JOB_HANDLERS, "resolve_category", resolve_category)
+    monkeypatch.setitem(JOB_HANDLERS, "broken", broken)
+    return calls
+
+
+def test_inline_job_runs_when_enqueued(app, handlers):
+    job_id = enqueue_job("count_to", 7, return_url="/done", total=3)
+    job = get_job(job_id)
+    assert handlers == [(7, 3)]
+    assert (job["status"], job["done"], job["total"]) == (FINISHED, 3, 3)
+    assert (job["message"], job["return_url"], job["user_id"]) == ("Counted to 3.", "/done", 7)
+
+
+def test_failed_job_is_recorded_and_rolled_back(app, handlers):
+    job = get_job(enqueue_job("broken", 7))
+    assert job["status"] == FAILED
+    assert job["message"] == "The job failed. Please try again."
+    assert Category.query.filter_by(name="Never Committed").count() == 0
+
+
+def test_queued_job_runs_in_a_worker(app, handlers):
+    app.config["JOBS_RUN_INLINE"] = False
+    job_id = enqueue_job("count_to", 7, total=2)
+    assert get_job(job_id)["status"] == QUEUED
+    assert handlers == []
+
+    work(poll_timeout=1, burst=True)
+    assert handlers == [(7, 2)]
+    assert get_job(job_id)["status"] == FINISHED
+
+
+def test_worker_jobs_do_not_share_request_memos(app, handlers):
+    app.config["JOBS_RUN_INLINE"] = False
+    enqueue_job("resolve_category", 7, category_name="Worker Category")
+    work(poll_timeout=1, burst=True)
+    first_id = handlers[-1]
+
+    # Deleted between the jobs; the next job must not reuse the ID memoized by the first.
+    db.session.delete(db.session.get(Category, first_id))
+    db.session.commit()
+    enqueue_job("resolve_category", 7, category_name="Worker Category")
+    work(poll_timeout=1, burst=True)
+
+    # A stale memo would hand back the deleted ID without recreating the category.
+    assert Category.query.filter_by(name="Worker Category", family_id=1).one().id == handlers[-1]
+
+
+def test_job_runs_inline_without_redis(app, handlers):
+    app.config["JOBS_RUN_INLINE"] = False
+    app.config["SESSION_REDIS"] = MagicMock(**{"pipeline.side_effect": redis.ConnectionError("down")})
+    enqueue_job("count_to", 7, total=1)
+    assert handlers == [(7, 1)]
+
+
+def test_unknown_job_is_rejected(app):
+    with pytest.raises(ValueError):
+        enqueue_job("no_such_job", 7)
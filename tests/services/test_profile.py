@@ -1,7 +1,13 @@
 import uuid
+from datetime import datetime
 from app import db
 from app.models.user import User
 from app.models.family import Family
+from app.models.category import Category
+from app.models.account_type import AccountType
+from app.models.transaction import Transaction
+from app.models.monthly_category_rollup import MonthlyCategoryRollup
+from app.services.family import get_family_member_ids
 from app.services.profile import (
     update_user_profile,
     get_family_name_for_user,
@@ -181,3 +187,49 @@ def test_update_user_profile_rollback_on_error(app, monkeypatch):
         # Since family update was disabled, no family should have been created.
         fam = Family.query.filter_by(name="RollbackFam").first()
         assert fam is None
+
+
+def test_update_user_profile_family_change_moves_rollup(app):
+    """
+    Changing a user's family moves their transactions' rollup buckets to the new family.
+    """
+    with app.app_context():
+        user = User.query.filter_by(username="user2").first()
+        old_family_id = user.family_id
+        category = Category.query.filter_by(family_id=old_family_id).first()
+        account = AccountType.query.filter_by(family_id=old_family_id).first()
+        db.session.add(Transaction(amount=-12.0, description="Moved", timestamp=datetime(2024, 5, 1),
+                                   user_id=user.id, category_id=category.id, account_id=account.id))
+        db.session.commit()
+        assert MonthlyCategoryRollup.query.filter_by(family_id=old_family_id).count() == 1
+
+        success = update_user_profile(user=user, username=user.username, email=user.email, family_name="MovedFamily")
+        assert success is True
+
+        new_family = Family.query.filter_by(name="MovedFamily").first()
+        assert MonthlyCategoryRollup.query.filter_by(family_id=old_family_id).count() == 0
+        moved = MonthlyCategoryRollup.query.filter_by(family_id=new_family.id).one()
+        assert moved.expense == -12.0
+        assert moved.count == 1
+        assert Transaction.query.filter_by(user_id=user.id).one().family_id == new_family.id
+
+
+def test_update_user_profile_family_change_invalidates_family_members(app):
+    """
+    Cached family members of both the old and the new family are refreshed after a family change.
+    """
+    with app.app_context():
+        user = User.query.filter_by(username="user2").first()
+        old_family_id = user.family_id
+        assert user.id in get_family_member_ids(old_family_id)
+        new_family = get_or_create_family("JoinedFamily")
+        assert get_family_member_ids(new_family.id) == ()
+
+    with app.app_context():
+        user = User.query.filter_by(username="user2").first()
+        assert update_user_profile(user=user, username=user.username, email=user.email, family_name="JoinedFamily") is True
+
+    with app.app_context():
+        user = User.query.filter_by(username="user2").first()
+        assert user.id not in get_family_member_ids(old_family_id)
+        assert get_family_member_ids(new_family.id) == (user.id,)
@@ -0,0 +1,89 @@
+import pytest
+import redis
+from unittest.mock import MagicMock
+from flask_login import login_user
+from app import db
+from app.models.user import User
+from app.models.category import Category
+from app.models.account_type import AccountType
+from app.models.import_rule import ImportRule
+from app.services.cache import REFERENCE, get_family_version
+from app.services.category import update_category
+from app.services.reference_data import (
+    REFERENCE_CACHE_EXTENSION,
+    ReferenceItem,
+    get_family_account_types,
+    get_family_categories,
+    get_family_category_names
+)
+from app.services.transactions.utilities import get_or_create_categories
+from tests.query_plan import capture_queries
+
+
+@pytest.fixture
+def family_user(app):
+    with app.test_request_context():
+        user = User.query.filter_by(username="user1").first()
+        login_user(user)
+        yield user
+
+
+def test_categories_are_scoped_sorted_and_cached(app, family_user):
+    family_id = family_user.family_id
+    expected = [
+        ReferenceItem(c.id, c.name)
+        for c in Category.query.filter_by(family_id=family_id).order_by(Category.name.asc()).all()
+    ]
+
+    assert get_family_categories(family_id) == expected
+    with capture_queries(db.engine) as statements:
+        assert get_family_categories(family_id) == expected
+    assert statements == []
+
+    # Another worker starts with an empty LRU and is served from Redis.
+    app.extensions.pop(REFERENCE_CACHE_EXTENSION)
+    with capture_queries(db.engine) as statements:
+        assert get_family_categories(family_id) == expected
+    assert statements == []
+
+    assert get_family_categories(None) == []
+
+
+def test_category_names_are_keyed_by_id_in_name_order(family_user):
+    names = get_family_category_names(family_user.family_id)
+    assert list(names.values()) == sorted(names.values())
+    assert names == {c.id: c.name for c in Category.query.filter_by(family_id=family_user.family_id)}
+
+
+def test_reference_writes_bump_the_family_version(family_user):
+    family_id = family_user.family_id
+    categories = get_family_categories(family_id)
+    version = get_family_version(family_id, REFERENCE)
+
+    update_category(db.session.get(Category, categories[0].id), "Zz Renamed")
+    assert get_family_version(family_id, REFERENCE) == version + 1
+    assert get_family_categories(family_id)[-1] == ReferenceItem(categories[0].id, "Zz Renamed")
+
+    db.session.add(AccountType(name="Cache Card", category_field="Category", date_field="Date",
+                               amount_field="Amount", description_field="Description", family_id=family_id))
+    db.session.commit()
+    assert "Cache Card" in [account.name for account in get_family_account_types(family_id)]
+
+    db.session.add(ImportRule(field_to_match="Description", match_pattern="CACHE", family_id=family_id))
+    db.session.commit()
+    assert get_family_version(family_id, REFERENCE) == version + 3
+
+
+def test_bulk_created_categories_bump_the_family_version(family_user):
+    family_id = family_user.family_id
+    get_family_categories(family_id)
+
+    ids = get_or_create_categories({"Bulk Cached"}, family_id)
+    db.session.commit()
+    assert ReferenceItem(ids["Bulk Cached"], "Bulk Cached") in get_family_categories(family_id)
+
+
+def test_reference_data_loads_without_redis(app, family_user):
+    app.config["SESSION_REDIS"] = MagicMock(**{"get.side_effect": redis.ConnectionError("down")})
+    names = [account.name for account in get_family_account_types(family_user.family_id)]
+    assert names == sorted(a.name for a in AccountType.query.filter_by(family_id=family_user.family_id))
@@ -0,0 +1,143 @@
+from datetime import date, datetime
+import pytest
+from app import db
+from app.models.user import User
+from app.models.category import Category
+from app.models.account_type import AccountType
+from app.models.transaction import Transaction
+from app.models.monthly_category_rollup import MonthlyCategoryRollup
+from app.services.rollup import (
+    split_date_range,
+    get_monthly_totals,
+    remove_transactions,
+    rebuild_family_rollup,
+)
+
+
+@pytest.fixture
+def family_user(app):
+    with app.app_context():
+        yield User.query.filter_by(username="user1").first()
+
+
+def _add(user, amount, timestamp, category=None, account=None, is_transfer=False):
+    category = category or Category.query.filter_by(family_id=user.family_id).first()
+    account = account or AccountType.query.filter_by(family_id=user.family_id).first()
+    tx = Transaction(
+        amount=amount,
+        description="Rollup test",
+        timestamp=timestamp,
+        user_id=user.id,
+        category_id=category.id,
+        account_id=account.id,
+        is_transfer=is_transfer,
+    )
+    db.session.add(tx)
+    db.session.commit()
+    return tx
+
+
+def _buckets(family_id):
+    return {
+        (r.account_id, r.category_id, r.year, r.month, r.is_transfer): (round(r.income, 2), round(r.expense, 2), r.count)
+        for r in MonthlyCategoryRollup.query.filter_by(family_id=family_id).all()
+    }
+
+
+def test_split_date_range_whole_months():
+    month_range, partial = split_date_range(date(2023, 1, 1), date(2023, 3, 31))
+    assert month_range == (date(2023, 1, 1), date(2023, 4, 1))
+    assert partial == []
+
+
+def test_split_date_range_partial_edges():
+    month_range, partial = split_date_range(datetime(2023, 1, 15), date(2023, 3, 10))
+    assert month_range == (date(2023, 2, 1), date(2023, 3, 1))
+    assert partial == [(date(2023, 1, 15), date(2023, 2, 1)), (date(2023, 3, 1), date(2023, 3, 11))]
+
+
+def test_split_date_range_within_one_month():
+    month_range, partial = split_date_range(date(2023, 5, 3), date(2023, 5, 20))
+    assert month_range is None
+    assert partial == [(date(2023, 5, 3), date(2023, 5, 21))]
+
+
+def test_split_date_range_open_ended():
+    month_range, partial = split_date_range(None, None)
+    assert month_range == (None, None)
+    assert partial == []
+
+
+def test_rollup_tracks_insert_update_delete(app, family_user):
+    with app.app_context():
+        family_id = family_user.family_id
+        tx = _add(family_user, -20.0, datetime(2024, 1, 10))
+        _add(family_user, 100.0, datetime(2024, 1, 12))
+        key = (tx.account_id, tx.category_id, 2024, 1, False)
+        assert _buckets(family_id) == {key: (100.0, -20.0, 2)}
+
+        # Moving the transaction to another month and category moves its bucket.
+        other_category = Category(name="Rollup Other", family_id=family_id)
+        db.session.add(other_category)
+        db.session.commit()
+        tx.amount = "-35.50"
+        tx.timestamp = datetime(2024, 2, 3)
+        tx.category_id = other_category.id
+        db.session.commit()
+        assert _buckets(family_id) == {
+            key: (100.0, 0.0, 1),
+            (tx.account_id, other_category.id, 2024, 2, False): (0.0, -35.5, 1),
+        }
+
+        db.session.delete(tx)
+        db.session.commit()
+        assert _buckets(family_id) == {key: (100.0, 0.0, 1)}
+
+
+def test_new_transactions_get_the_users_family(app, family_user):
+    with app.app_context():
+        tx = _add(family_user, -5.0, datetime(2024, 1, 10))
+        assert tx.family_id == family_user.family_id
+
+
+def test_remove_transactions_for_bulk_delete(app, family_user):
+    with app.app_context():
+        _add(family_user, -5.0, datetime(2024, 3, 1))
+        _add(family_user, -7.0, datetime(2024, 3, 2))
+        query = Transaction.query.filter(Transaction.user_id == family_user.id)
+        remove_transactions(query)
+        query.delete(synchronize_session="fetch")
+        db.session.commit()
+        assert _buckets(family_user.family_id) == {}
+
+
+def test_rebuild_family_rollup_matches_incremental(app, family_user):
+    with app.app_context():
+        _add(family_user, -5.0, datetime(2024, 3, 1))
+        _add(family_user, 12.0, datetime(2024, 4, 2), is_transfer=True)
+        incremental = _buckets(family_user.family_id)
+        rebuild_family_rollup(family_user.family_id)
+        db.session.commit()
+        assert _buckets(family_user.family_id) == incremental
+
+
+def test_get_monthly_totals_merges_rollup_and_partial_months(app, family_user):
+    with app.app_context():
+        _add(family_user, -10.0, datetime(2024, 1, 5))
+        _add(family_user, -20.0, datetime(2024, 1, 25))
+        _add(family_user, 300.0, datetime(2024, 2, 14))
+        _add(family_user, -40.0, datetime(2024, 3, 2))
+        _add(family_user, -80.0, datetime(2024, 3, 28))
+        _add(family_user, -999.0, datetime(2024, 2, 10), is_transfer=True)
+
+        family_filter = Transaction.user_id.in_([family_user.id])
+        totals = get_monthly_totals(family_user.family_id, family_filter, date(2024, 1, 20), date(2024, 3, 10))
+        assert [(t.year, t.month, t.income, t.expense, t.count) for t in totals] == [
+            (2024, 1, 0.0, -20.0, 1),
+            (2024, 2, 300.0, 0.0, 1),
+            (2024, 3, 0.0, -40.0, 1),
+        ]
+
+        # Without a family everything is aggregated from the transaction table.
+        live = get_monthly_totals(None, family_filter, date(2024, 1, 20), date(2024, 3, 10))
+        assert live == totals
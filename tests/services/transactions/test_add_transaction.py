@@ -11,11 +11,12 @@ class DummyCategory:
 
 
 class DummyTransaction:
-    def __init__(self, amount, description, category_id, user_id, account_id):
+    def __init__(self, amount, description, category_id, user_id, account_id, family_id=None):
         self.amount = amount
         self.description = description
         self.category_id = category_id
         self.user_id = user_id
+        self.family_id = family_id
         self.account_id = account_id
 
 
@@ -111,16 +112,16 @@ class TestAddTransactionService(unittest.TestCase):
     @patch("app.services.transactions.add_transaction.render_template")
     @patch("app.services.transactions.add_transaction.redirect")
     @patch("app.services.transactions.add_transaction.url_for", return_value="/transactions")
-    @patch("app.services.transactions.add_transaction.Category")
-    @patch("app.services.transactions.add_transaction.AccountType")
+    @patch("app.services.transactions.add_transaction.get_family_categories")
+    @patch("app.services.transactions.add_transaction.get_family_account_types")
     @patch("app.services.transactions.add_transaction.flash")
-    def test_render_add_transaction_form_success(self, mock_flash, mock_account_type, mock_category,
+    def test_render_add_transaction_form_success(self, mock_flash, mock_account_types, mock_categories,
                                                  mock_url_for, mock_redirect, mock_render_template):
         # Arrange: set up dummy query return values.
         dummy_categories = ["Cat1", "Cat2"]
         dummy_accounts = ["Acc1"]
-        mock_category.query.filter_by.return_value.all.return_value = dummy_categories
-        mock_account_type.query.filter_by.return_value.all.return_value = dummy_accounts
+        mock_categories.return_value = dummy_categories
+        mock_account_types.return_value = dummy_accounts
 
         dummy_user = DummyUser()
         app = Flask("test_app")
@@ -135,10 +136,10 @@ class TestAddTransactionService(unittest.TestCase):
 
     @patch("app.services.transactions.add_transaction.redirect")
     @patch("app.services.transactions.add_transaction.url_for", return_value="/transactions")
-    @patch("app.services.transactions.add_transaction.Category")
-    @patch("app.services.transactions.add_transaction.AccountType")
+    @patch("app.services.transactions.add_transaction.get_family_categories")
+    @patch("app.services.transactions.add_transaction.get_family_account_types")
     @patch("app.services.transactions.add_transaction.flash")
-    def test_render_add_transaction_form_failure(self, mock_flash, mock_account_type, mock_category,
+    def test_render_add_transaction_form_failure(self, mock_flash, mock_account_types, mock_categories,
                                                  mock_url_for, mock_redirect):
         # Arrange: simulate exception during query.
         dummy_user = DummyUser()
@@ -147,7 +148,7 @@ class TestAddTransactionService(unittest.TestCase):
             with patch("app.services.transactions.add_transaction.current_user", dummy_user):
                 with patch("app.services.transactions.add_transaction.current_app") as mock_current_app:
                     mock_current_app.logger = MagicMock()
-                    mock_category.query.filter_by.side_effect = Exception("Query error")
+                    mock_categories.side_effect = Exception("Query error")
                     result = render_add_transaction_form()
         mock_flash.assert_called_with("An error occurred while loading the form. Please try again.", "danger")
         mock_redirect.assert_called_with("/transactions")
@@ -1,9 +1,18 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import call, patch, MagicMock
+from datetime import datetime
 from flask import Flask
 from types import SimpleNamespace
+from app import db
+from app.models.account_type import AccountType
+from app.models.category import Category
+from app.models.monthly_category_rollup import MonthlyCategoryRollup
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.family import family_transaction_filter
 from app.services.transactions.bulk_delete import (
     build_transaction_query,
+    bulk_delete_job,
     delete_all_transactions,
     delete_selected_transactions,
     handle_post_request,
@@ -22,13 +31,17 @@ class DummyTransactionQuery:
     def order_by(self, *args, **kwargs):
         return self
 
-    def paginate(self, page, per_page, error_out):
-        return SimpleNamespace(
-            items=[{"id": 1, "timestamp": "dummy_timestamp"}],
-            page=page,
-            per_page=per_page,
-            total=1
-        )
+    def options(self, *args, **kwargs):
+        return self
+
+    def limit(self, *args, **kwargs):
+        return self
+
+    def all(self):
+        return [SimpleNamespace(id=1, timestamp=datetime(2024, 1, 1))]
+
+    def count(self):
+        return 1
 
     def delete(self, synchronize_session="fetch"):
         # Simulate deletion by updating deleted_count.
@@ -91,25 +104,12 @@ class TestBulkDeleteService(unittest.TestCase):
                 self.assertEqual(filters["category_id"], 1)
                 self.assertEqual(filters["account_id"], 2)
 
-    @patch("app.services.transactions.bulk_delete.url_for", return_value="/bulk_delete")
-    @patch("app.services.transactions.bulk_delete.flash")
-    @patch("app.services.transactions.bulk_delete.db")
-    def test_delete_all_transactions_success(self, mock_db, mock_flash, mock_url_for):
-        dummy_query = DummyTransactionQuery()  # use our proper dummy query
-        with self.app.test_request_context("/bulk_delete"):
-            result = delete_all_transactions(dummy_query)
-            self.assertEqual(result.status_code, 302)
-            self.assertEqual(result.location, "/bulk_delete")
-            # Now check that our dummy_query's delete() method updated deleted_count to 5.
-            self.assertEqual(dummy_query.deleted_count, 5)
-            mock_db.session.commit.assert_called_once()
-            mock_flash.assert_called_once_with("Deleted all 5 matching transactions.", "success")
-
     @patch("app.services.transactions.bulk_delete.url_for", return_value="/bulk_delete")
     @patch("app.services.transactions.bulk_delete.flash")
     @patch("app.services.transactions.bulk_delete.db")
     @patch("app.services.transactions.bulk_delete.Transaction")
-    def test_delete_selected_transactions_success(self, mock_Transaction, mock_db, mock_flash, mock_url_for):
+    @patch("app.services.transactions.bulk_delete.remove_transactions")
+    def test_delete_selected_transactions_success(self, mock_remove_transactions, mock_Transaction, mock_db, mock_flash, mock_url_for):
         with self.app.test_request_context("/bulk_delete", method="POST", data={"transaction_ids": ["1", "2", "3"]}):
             dummy_query = DummyTransactionQuery()
             mock_Transaction.query.filter.return_value = dummy_query
@@ -120,26 +120,31 @@ class TestBulkDeleteService(unittest.TestCase):
             self.assertIn("/bulk_delete", result.location)
             # Here we check the return value from delete().
             self.assertEqual(dummy_query.delete(synchronize_session="fetch"), 3)
+            mock_remove_transactions.assert_called_once_with(dummy_query)
             mock_db.session.commit.assert_called_once()
             mock_flash.assert_called_once_with("Deleted 3 transactions.", "success")
 
-    @patch("app.services.transactions.bulk_delete.delete_all_transactions")
+    @patch("app.services.transactions.bulk_delete.url_for", side_effect=lambda endpoint, **kwargs: f"/{endpoint}")
+    @patch("app.services.transactions.bulk_delete.enqueue_job", return_value="job1")
     @patch("app.services.transactions.bulk_delete.delete_selected_transactions")
-    def test_handle_post_request_delete_all(self, mock_delete_selected, mock_delete_all):
+    def test_handle_post_request_delete_all(self, mock_delete_selected, mock_enqueue_job, mock_url_for):
         form_data = {"delete_all": "true"}
         with self.app.test_request_context("/bulk_delete", method="POST", data=form_data):
             dummy_query = DummyTransactionQuery()
             filters = {"start_date": None, "end_date": None, "category_id": None, "account_id": None}
-            mock_delete_all.return_value = "redirect_all"
-            result = handle_post_request(dummy_query, filters)
-            mock_delete_all.assert_called_with(dummy_query)
-            self.assertEqual(result, "redirect_all")
+            with patch("app.services.transactions.bulk_delete.current_user", SimpleNamespace(id=1, family_id=1)):
+                result = handle_post_request(dummy_query, filters)
+            mock_enqueue_job.assert_called_once_with("bulk_delete", 1, return_url="/transactions.bulk_delete", filters=filters)
+            mock_delete_selected.assert_not_called()
+            self.assertEqual(result.status_code, 302)
+            self.assertEqual(result.location, "/jobs.job_progress")
 
+    @patch("app.services.transactions.bulk_delete.cached_count", return_value=1)
     @patch("app.services.transactions.bulk_delete.render_template", return_value="bulk_delete_page")
-    @patch("app.services.transactions.bulk_delete.Category")
-    @patch("app.services.transactions.bulk_delete.AccountType")
-    def test_render_bulk_delete_page_success(self, mock_AccountType, mock_Category, mock_render_template):
-        with self.app.test_request_context("/bulk_delete?page=2"):
+    @patch("app.services.transactions.bulk_delete.get_family_categories", return_value=["Cat1", "Cat2"])
+    @patch("app.services.transactions.bulk_delete.get_family_account_types", return_value=["Acc1", "Acc2"])
+    def test_render_bulk_delete_page_success(self, mock_account_types, mock_categories, mock_render_template, mock_cached_count):
+        with self.app.test_request_context("/bulk_delete"):
             filters = {
                 "start_date": "2023-01-01",
                 "end_date": "2023-01-31",
@@ -147,12 +152,53 @@ class TestBulkDeleteService(unittest.TestCase):
                 "account_id": 10
             }
             dummy_query = DummyTransactionQuery()
-            mock_Category.query.filter_by.return_value.order_by.return_value.all.return_value = ["Cat1", "Cat2"]
-            mock_AccountType.query.filter_by.return_value.order_by.return_value.all.return_value = ["Acc1", "Acc2"]
-            result = render_bulk_delete_page(dummy_query, filters)
+            with patch("app.services.transactions.bulk_delete.current_user", SimpleNamespace(id=1, family_id=1)):
+                result = render_bulk_delete_page(dummy_query, filters)
             mock_render_template.assert_called()
+            self.assertEqual(mock_render_template.call_args.kwargs["categories"], ["Cat1", "Cat2"])
+            mock_categories.assert_called_once_with(1)
+            pagination = mock_render_template.call_args.kwargs["pagination"]
+            self.assertEqual(pagination.total, 1)
+            self.assertFalse(pagination.has_next)
             self.assertEqual(result, "bulk_delete_page")
 
 
+def _add_transactions(user, category, count):
+    account = AccountType.query.filter_by(family_id=user.family_id).first()
+    db.session.add_all(
+        Transaction(amount=-10.0, description=f"Bulk delete {i}", timestamp=datetime(2024, 3, 1 + i),
+                    user_id=user.id, category_id=category.id, account_id=account.id)
+        for i in range(count)
+    )
+    db.session.commit()
+
+
+def test_delete_all_transactions_deletes_in_committed_chunks(app):
+    user = User.query.filter_by(username="user1").first()
+    _add_transactions(user, Category.query.filter_by(family_id=user.family_id).first(), 5)
+    query = Transaction.query.filter(family_transaction_filter(user))
+    progress = MagicMock()
+    with patch("app.services.transactions.bulk_delete.DELETE_CHUNK_SIZE", 2):
+        assert delete_all_transactions(query, progress) == 5
+    assert query.count() == 0
+    assert progress.call_args_list == [call(2, 5), call(4, 5), call(5, 5)]
+    # The rollup follows the chunked deletes.
+    assert sum(r.count for r in MonthlyCategoryRollup.query.filter_by(family_id=user.family_id)) == 0
+
+
+def test_bulk_delete_job_applies_the_filters(app):
+    user = User.query.filter_by(username="user1").first()
+    deleted = Category.query.filter_by(family_id=user.family_id).first()
+    kept = Category(name="Kept", family_id=user.family_id)
+    db.session.add(kept)
+    _add_transactions(user, deleted, 3)
+    _add_transactions(user, kept, 2)
+
+    filters = {"start_date": None, "end_date": None, "category_id": deleted.id, "account_id": None}
+    assert bulk_delete_job(MagicMock(), user.id, filters) == "Deleted all 3 matching transactions."
+    remaining = Transaction.query.filter(family_transaction_filter(user)).all()
+    assert [tx.category_id for tx in remaining] == [kept.id, kept.id]
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -24,11 +24,11 @@ class TestDeleteTransactionService(unittest.TestCase):
     def tearDown(self):
         self.app_context.pop()
 
-    @patch("app.services.transactions.delete_transaction.get_family_user_ids", return_value=[100, 200, 300])
+    @patch("app.services.transactions.delete_transaction.family_transaction_filter", return_value=True)
     @patch("app.services.transactions.delete_transaction.Transaction")
     @patch("app.services.transactions.delete_transaction.current_user")
     @patch("app.services.transactions.delete_transaction.current_app")
-    def test_get_transaction_by_id_found(self, mock_current_app, mock_current_user, mock_Transaction, mock_get_family_user_ids):
+    def test_get_transaction_by_id_found(self, mock_current_app, mock_current_user, mock_Transaction, mock_family_transaction_filter):
         # Arrange
         mock_current_user.id = self.dummy_user.id
         logger = MagicMock()
@@ -47,11 +47,11 @@ class TestDeleteTransactionService(unittest.TestCase):
         self.assertEqual(result, dummy_tx)
         logger.debug.assert_called()  # ensure logging occurred
 
-    @patch("app.services.transactions.delete_transaction.get_family_user_ids", return_value=[100, 200, 300])
+    @patch("app.services.transactions.delete_transaction.family_transaction_filter", return_value=True)
     @patch("app.services.transactions.delete_transaction.Transaction")
     @patch("app.services.transactions.delete_transaction.current_user")
     @patch("app.services.transactions.delete_transaction.current_app")
-    def test_get_transaction_by_id_not_found(self, mock_current_app, mock_current_user, mock_Transaction, mock_get_family_user_ids):
+    def test_get_transaction_by_id_not_found(self, mock_current_app, mock_current_user, mock_Transaction, mock_family_transaction_filter):
         # Arrange
         mock_current_user.id = self.dummy_user.id
         logger = MagicMock()
@@ -3,8 +3,24 @@ import unittest
 from datetime import datetime
 from types import SimpleNamespace
 from unittest.mock import patch
+from flask_login import login_user
 from werkzeug.datastructures import MultiDict
-from app.services.transactions.import_transaction import process_file_upload
+from app import db
+from app.models.user import User
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.services.transactions.import_transaction import (
+    process_file_upload,
+    find_existing_duplicate_keys,
+    parse_csv,
+    iter_chunks,
+    import_rows,
+    apply_import_rules,
+)
+from app.models.account_type import AccountType
+from tests.query_plan import capture_queries
+from app.models.monthly_category_rollup import MonthlyCategoryRollup
+from app.services.rollup import get_monthly_totals, rebuild_family_rollup
 
 
 # Dummy account type object to simulate a valid account type
@@ -64,14 +80,25 @@ def dummy_apply_import_rules(transactions_data, acc_type_obj):
     }]
 
 
+def dummy_stage_rows(batch, processed_data):
+    """
+    Dummy stage_rows that only counts the staged rows.
+    """
+    batch.total_rows += len(processed_data)
+
+
 class TestImportTransactionService(unittest.TestCase):
 
+    @patch("app.services.transactions.import_transaction.db")
+    @patch("app.services.transactions.import_transaction.stage_rows", side_effect=dummy_stage_rows)
+    @patch("app.services.transactions.import_transaction.create_import_batch")
     @patch("app.services.transactions.import_transaction.prepare_import_preview")
-    @patch("app.services.transactions.import_transaction.check_duplicate", return_value=False)
+    @patch("app.services.transactions.import_transaction.find_existing_duplicate_keys", return_value=set())
     @patch("app.services.transactions.import_transaction.apply_import_rules", side_effect=dummy_apply_import_rules)
     @patch("app.services.transactions.import_transaction.parse_csv", side_effect=dummy_parse_csv)
     @patch("app.services.transactions.import_transaction.get_account_type", return_value=DummyAccountType())
-    def test_process_file_upload_valid_file(self, mock_get_account_type, mock_parse_csv, mock_apply_import_rules, mock_check_duplicate, mock_prepare_import_preview):
+    def test_process_file_upload_valid_file(self, mock_get_account_type, mock_parse_csv, mock_apply_import_rules, mock_find_existing_duplicate_keys,
+                                            mock_prepare_import_preview, mock_create_import_batch, mock_stage_rows, mock_db):
 
         # Arrange: Create a dummy CSV file content and a dummy request object.
         csv_content = "Date,Description,Amount,Category\n2023-01-01,Test Transaction,100,Test Category\n"
@@ -89,6 +116,8 @@ class TestImportTransactionService(unittest.TestCase):
 
         # Prepare the preview page to be returned.
         mock_prepare_import_preview.return_value = "preview_page"
+        batch = SimpleNamespace(id=7, total_rows=0)
+        mock_create_import_batch.return_value = batch
 
         # Act: Call the process_file_upload function from the service.
         result = process_file_upload(req, current_user)
@@ -98,9 +127,153 @@ class TestImportTransactionService(unittest.TestCase):
         mock_get_account_type.assert_called_once_with(1, current_user)
         mock_parse_csv.assert_called_once()  # Called for our dummy file.
         mock_apply_import_rules.assert_called_once()
-        # check_duplicate should be called at least once for the processed transaction.
-        mock_check_duplicate.assert_called()
-        mock_prepare_import_preview.assert_called_once()
+        # Duplicates are resolved once per uploaded file, not once per row.
+        mock_find_existing_duplicate_keys.assert_called_once()
+        # Rows are staged in the database rather than kept for the session.
+        mock_create_import_batch.assert_called_once_with(1)
+        mock_stage_rows.assert_called_once()
+        self.assertEqual(batch.total_rows, 1)
+        mock_db.session.commit.assert_called_once()
+        mock_prepare_import_preview.assert_called_once_with(batch, current_user)
+
+
+def _processed_tx(tx_date, amount, description, account_id=1):
+    return {
+        "tx_date": tx_date,
+        "amount": amount,
+        "description": description,
+        "category_field": "Groceries",
+        "account_id": account_id,
+        "account_name": "Chase Prime Credit",
+        "is_duplicate": False,
+        "is_transfer": False,
+        "force_import": False,
+    }
+
+
+def _seed_transaction(user, timestamp, amount, description, account_id=1):
+    category = Category.query.filter_by(family_id=user.family_id).first()
+    db.session.add(Transaction(
+        amount=amount,
+        description=description,
+        timestamp=timestamp,
+        user_id=user.id,
+        category_id=category.id,
+        account_id=account_id,
+    ))
+    db.session.commit()
+
+
+def test_find_existing_duplicate_keys(app):
+    with app.test_request_context():
+        user = User.query.filter_by(username="user1").first()
+        login_user(user)
+        _seed_transaction(user, datetime(2024, 1, 5, 13, 30), -12.345, "Coffee")
+        _seed_transaction(user, datetime(2024, 1, 5), -40.0, "Other account", account_id=2)
+        _seed_transaction(user, datetime(2023, 12, 1), -12.345, "Outside window")
+
+        batch = [
+            _processed_tx("01/05/2024", -12.345, "Coffee"),
+            _processed_tx("01/06/2024", -8.0, "New row"),
+        ]
+        keys = find_existing_duplicate_keys(batch)
+
+        assert keys == {(datetime(2024, 1, 5).date(), -12.35, 1, "Coffee")}
+
+
+def test_import_rows_bulk_inserts_and_updates_rollup(app):
+    with app.test_request_context():
+        user = User.query.filter_by(username="user1").first()
+        login_user(user)
+        _seed_transaction(user, datetime(2024, 4, 1), -20.0, "Stored")
+
+        forced = _processed_tx("04/01/2024", -20.0, "Stored")
+        forced["force_import"] = True
+        batch = [
+            _processed_tx("04/01/2024", -20.0, "Stored"),
+            forced,
+            _processed_tx("04/02/2024", -5.0, "Bulk Snack"),
+            _processed_tx("04/02/2024", -5.0, "Bulk Snack"),
+            dict(_processed_tx("04/03/2024", 100.0, "Refund"), category_field="Bulk Refunds", is_transfer=True),
+        ]
+        assert import_rows(batch, user) == 3
+        db.session.commit()
+
+        assert Transaction.query.filter_by(description="Stored").count() == 2
+        assert Transaction.query.filter_by(description="Bulk Snack").count() == 1
+        refund = Transaction.query.filter_by(description="Refund").one()
+        assert refund.category.name == "Bulk Refunds"
+        assert refund.is_transfer is True
+        assert refund.dedup_key == Transaction.compute_dedup_key(datetime(2024, 4, 3), 100.0, refund.account_id)
+        assert refund.family_id == user.family_id
+        snack = Transaction.query.filter_by(description="Bulk Snack").one()
+        assert snack.family_id == user.family_id
+        assert snack.dedup_key == Transaction.compute_dedup_key(datetime(2024, 4, 2), -5.0, snack.account_id)
+
+        # The core INSERT bypasses the flush events, so the rollup is updated explicitly.
+        family_filter = Transaction.user_id.in_([user.id])
+        incremental = get_monthly_totals(user.family_id, family_filter, datetime(2024, 4, 1), datetime(2024, 4, 30))
+        rebuild_family_rollup(user.family_id)
+        assert incremental == get_monthly_totals(user.family_id, family_filter, datetime(2024, 4, 1), datetime(2024, 4, 30))
+        assert MonthlyCategoryRollup.query.filter_by(family_id=user.family_id, is_transfer=True).count() >= 1
+
+
+def test_import_rows_files_blank_categories_as_uncategorized(app):
+    with app.test_request_context():
+        user = User.query.filter_by(username="user1").first()
+        login_user(user)
+        batch = [dict(_processed_tx("04/05/2024", -3.0, "No category"), category_field="")]
+
+        assert import_rows(batch, user) == 1
+        db.session.commit()
+
+        imported = Transaction.query.filter_by(description="No category").one()
+        assert imported.category.name == "Uncategorized"
+        assert imported.category.family_id == user.family_id
+
+
+def test_apply_import_rules_resolves_categories_per_chunk(app):
+    with app.test_request_context():
+        user = User.query.filter_by(username="user1").first()
+        login_user(user)
+        account = AccountType.query.filter_by(family_id=user.family_id).first()
+        parsed = [(datetime(2024, 5, day % 28 + 1), f"Row {day}", -1.0 * day, f"Chunk Category {day % 5}") for day in range(60)]
+
+        with capture_queries(db.engine) as statements:
+            processed = list(apply_import_rules(parsed, account))
+        category_statements = [statement for statement, _ in statements if "FROM category" in statement or "INTO category" in statement]
+
+        assert len(processed) == 60
+        assert {tx["category_field"] for tx in processed} == {f"Chunk Category {i}" for i in range(5)}
+        # One lookup, one insert of the new names and one lookup of their IDs, not one per row.
+        assert len(category_statements) <= 3
+        assert Category.query.filter(Category.name.like("Chunk Category%")).count() == 5
+
+
+def test_parse_csv_streams_rows(app):
+    with app.test_request_context():
+        content = (
+            "Date,Description,Amount,Category\r\n"
+            "2024-03-01,\"Multi\r\nline\",-4.50,Food\r\n"
+            "not-a-date,Broken,-1,Food\r\n"
+            "2024-03-02,Caf\u00e9,10,\r\n"
+        )
+        upload = DummyFile("test.csv", content)
+        rows = parse_csv(upload, DummyAccountType())
+
+        # Nothing is read until the rows are consumed.
+        assert upload.stream.tell() == 0
+        assert list(rows) == [
+            (datetime(2024, 3, 1), "Multi\nline", -4.5, "Food"),
+            (datetime(2024, 3, 2), "Caf\u00e9", 10.0, "Uncategorized"),
+        ]
+        # The upload stream is left open for its owner.
+        assert not upload.stream.closed
+
+
+def test_iter_chunks():
+    assert list(iter_chunks(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(iter_chunks([], 2)) == []
 
 
 if __name__ == "__main__":
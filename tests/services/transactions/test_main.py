@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from datetime import datetime
 from calendar import monthrange
 from flask import Flask
@@ -26,13 +26,16 @@ class DummyQuery:
         self.filters.append(("order_by", args, kwargs))
         return self
 
-    def paginate(self, page, per_page, error_out):
-        return SimpleNamespace(
-            items=[{"id": 1, "timestamp": datetime(2025, 3, 15)}],
-            page=page,
-            per_page=per_page,
-            total=1
-        )
+    def options(self, *args, **kwargs):
+        self.filters.append(("options", args, kwargs))
+        return self
+
+    def limit(self, *args, **kwargs):
+        self.filters.append(("limit", args, kwargs))
+        return self
+
+    def all(self):
+        return [SimpleNamespace(id=1, timestamp=datetime(2025, 3, 15))]
 
     def with_entities(self, *args, **kwargs):
         self.with_entities_called = True
@@ -45,26 +48,21 @@ class DummyQuery:
         return self.deleted_count
 
 
-# --- Dummy Models for Category and AccountType ---
-class DummyCategoryModel:
-    pass
-
-
-DummyCategoryModel.query = MagicMock()
-DummyCategoryModel.query.filter_by.return_value.order_by.return_value.all.return_value = ["Cat1", "Cat2"]
+# --- Dummy reference data ---
+def dummy_get_family_category_names(family_id):
+    return {1: "Cat1", 2: "Cat2"}
 
 
-class DummyAccountTypeModel:
-    pass
+def dummy_get_family_account_types(family_id):
+    return ["Acc1", "Acc2"]
 
 
-DummyAccountTypeModel.query = MagicMock()
-DummyAccountTypeModel.query.filter_by.return_value.order_by.return_value.all.return_value = ["Acc1", "Acc2"]
+# Dummy family_transaction_filter function.
+def dummy_family_transaction_filter():
+    return True
 
 
-# Dummy get_family_user_ids function.
-def dummy_get_family_user_ids():
-    return [100, 200, 300]
+DUMMY_SUMMARY = SimpleNamespace(total_count=1, total_income=0, total_expense=-5)
 
 
 class TestMainService(unittest.TestCase):
@@ -106,10 +104,10 @@ class TestMainService(unittest.TestCase):
         filtered_query = apply_filters(dummy_query, category_id=5, category_ids=None, account_id=2)
         self.assertEqual(filtered_query, dummy_query)
 
-    @patch("app.services.transactions.main.get_family_user_ids", side_effect=dummy_get_family_user_ids)
-    @patch("app.services.transactions.main.Category", new=DummyCategoryModel)
-    @patch("app.services.transactions.main.AccountType", new=DummyAccountTypeModel)
-    @patch("app.services.transactions.main.calculate_summary", return_value="dummy_summary")
+    @patch("app.services.transactions.main.family_transaction_filter", side_effect=dummy_family_transaction_filter)
+    @patch("app.services.transactions.main.get_family_category_names", new=dummy_get_family_category_names)
+    @patch("app.services.transactions.main.get_family_account_types", new=dummy_get_family_account_types)
+    @patch("app.services.transactions.main.get_transaction_summary", return_value=DUMMY_SUMMARY)
     @patch("app.services.transactions.main.apply_filters", side_effect=lambda q, cid, cids, aid: q)
     @patch("app.services.transactions.main.apply_time_filter", side_effect=lambda q, tf: (q, "dummy_range"))
     def test_process_transactions_view_non_duplicates(self, mock_apply_time_filter, mock_apply_filters, mock_calculate_summary, mock_get_family):
@@ -120,25 +118,27 @@ class TestMainService(unittest.TestCase):
             category_id = 5
             category_ids = None
             account_id = 2
-            page = 1
             per_page = 20
             with patch("app.services.transactions.main.Transaction") as mock_Transaction:
                 # Make sure Transaction.amount is a numeric value.
                 mock_Transaction.amount = 1
                 mock_Transaction.query.filter.return_value = dummy_query
                 with patch("app.services.transactions.main.current_user", self.dummy_user):
-                    result = process_transactions_view(filter_type, time_filter, category_id, category_ids, account_id, page, per_page)
+                    result = process_transactions_view(filter_type, time_filter, category_id, category_ids, account_id, per_page)
             expected_keys = {"transactions", "account_types", "selected_account", "categories",
                              "selected_category", "filter_type", "time_filter", "pagination",
                              "date_range_display", "summary"}
             self.assertEqual(set(result.keys()), expected_keys)
             self.assertEqual(result["date_range_display"], "dummy_range")
-            self.assertEqual(result["summary"], "dummy_summary")
+            self.assertEqual(result["account_types"], ["Acc1", "Acc2"])
+            self.assertEqual(result["categories"], {1: "Cat1", 2: "Cat2"})
+            self.assertEqual(result["summary"], DUMMY_SUMMARY)
+            self.assertEqual(result["pagination"].total, DUMMY_SUMMARY.total_count)
 
     @patch("app.services.transactions.main.handle_duplicates", return_value=({}, "dup_summary"))
-    @patch("app.services.transactions.main.get_family_user_ids", side_effect=dummy_get_family_user_ids)
-    @patch("app.services.transactions.main.Category", new=DummyCategoryModel)
-    @patch("app.services.transactions.main.AccountType", new=DummyAccountTypeModel)
+    @patch("app.services.transactions.main.family_transaction_filter", side_effect=dummy_family_transaction_filter)
+    @patch("app.services.transactions.main.get_family_category_names", new=dummy_get_family_category_names)
+    @patch("app.services.transactions.main.get_family_account_types", new=dummy_get_family_account_types)
     def test_process_transactions_view_duplicates(self, mock_get_family, mock_handle_duplicates):
         with self.app.test_request_context("/transactions/main?page=1"):
             filter_type = "duplicates"
@@ -146,10 +146,9 @@ class TestMainService(unittest.TestCase):
             category_id = 5
             category_ids = None
             account_id = 2
-            page = 1
             per_page = 20
             with patch("app.services.transactions.main.current_user", self.dummy_user):
-                result = process_transactions_view(filter_type, time_filter, category_id, category_ids, account_id, page, per_page)
+                result = process_transactions_view(filter_type, time_filter, category_id, category_ids, account_id, per_page)
                 expected_keys = {"grouped_duplicates", "account_types", "selected_account", "categories",
                                  "selected_category", "filter_type", "time_filter", "pagination",
                                  "date_range_display", "summary"}
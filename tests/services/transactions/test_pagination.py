@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+import pytest
+from flask_login import login_user
+from sqlalchemy import insert
+from app import db
+from app.models.user import User
+from app.models.category import Category
+from app.models.account_type import AccountType
+from app.models.transaction import Transaction
+from app.services.family import family_transaction_filter
+from app.services.transactions.pagination import NUMBERED_PAGES, cached_count, decode_cursor, encode_cursor, keyset_paginate
+from tests.query_plan import capture_queries
+
+
+@pytest.fixture
+def family_user(app):
+    with app.test_request_context():
+        user = User.query.filter_by(username="user1").first()
+        login_user(user)
+        category = Category.query.filter_by(family_id=user.family_id).first()
+        account = AccountType.query.filter_by(family_id=user.family_id).first()
+        start = datetime(2024, 1, 1, 12)
+        # Pairs of rows share a timestamp so the id has to break the ties.
+        db.session.execute(insert(Transaction), [
+            {
+                "amount": -1.0 - i,
+                "description": f"Page tx {i}",
+                "timestamp": start + timedelta(days=i // 2),
+                "user_id": user.id,
+                "family_id": user.family_id,
+                "category_id": category.id,
+                "account_id": account.id,
+            }
+            for i in range(45)
+        ])
+        db.session.commit()
+        yield user
+
+
+def _expected_ids(query):
+    return [tx.id for tx in query.order_by(Transaction.timestamp.desc(), Transaction.id.desc()).all()]
+
+
+def test_keyset_pages_cover_every_row_in_order(family_user):
+    query = Transaction.query.filter(family_transaction_filter())
+    expected = _expected_ids(query)
+
+    pages = []
+    page = keyset_paginate(query, 10)
+    assert not page.has_prev
+    while True:
+        pages.append([tx.id for tx in page.items])
+        if not page.has_next:
+            break
+        page = keyset_paginate(query, 10, after=page.next_cursor)
+    assert [tx_id for ids in pages for tx_id in ids] == expected
+    assert [len(ids) for ids in pages] == [10, 10, 10, 10, len(expected) - 40]
+
+    # Walking back from the last page returns the same pages.
+    for ids in reversed(pages[:-1]):
+        page = keyset_paginate(query, 10, before=page.prev_cursor)
+        assert [tx.id for tx in page.items] == ids
+    assert not page.has_prev
+
+
+def test_deep_page_reads_one_page_of_rows(family_user):
+    query = Transaction.query.filter(family_transaction_filter())
+    last = Transaction.query.order_by(Transaction.timestamp.asc(), Transaction.id.asc()).first()
+
+    with capture_queries(db.engine) as statements:
+        page = keyset_paginate(query, 10, after=encode_cursor(last), total=45)
+
+    assert len(statements) == 1
+    # One page plus the look-ahead row, and nothing skipped.
+    assert tuple(statements[0][1])[-2:] == (11, 0)
+    assert page.items == [] and not page.has_next
+    assert page.total == 45
+
+
+def test_invalid_cursor_starts_at_the_newest_page(family_user):
+    query = Transaction.query.filter(family_transaction_filter())
+    assert decode_cursor("not-a-cursor") is None
+    page = keyset_paginate(query, 10, after="not-a-cursor")
+    assert [tx.id for tx in page.items] == _expected_ids(query)[:10]
+    assert not page.has_prev
+
+
+def test_cached_count_is_reused_until_the_next_write(family_user):
+    query = Transaction.query.filter(family_transaction_filter())
+    filters = {"start_date": None, "end_date": None, "category_id": None, "account_id": None}
+    total = query.count()
+
+    assert cached_count(query, filters) == total
+    with capture_queries(db.engine) as statements:
+        assert cached_count(query, filters) == total
+    assert statements == []
+
+    db.session.delete(Transaction.query.first())
+    db.session.commit()
+    assert cached_count(query, filters) == total - 1
+
+
+def test_numbered_pages_match_the_cursor_pages(family_user):
+    query = Transaction.query.filter(family_transaction_filter())
+    expected = _expected_ids(query)
+
+    page = keyset_paginate(query, 10, total=45)
+    assert page.page == 1 and page.pages == 5
+    for number in range(2, 6):
+        numbered = keyset_paginate(query, 10, page=number, total=45)
+        page = keyset_paginate(query, 10, after=page.next_cursor, page=page.next_num, total=45)
+        assert [tx.id for tx in numbered.items] == [tx.id for tx in page.items] == expected[(number - 1) * 10:number * 10]
+        assert numbered.page == page.page == number
+        assert numbered.prev_cursor == page.prev_cursor
+    assert not page.has_next and page.next_num is None
+
+    # Walking back through the cursors keeps the page numbers and ends on page 1.
+    while page.has_prev:
+        page = keyset_paginate(query, 10, before=page.prev_cursor, page=page.prev_num, total=45)
+    assert page.page == 1
+    assert [tx.id for tx in page.items] == expected[:10]
+
+
+def test_only_the_first_pages_use_offset(family_user):
+    query = Transaction.query.filter(family_transaction_filter())
+    with capture_queries(db.engine) as statements:
+        beyond = keyset_paginate(query, 5, page=NUMBERED_PAGES + 1)
+    # One page plus the look-ahead row, and nothing skipped.
+    assert tuple(statements[0][1])[-2:] == (6, 0)
+    assert beyond.page == 1
+    assert [tx.id for tx in beyond.items] == _expected_ids(query)[:5]
+
+
+def test_iter_pages_links_the_first_pages_and_the_current_one(family_user):
+    query = Transaction.query.filter(family_transaction_filter())
+    page = keyset_paginate(query, 5, total=45)
+    assert list(page.iter_pages()) == [1, 2, 3, 4, 5, None]
+
+    for _ in range(7):
+        page = keyset_paginate(query, 5, after=page.next_cursor, page=page.next_num, total=45)
+    assert page.page == 8
+    assert list(page.iter_pages()) == [1, 2, 3, 4, 5, None, 8]
+
+    unnumbered = keyset_paginate(query, 5, after=page.prev_cursor, total=45)
+    assert unnumbered.page is None
+    assert list(unnumbered.iter_pages()) == [1, 2, 3, 4, 5, None]
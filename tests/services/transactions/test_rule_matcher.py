@@ -0,0 +1,87 @@
+import random
+from types import SimpleNamespace
+from app.services.transactions.rule_matcher import PatternAutomaton, CompiledImportRules
+
+
+def _rule(field, pattern, is_transfer=False, override=None):
+    return SimpleNamespace(
+        field_to_match=field,
+        match_pattern=pattern,
+        is_transfer=is_transfer,
+        override_category_id=1 if override is not None else None,
+        override_category_display=override or "",
+    )
+
+
+def _sequential(description, category_name, rules):
+    """
+    Reference implementation: the original per-rule loop.
+    """
+    is_transfer = False
+    for rule in rules:
+        value = description if rule.field_to_match.lower() == "description" else category_name
+        if rule.match_pattern in value:
+            if rule.is_transfer:
+                is_transfer = True
+            if rule.override_category_id:
+                category_name = rule.override_category_display
+    return is_transfer, category_name
+
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = PatternAutomaton(["AMAZON", "AMAZON PRIME", "PRIME", "ZON", ""])
+    assert automaton.search("PAYMENT AMAZON PRIME VIDEO") == {0, 1, 2, 3, 4}
+    assert automaton.search("PRIMARY") == {4}
+
+
+def test_last_matching_override_wins():
+    rules = [
+        _rule("description", "COFFEE", override="Dining"),
+        _rule("description", "STARBUCKS", override="Coffee Shops"),
+        _rule("description", "NOTHING", override="Never"),
+    ]
+    compiled = CompiledImportRules(rules)
+    assert compiled.apply("STARBUCKS COFFEE #12", "Uncategorized") == (False, "Coffee Shops")
+
+
+def test_any_transfer_rule_marks_transfer():
+    rules = [
+        _rule("description", "TRANSFER", is_transfer=True),
+        _rule("description", "SAVINGS", override="Savings"),
+    ]
+    compiled = CompiledImportRules(rules)
+    assert compiled.apply("ONLINE TRANSFER TO SAVINGS", "Uncategorized") == (True, "Savings")
+    assert compiled.apply("SAVINGS INTEREST", "Uncategorized") == (False, "Savings")
+
+
+def test_category_rules_see_earlier_overrides():
+    rules = [
+        _rule("category", "Shop", override="Groceries"),
+        _rule("description", "WALMART", override="Shopping"),
+        _rule("Category", "Shopping", is_transfer=True, override="Household"),
+        _rule("category", "Groceries", override="Food"),
+    ]
+    compiled = CompiledImportRules(rules)
+    assert compiled.apply("WALMART #1", "Shop") == _sequential("WALMART #1", "Shop", rules)
+    assert compiled.apply("WALMART #1", "Shop") == (True, "Household")
+    assert compiled.apply("TARGET", "Shop") == (False, "Food")
+
+
+def test_matches_sequential_loop_on_random_rules():
+    rng = random.Random(1234)
+    words = ["AMAZON", "AMZN", "PRIME", "TRANSFER", "PAYROLL", "SHELL", "GAS", "FOOD", "Food", "Bills", ""]
+    categories = ["Uncategorized", "Food", "Gas", "Bills", "Transfers"]
+    rules = [
+        _rule(
+            rng.choice(["description", "category"]),
+            rng.choice(words),
+            is_transfer=rng.random() < 0.2,
+            override=rng.choice(categories + [None, None]),
+        )
+        for _ in range(60)
+    ]
+    compiled = CompiledImportRules(rules)
+    for _ in range(500):
+        description = " ".join(rng.choice(words) for _ in range(rng.randint(0, 5)))
+        category_name = rng.choice(categories)
+        assert compiled.apply(description, category_name) == _sequential(description, category_name, rules)
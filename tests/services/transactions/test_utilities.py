@@ -4,10 +4,17 @@ from datetime import datetime
 from flask import Flask
 from sqlalchemy import create_engine
 from app.services.transactions.utilities import (
-    get_family_user_ids,
     create_or_get_category,
+    get_or_create_categories,
     apply_date_filter,
+    list_view_options,
 )
+from app import db
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.models.user import User
+from flask_login import login_user
+from tests.query_plan import capture_queries
 
 
 # --- Dummy classes for testing ---
@@ -18,7 +25,8 @@ class DummyUser:
 
 
 class DummyCategory:
-    def __init__(self, name, family_id):
+    def __init__(self, name, family_id, id=None):
+        self.id = id
         self.name = name
         self.family_id = family_id
 
@@ -91,25 +99,6 @@ class TestUtilities(unittest.TestCase):
     def tearDown(self):
         self.app_context.pop()
 
-    @patch("app.services.transactions.utilities.current_app")
-    @patch("app.services.transactions.utilities.current_user")
-    @patch("app.services.transactions.utilities.User")
-    def test_get_family_user_ids_with_family(self, mock_User, mock_current_user, mock_current_app):
-        dummy_user = DummyUser(id=10, family_id=1)
-        mock_current_user.id = dummy_user.id
-        mock_current_user.family_id = dummy_user.family_id
-        # Force the logger to be a synchronous MagicMock.
-        mock_current_app.logger = MagicMock()
-
-        user1 = DummyUser(id=10, family_id=1)
-        user2 = DummyUser(id=20, family_id=1)
-        dummy_users = [user1, user2]
-        mock_User.query.filter_by.return_value.all.return_value = dummy_users
-
-        ids = get_family_user_ids()
-        self.assertEqual(ids, [10, 20])
-        mock_current_app.logger.debug.assert_called()
-
     @patch("app.services.transactions.utilities.current_app")
     @patch("app.services.transactions.utilities.current_user")
     @patch("app.services.transactions.utilities.Category")
@@ -166,9 +155,10 @@ class TestUtilities(unittest.TestCase):
         self.assertIn(expected_date.strftime("%Y-%m-%d"), str(compiled))
         self.assertEqual(new_query, dummy_query)
 
+    @patch("app.services.transactions.utilities.has_request_context", return_value=True)
     @patch("app.services.transactions.utilities.flash")
     @patch("app.services.transactions.utilities.current_app")
-    def test_apply_date_filter_invalid(self, mock_current_app, mock_flash):
+    def test_apply_date_filter_invalid(self, mock_current_app, mock_flash, mock_has_request_context):
         dummy_query = MagicMock()
         invalid_date = "not-a-date"
         mock_current_app.logger = MagicMock()
@@ -178,5 +168,49 @@ class TestUtilities(unittest.TestCase):
         self.assertEqual(new_query, dummy_query)
 
 
+def test_get_or_create_categories_batches_queries(app):
+    with app.test_request_context():
+        user = User.query.filter_by(username="user1").first()
+        login_user(user)
+        family_id = user.family_id
+        existing = Category.query.filter_by(family_id=family_id).first()
+        with capture_queries(db.engine) as statements:
+            ids = get_or_create_categories({existing.name, "Batch New A", "Batch New B", ""}, family_id)
+        db.session.commit()
+
+        # One lookup, one multi-row insert and one lookup of the new rows.
+        assert len(statements) == 3
+        assert set(ids) == {existing.name, "Batch New A", "Batch New B"}
+        assert ids[existing.name] == existing.id
+        assert Category.query.filter_by(family_id=family_id, name="Batch New A").one().id == ids["Batch New A"]
+
+        # Names resolved earlier in the request come from the in-request map.
+        existing_name = existing.name
+        assert user.family_id == family_id  # reload the expired user outside the capture
+        with capture_queries(db.engine) as statements:
+            assert get_or_create_categories({"Batch New A"}, family_id) == {"Batch New A": ids["Batch New A"]}
+            assert create_or_get_category(existing_name) is existing
+        assert statements == []
+
+
+def test_list_view_options_load_names_with_the_rows(app):
+    with app.app_context():
+        user = User.query.filter_by(username="user1").first()
+        categories = Category.query.filter_by(family_id=user.family_id).all()
+        for i in range(12):
+            db.session.add(Transaction(amount=-1.0 - i, description=f"Listed {i}", timestamp=datetime(2024, 6, 1 + i),
+                                       user_id=user.id, category_id=categories[i % len(categories)].id, account_id=1 + i % 2))
+        db.session.commit()
+        db.session.expunge_all()
+
+        with capture_queries(db.engine) as statements:
+            rows = Transaction.query.options(*list_view_options()).filter(Transaction.description.like("Listed %")).all()
+            shown = [(tx.timestamp, tx.description, tx.amount, tx.category.name, tx.account.name) for tx in rows]
+
+        assert len(shown) == 12
+        assert len(statements) == 1
+        assert "user_id" not in statements[0][0].split("FROM")[0]
+
+
 if __name__ == "__main__":
     unittest.main()